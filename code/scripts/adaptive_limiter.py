@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Adaptive Limiter Module for Hidden Gems
+
+This module provides a concurrency limiter that sizes itself from observed
+latency and errors (additive increase, multiplicative decrease), so batch
+jobs can run several requests in parallel against the model server without
+overloading it.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_INITIAL_LIMIT = 2
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 8
+LATENCY_TOLERANCE = 2.0  # Back off once latency exceeds this multiple of the baseline
+DECREASE_FACTOR = 0.5  # Limit multiplier applied on errors
+EWMA_ALPHA = 0.2  # Weight of the newest sample in the smoothed latency
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter.
+
+    Every `limit` consecutive healthy calls raise the limit by one. An error
+    halves it, and a smoothed latency above LATENCY_TOLERANCE times the
+    baseline (the target latency, or the best smoothed latency seen so far)
+    lowers it by one. At most one decrease is applied per round trip so a
+    burst of slow calls that were already in flight only counts once.
+    """
+
+    def __init__(self, initial_limit=DEFAULT_INITIAL_LIMIT, min_limit=DEFAULT_MIN_LIMIT,
+                 max_limit=DEFAULT_MAX_LIMIT, target_latency=None):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = min(max(initial_limit, min_limit), self.max_limit)
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.smoothed_latency = None
+        self.best_latency = None
+        self.successes = 0
+        self.errors = 0
+        self._healthy_streak = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold one unit of concurrency for a call and record its outcome.
+
+        Exceptions raised inside the block count as errors and are re-raised.
+        """
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+        start = time.time()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(time.time() - start, ok)
+
+    def record(self, latency, ok=True):
+        """
+        Release a slot and adjust the limit from the call's outcome.
+
+        Parameters:
+        -----------
+        latency: float
+            Duration of the call in seconds
+        ok: bool
+            Whether the call succeeded
+        """
+        with self._condition:
+            self.in_flight -= 1
+            now = time.time()
+
+            if not ok:
+                self.errors += 1
+                self._decrease(now, DECREASE_FACTOR)
+                self._condition.notify_all()
+                return
+
+            self.successes += 1
+            if self.smoothed_latency is None:
+                self.smoothed_latency = latency
+            else:
+                self.smoothed_latency += EWMA_ALPHA * (latency - self.smoothed_latency)
+            if self.best_latency is None or self.smoothed_latency < self.best_latency:
+                self.best_latency = self.smoothed_latency
+
+            baseline = self.target_latency or self.best_latency
+            if self.smoothed_latency > baseline * LATENCY_TOLERANCE:
+                self._decrease(now, None)
+            else:
+                self._healthy_streak += 1
+                if self._healthy_streak >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._healthy_streak = 0
+
+            self._condition.notify_all()
+
+    def stats(self):
+        """Return the current limit, in-flight count, latency and outcome counts."""
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "smoothed_latency": self.smoothed_latency,
+                "successes": self.successes,
+                "errors": self.errors
+            }
+
+    def _decrease(self, now, factor):
+        """Lower the limit at most once per smoothed round trip; caller holds the lock."""
+        self._healthy_streak = 0
+        if now - self._last_decrease < (self.smoothed_latency or 0):
+            return
+        if factor is None:
+            new_limit = self.limit - 1
+        else:
+            new_limit = int(self.limit * factor)
+        self.limit = max(self.min_limit, new_limit)
+        self._last_decrease = now
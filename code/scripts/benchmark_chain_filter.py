@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+benchmark_chain_filter.py - Measure chain filter throughput
+Times is_chain_establishment / is_chain_many over place names, either taken
+from a hidden gems file or generated from the chain list plus local-sounding
+names, with a mix of repeated and unique names like a real crawl.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+import chain_filter
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+GEMS_PATH = os.path.join(ROOT_DIR, "static/assets/data/hidden_gems.json")
+
+LOCAL_WORDS = [
+    "Rosa's", "Golden", "Valley", "Harbor", "Taqueria", "Bakery", "Kitchen", "Cafe",
+    "Noodle", "House", "Grill", "Trattoria", "Market", "Deli", "Coffee", "Pho",
+    "Sushi", "Bistro", "Creamery", "Brewing", "Corner", "Garden", "Station", "Mill"
+]
+
+
+def generate_names(count, chain_share, seed):
+    """Return count names, roughly chain_share of them containing a chain name."""
+    rng = random.Random(seed)
+    chains = chain_filter.get_all_chains()
+    names = []
+    for i in range(count):
+        if rng.random() < chain_share:
+            names.append(f"{rng.choice(chains)} {rng.choice(LOCAL_WORDS)}")
+        else:
+            words = rng.sample(LOCAL_WORDS, rng.randint(2, 4))
+            names.append(f"{' '.join(words)} {i}")
+    return names
+
+
+def load_names(path):
+    with open(path, "r") as f:
+        data = json.load(f)
+    gems = data.get("features", data) if isinstance(data, dict) else data
+    return [gem.get("properties", gem).get("name", "") for gem in gems]
+
+
+def time_run(label, fn, names):
+    chain_filter._is_chain_normalized.cache_clear()
+    start = time.perf_counter()
+    chains = sum(fn(names))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(names) / elapsed:>12,.0f} names/s  ({chains} chains, {elapsed:.3f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chain filter")
+    parser.add_argument("--names", type=int, default=200000, help="Number of generated names")
+    parser.add_argument("--chain-share", type=float, default=0.2, help="Share of generated chain names")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--gems", nargs="?", const=GEMS_PATH,
+                        help="Use names from a hidden gems file instead (default path if no value)")
+    args = parser.parse_args()
+
+    names = load_names(args.gems) if args.gems else generate_names(args.names, args.chain_share, args.seed)
+    print(f"{len(names)} names, {len(set(names))} distinct, {len(chain_filter.get_all_chains())} chains")
+
+    time_run("is_chain_establishment", lambda batch: [chain_filter.is_chain_establishment(n) for n in batch], names)
+    time_run("is_chain_many", chain_filter.is_chain_many, names)
+    # Same names again with a warm normalization cache, as on later crawl cells
+    start = time.perf_counter()
+    chain_filter.is_chain_many(names)
+    elapsed = time.perf_counter() - start
+    print(f"{'is_chain_many (warm cache)':<28} {len(names) / elapsed:>12,.0f} names/s")
+
+
+if __name__ == "__main__":
+    main()
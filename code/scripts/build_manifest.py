@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Build Manifest Module for Hidden Gems
+
+This module provides the manifest behind incremental rebuilds of
+hidden_gems.json. It records a content hash of each cell's input elements
+together with the places the cell produced, and a content hash of every
+selected place keyed by OSM id. Unchanged cells are carried forward without
+being reprocessed. Gems whose place is unchanged are copied from the previous
+build as-is, so downstream caches keyed on them (reviews.json, saved
+recommendations) stay valid.
+"""
+
+import hashlib
+import json
+
+from review_journal import write_json_atomic
+
+MANIFEST_VERSION = 1
+
+
+def content_digest(data):
+    """Return a stable SHA-256 hex digest of JSON-serializable data."""
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def elements_digest(elements):
+    """Return a digest of OSM elements that does not depend on their order."""
+    digest = hashlib.sha256()
+    for element in sorted(elements, key=lambda element: (element['type'], element['id'])):
+        digest.update(content_digest(element).encode())
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Per-cell and per-place content hashes from the previous build.
+
+    The file holds {"version", "settings", "content_version", "cells": {key:
+    {"hash", "result"}}, "places": {id: hash}}. Cell results are only reused
+    while the build settings (sampler, seed, targets) match the ones they were
+    produced with, and previous gems only while the generated-content version
+    matches. Only cells seen in this build are written back.
+    """
+
+    def __init__(self, path, settings, reuse=True, content_version=None):
+        self.path = path
+        self.settings = settings
+        self.content_version = content_version
+        data = {}
+        if reuse:
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+
+        if data.get('version') != MANIFEST_VERSION:
+            data = {}
+        # Cell results depend on the settings; place hashes do not
+        self._previous_cells = data.get('cells', {}) if data.get('settings') == settings else {}
+        self._previous_places = data.get('places', {}) if data.get('content_version') == content_version else {}
+        self.cells = {}
+        self.places = {}
+        self.reused_cells = 0
+        self.reused_gems = 0
+
+    def cell_result(self, key, digest):
+        """Return the stored result of a cell if its input is unchanged, else None."""
+        entry = self._previous_cells.get(key)
+        if entry is None or entry['hash'] != digest:
+            return None
+        self.cells[key] = entry
+        self.reused_cells += 1
+        return entry['result']
+
+    def record_cell(self, key, digest, result):
+        self.cells[key] = {'hash': digest, 'result': result}
+
+    def place_unchanged(self, place):
+        """Return True if a place has the same content as in the previous build."""
+        return self._previous_places.get(place['id']) == content_digest(place)
+
+    def record_places(self, places):
+        """Record the hashes of this build's places."""
+        self.places = {place['id']: content_digest(place) for place in places}
+
+    def save(self):
+        write_json_atomic(self.path, {
+            'version': MANIFEST_VERSION,
+            'settings': self.settings,
+            'content_version': self.content_version,
+            'cells': self.cells,
+            'places': self.places
+        }, indent=None)
@@ -7,6 +7,7 @@ which don't qualify as "hidden gems" by definition.
 """
 
 import re
+from functools import lru_cache
 
 # Comprehensive list of popular chains and franchises to exclude
 CHAIN_ESTABLISHMENTS = {
@@ -130,6 +131,58 @@ for category in CHAIN_ESTABLISHMENTS.values():
 # Remove duplicates and sort
 ALL_CHAINS = sorted(set(ALL_CHAINS))
 
+# Common chain indicators in a name
+CHAIN_INDICATORS = [
+    r'\bfranchise\b', r'\bchain\b', r'\blocation\b', r'\bbranch\b',
+    r'#\d+', r'\bstore #', r'\blocation #'
+]
+
+NORMALIZED_CACHE_SIZE = 65536  # Distinct names remembered by the matcher
+
+
+def _trie_pattern(words):
+    """
+    Build a regex alternation for words with shared prefixes factored out.
+
+    "burger king" and "burger king express" become "burger king(?: express)?",
+    so the regex engine walks each prefix once instead of once per chain.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        end = node.get('') is True
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if end:
+            return '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+_CHAIN_NAMES = frozenset(chain.lower() for chain in ALL_CHAINS)
+
+# All chains in one pattern; \b around the group behaves like \b around each
+# chain because the regex backtracks into the other alternatives
+_CHAIN_PATTERN = re.compile(r'\b(?:' + _trie_pattern(_CHAIN_NAMES) + r')\b')
+_INDICATOR_PATTERN = re.compile('|'.join(CHAIN_INDICATORS))
+
+
+@lru_cache(maxsize=NORMALIZED_CACHE_SIZE)
+def _is_chain_normalized(normalized_name):
+    return (normalized_name in _CHAIN_NAMES
+            or _CHAIN_PATTERN.search(normalized_name) is not None
+            or _INDICATOR_PATTERN.search(normalized_name) is not None)
+
+
 def is_chain_establishment(name):
     """
     Check if a place name matches a known chain or franchise.
@@ -146,31 +199,22 @@ def is_chain_establishment(name):
     if not name:
         return False
     
-    # Normalize name for comparison
-    normalized_name = name.lower().strip()
+    return _is_chain_normalized(name.lower().strip())
+
+def is_chain_many(names):
+    """
+    Check a batch of place names against known chains and franchises.
     
-    # Direct match
-    for chain in ALL_CHAINS:
-        if chain.lower() == normalized_name:
-            return True
+    Parameters:
+    -----------
+    names: iterable of str
+        The names of the places to check
         
-        # Check if chain name is contained within place name
-        # Use word boundaries to avoid partial matches
-        pattern = r'\b' + re.escape(chain.lower()) + r'\b'
-        if re.search(pattern, normalized_name):
-            return True
-    
-    # Check for common chain indicators in the name
-    chain_indicators = [
-        r'\bfranchise\b', r'\bchain\b', r'\blocation\b', r'\bbranch\b',
-        r'#\d+', r'\bstore #', r'\blocation #'
-    ]
-    
-    for indicator in chain_indicators:
-        if re.search(indicator, normalized_name):
-            return True
-    
-    return False
+    Returns:
+    --------
+    list of bool: True for each name that is a chain establishment
+    """
+    return [is_chain_establishment(name) for name in names]
 
 def is_unnamed_place(name):
     """
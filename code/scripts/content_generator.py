@@ -8,6 +8,11 @@ opening hours, and other content for hidden gems.
 
 import random
 
+from gazetteer import load_gazetteer
+
+# Bump when generated fields change, so incremental builds regenerate gems
+GENERATED_CONTENT_VERSION = 2
+
 def generate_category_text(category):
     """
     Generate a readable category text.
@@ -34,10 +39,15 @@ def generate_category_text(category):
     
     return category_mapping.get(category, 'Hidden Gem')
 
-def generate_secondary_category():
+def generate_secondary_category(rng=None):
     """
     Generate a secondary category for variety.
     
+    Parameters:
+    -----------
+    rng: random.Random, optional
+        Generator for the random choices (default: the global random module)
+        
     Returns:
     --------
     str: A secondary category description
@@ -56,9 +66,9 @@ def generate_secondary_category():
         'Photography spot',
         'Unique find'
     ]
-    return random.choice(possible_categories)
+    return (rng or random).choice(possible_categories)
 
-def generate_description(place):
+def generate_description(place, rng=None):
     """
     Generate a compelling description for a place.
     
@@ -66,6 +76,8 @@ def generate_description(place):
     -----------
     place: dict
         The place data
+    rng: random.Random, optional
+        Generator for the random choices (default: the global random module)
         
     Returns:
     --------
@@ -126,7 +138,7 @@ def generate_description(place):
     
     # Select template based on category
     templates = description_templates.get(category, description_templates['scenic'])
-    template = random.choice(templates)
+    template = (rng or random).choice(templates)
     
     # Fill in the template
     if '{subcategory}' in template and subcategory:
@@ -134,7 +146,7 @@ def generate_description(place):
     else:
         return template.replace('{subcategory}', 'spot')
 
-def generate_address(place, california_cities=None):
+def generate_address(place, rng=None, city=None):
     """
     Generate a plausible address for the place.
     
@@ -142,14 +154,18 @@ def generate_address(place, california_cities=None):
     -----------
     place: dict
         The place data
-    california_cities: dict, optional
-        Dictionary of California cities and their coordinates
+    rng: random.Random, optional
+        Generator for the random choices (default: the global random module)
+    city: tuple, optional
+        (name, ZIP code) of the nearest city, e.g. from gazetteer.Gazetteer
         
     Returns:
     --------
     str: An address for the place
     """
+    rng = rng or random
     tags = place.get('tags', {})
+    nearest_zip = None
     
     # Try to use actual address data if available
     address_parts = []
@@ -158,21 +174,16 @@ def generate_address(place, california_cities=None):
         address_parts.append(f"{tags['addr:housenumber']} {tags['addr:street']}")
     elif 'addr:street' in tags:
         # Generate a plausible house number
-        house_number = random.randint(1, 9999)
+        house_number = rng.randint(1, 9999)
         address_parts.append(f"{house_number} {tags['addr:street']}")
     
     if 'addr:city' in tags:
         address_parts.append(tags['addr:city'])
     elif 'is_in:city' in tags:
         address_parts.append(tags['is_in:city'])
-    elif california_cities:
-        # Find the nearest city based on coordinates
-        coords = place.get('coordinates', [0, 0])
-        
-        # For simplicity, just pick a random city
-        # In a real implementation, you'd calculate distances
-        city = random.choice(list(california_cities.keys()))
-        address_parts.append(city)
+    elif city:
+        address_parts.append(city[0])
+        nearest_zip = city[1]
     
     # Add state
     if 'addr:state' in tags:
@@ -183,9 +194,11 @@ def generate_address(place, california_cities=None):
     # Add ZIP code
     if 'addr:postcode' in tags:
         address_parts.append(tags['addr:postcode'])
+    elif nearest_zip:
+        address_parts.append(nearest_zip)
     elif len(address_parts) > 1:  # If we have at least a city
         # Generate a plausible ZIP code for Northern California
-        zip_code = random.randint(94000, 96000)
+        zip_code = rng.randint(94000, 96000)
         address_parts.append(str(zip_code))
     
     # If we have enough parts to make a reasonable address
@@ -204,38 +217,7 @@ def generate_address(place, california_cities=None):
         # Truly generic address
         return "Northern California"
 
-def get_california_cities():
-    """
-    Return a dictionary of major Northern California cities and their coordinates.
-    
-    Returns:
-    --------
-    dict: Cities and their coordinates
-    """
-    return {
-        "San Francisco": [-122.4194, 37.7749],
-        "Oakland": [-122.2711, 37.8044],
-        "San Jose": [-121.8853, 37.3382],
-        "Sacramento": [-121.4944, 38.5816],
-        "Berkeley": [-122.2730, 37.8715],
-        "Santa Rosa": [-122.7141, 38.4404],
-        "Napa": [-122.2856, 38.2975],
-        "Stockton": [-121.2908, 37.9577],
-        "Modesto": [-121.0000, 37.6391],
-        "Redding": [-122.3917, 40.5865],
-        "Chico": [-121.8374, 39.7285],
-        "Eureka": [-124.1636, 40.8021],
-        "Santa Cruz": [-122.0308, 36.9741],
-        "South Lake Tahoe": [-119.9984, 38.9399],
-        "Fort Bragg": [-123.8053, 39.4457],
-        "Auburn": [-121.0768, 38.8966],
-        "Truckee": [-120.1832, 39.3280],
-        "Placerville": [-120.7983, 38.7296],
-        "Ukiah": [-123.2078, 39.1502],
-        "Monterey": [-121.8916, 36.6002]
-    }
-
-def generate_cost(place):
+def generate_cost(place, rng=None):
     """
     Generate a cost indicator based on the type of place.
     
@@ -243,11 +225,14 @@ def generate_cost(place):
     -----------
     place: dict
         The place data
+    rng: random.Random, optional
+        Generator for the random choices (default: the global random module)
         
     Returns:
     --------
     str: A cost indicator ($, $$, or $$$)
     """
+    rng = rng or random
     category = place.get('category', '')
     tags = place.get('tags', {})
     
@@ -257,16 +242,16 @@ def generate_cost(place):
     
     # Potentially costly places
     if category == 'food' or any(tag in tags.values() for tag in ['restaurant', 'cafe', 'pub', 'bar']):
-        return random.choice(["$$", "$$$"])
+        return rng.choice(["$$", "$$$"])
     
     # Museums, attractions, etc.
     if category == 'historic' or any(tag in tags.values() for tag in ['museum', 'gallery', 'theme_park']):
-        return random.choice(["$", "$$"])
+        return rng.choice(["$", "$$"])
     
     # Default for other types
-    return random.choice(["$", "$$"])
+    return rng.choice(["$", "$$"])
 
-def generate_opening_hours(place):
+def generate_opening_hours(place, rng=None):
     """
     Generate plausible opening hours based on the type of place.
     
@@ -274,11 +259,14 @@ def generate_opening_hours(place):
     -----------
     place: dict
         The place data
+    rng: random.Random, optional
+        Generator for the random choices (default: the global random module)
         
     Returns:
     --------
     str: Opening hours for the place
     """
+    rng = rng or random
     tags = place.get('tags', {})
     category = place.get('category', '')
     
@@ -292,7 +280,7 @@ def generate_opening_hours(place):
     
     # Restaurants and cafes
     if category == 'food' or any(tag in tags.values() for tag in ['restaurant', 'cafe']):
-        return random.choice([
+        return rng.choice([
             "11:00 AM - 10:00 PM",
             "8:00 AM - 9:00 PM",
             "10:00 AM - 8:00 PM"
@@ -300,14 +288,14 @@ def generate_opening_hours(place):
     
     # Museums and attractions
     if category == 'historic' or any(tag in tags.values() for tag in ['museum', 'gallery']):
-        return random.choice([
+        return rng.choice([
             "10:00 AM - 5:00 PM, Closed Mondays",
             "9:00 AM - 4:00 PM, Tuesday to Sunday",
             "11:00 AM - 6:00 PM, Wednesday to Monday"
         ])
     
     # Default for other types
-    return random.choice([
+    return rng.choice([
         "9:00 AM - 5:00 PM",
         "8:00 AM - 6:00 PM",
         "10:00 AM - 4:00 PM"
@@ -364,7 +352,7 @@ def format_osm_hours(osm_hours):
     # If we can't parse it nicely, just return the original
     return osm_hours
 
-def generate_time_estimate(place):
+def generate_time_estimate(place, rng=None):
     """
     Generate an estimated time to spend at the location.
     
@@ -372,6 +360,8 @@ def generate_time_estimate(place):
     -----------
     place: dict
         The place data
+    rng: random.Random, optional
+        Generator for the random choices (default: the global random module)
         
     Returns:
     --------
@@ -414,7 +404,7 @@ def generate_time_estimate(place):
         time_range = time_ranges['default']
     
     # Generate a random time within the range
-    minutes = random.randint(time_range[0], time_range[1])
+    minutes = (rng or random).randint(time_range[0], time_range[1])
     
     # Return just the number in minutes
     return minutes
@@ -455,16 +445,26 @@ def determine_rarity(place):
     # Default to moderately hidden
     return 'moderately hidden', 'purple'
 
-def format_place_to_schema(place, include_generated_content=True):
+def gem_rng(gem_id):
+    """Return the random generator for a gem's generated fields, seeded from its id."""
+    return random.Random(f"hidden-gem:{gem_id}")
+
+def format_place_to_schema(place, include_generated_content=True, city=None):
     """
     Format a place to match the Hidden Gems schema.
     
+    Generated fields are seeded from the gem id, so formatting the same
+    place again gives the same gem.
+    
     Parameters:
     -----------
     place: dict
         The raw place data
     include_generated_content: bool
         Whether to include generated content or just required fields
+    city: tuple, optional
+        (name, ZIP code) of the nearest city; looked up in the gazetteer if
+        not given (pass it when formatting many places, see Gazetteer.nearest)
         
     Returns:
     --------
@@ -484,23 +484,26 @@ def format_place_to_schema(place, include_generated_content=True):
     
     # Add generated content if requested
     if include_generated_content:
+        rng = gem_rng(gem['id'])
+        
         # Determine rarity and color
         rarity, color = determine_rarity(place)
         
-        # Get California cities for address generation
-        california_cities = get_california_cities()
+        # Nearest city for address generation
+        if city is None:
+            city = load_gazetteer().nearest_city(*gem['coordinates'])
         
         # Add generated fields
         gem.update({
-            'address': place.get('address', generate_address(place, california_cities)),
-            'opening_hours': place.get('opening_hours', generate_opening_hours(place)),
-            'dollar_sign': place.get('dollar_sign', generate_cost(place)),
+            'address': place.get('address') or generate_address(place, rng=rng, city=city),
+            'opening_hours': place.get('opening_hours', generate_opening_hours(place, rng)),
+            'dollar_sign': place.get('dollar_sign', generate_cost(place, rng)),
             'category_1': generate_category_text(gem['category']),
-            'category_2': place.get('category_2', generate_secondary_category()),
-            'description': place.get('description', generate_description(place)),
+            'category_2': place.get('category_2', generate_secondary_category(rng)),
+            'description': place.get('description', generate_description(place, rng)),
             'rarity': rarity,
             'color': color,
-            'time': place.get('time', generate_time_estimate(place))
+            'time': place.get('time', generate_time_estimate(place, rng))
         })
     
     return gem
\ No newline at end of file
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Dataset Versions Module for Hidden Gems
+
+This module publishes hidden_gems.json and reviews.json as immutable,
+content-hashed releases. Each release is stored once under its hash
+(releases/<dataset>/<hash>.json), and a delta listing the added, changed and
+removed gem ids is generated against the previous release
+(releases/<dataset>/<from>-<to>.delta.json). A small manifest names the
+current release of each dataset and the deltas available, so a client that
+already holds an older release fetches only the deltas, and every release
+and delta URL can be cached indefinitely. The recommendation server watches
+the manifest and reopens its memory-mapped gem store on a new release.
+"""
+
+import argparse
+import json
+import os
+import time
+
+from build_manifest import content_digest
+from review_journal import write_json_atomic
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+DATA_DIR = os.path.join(ROOT_DIR, "static/assets/data")
+RELEASES_DIR = os.path.join(DATA_DIR, "releases")
+RELEASE_MANIFEST_NAME = "manifest.json"
+
+RELEASE_MANIFEST_VERSION = 1
+KEEP_RELEASES = 10  # Releases (and the deltas between them) kept per dataset
+HASH_LENGTH = 16
+
+# Published datasets and their source files. Gems are a list keyed by 'id',
+# reviews a mapping of gem id to review text.
+DATASETS = {
+    "hidden_gems": os.path.join(DATA_DIR, "hidden_gems.json"),
+    "reviews": os.path.join(DATA_DIR, "reviews.json"),
+}
+
+
+def release_hash(data):
+    """Return the content hash that names a release of data."""
+    return content_digest(data)[:HASH_LENGTH]
+
+
+def _records(data):
+    """Map record id to record for a gem list or an id-keyed mapping."""
+    if isinstance(data, dict):
+        return data
+    return {item['id']: item for item in data}
+
+
+def _ids(data):
+    return list(data) if isinstance(data, dict) else [item['id'] for item in data]
+
+
+def make_delta(old, new):
+    """
+    Return the delta that turns one release of a dataset into the next.
+
+    Parameters:
+    -----------
+    old: list or dict
+        Previous release (list of gems, or mapping of gem id to record)
+    new: list or dict
+        New release, of the same shape as old
+
+    Returns:
+    --------
+    dict: {"added": {id: record}, "changed": {id: record}, "removed": [id]},
+          plus "order" (the new list of ids) when list order is not implied
+    """
+    old_records = _records(old)
+    new_records = _records(new)
+    delta = {
+        'added': {key: value for key, value in new_records.items() if key not in old_records},
+        'changed': {key: value for key, value in new_records.items()
+                    if key in old_records and old_records[key] != value},
+        'removed': [key for key in old_records if key not in new_records]
+    }
+    # Changed gems keep their position and added gems go last; anything else needs the full order
+    if isinstance(new, list) and _ids(apply_delta(old, delta)) != _ids(new):
+        delta['order'] = _ids(new)
+    return delta
+
+
+def apply_delta(data, delta):
+    """
+    Apply a delta from make_delta to a release, returning the next release.
+
+    Parameters:
+    -----------
+    data: list or dict
+        The release the delta was made from (not modified)
+    delta: dict
+        Delta from make_delta
+
+    Returns:
+    --------
+    list or dict: The release the delta was made to
+    """
+    removed = set(delta['removed'])
+    changed = delta['changed']
+    if isinstance(data, dict):
+        result = {key: value for key, value in data.items() if key not in removed}
+        result.update(changed)
+        result.update(delta['added'])
+        return result
+
+    result = [changed.get(item['id'], item) for item in data if item['id'] not in removed]
+    result.extend(delta['added'].values())
+    if 'order' in delta:
+        by_id = {item['id']: item for item in result}
+        result = [by_id[key] for key in delta['order']]
+    return result
+
+
+def release_path(releases_dir, name, version):
+    return os.path.join(releases_dir, name, f"{version}.json")
+
+
+def delta_path(releases_dir, name, from_version, to_version):
+    return os.path.join(releases_dir, name, f"{from_version}-{to_version}.delta.json")
+
+
+def load_release_manifest(releases_dir=RELEASES_DIR):
+    """Return the release manifest, or an empty one if nothing has been published."""
+    try:
+        with open(os.path.join(releases_dir, RELEASE_MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == RELEASE_MANIFEST_VERSION:
+            return manifest
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {'version': RELEASE_MANIFEST_VERSION, 'datasets': {}}
+
+
+def current_release(name, releases_dir=RELEASES_DIR):
+    """Return the hash of a dataset's current release, or None."""
+    return load_release_manifest(releases_dir)['datasets'].get(name, {}).get('current')
+
+
+def publish_release(name, data, releases_dir=RELEASES_DIR, keep=KEEP_RELEASES):
+    """
+    Publish data as the current release of a dataset.
+
+    Writes the release under its content hash and a delta from the previous
+    release, then updates the manifest. Publishing unchanged data is a no-op.
+    Releases beyond the newest keep are removed along with their deltas.
+
+    Parameters:
+    -----------
+    name: str
+        Dataset name (e.g. "hidden_gems", "reviews")
+    data: list or dict
+        The dataset
+    releases_dir: str
+        Root directory of the releases
+    keep: int
+        Number of releases to retain
+
+    Returns:
+    --------
+    str: Hash of the current release
+    """
+    manifest = load_release_manifest(releases_dir)
+    entry = manifest['datasets'].setdefault(name, {'current': None, 'releases': [], 'deltas': []})
+    version = release_hash(data)
+    if entry['current'] == version:
+        print(f"{name} release {version} is already current")
+        return version
+
+    os.makedirs(os.path.join(releases_dir, name), exist_ok=True)
+    path = release_path(releases_dir, name, version)
+    write_json_atomic(path, data, indent=None)
+    entry['releases'] = [release for release in entry['releases'] if release['hash'] != version]
+    entry['releases'].append({
+        'hash': version,
+        'created': int(time.time()),
+        'count': len(data),
+        'bytes': os.path.getsize(path)
+    })
+
+    previous = entry['current']
+    previous_path = release_path(releases_dir, name, previous) if previous else None
+    if previous_path and os.path.exists(previous_path):
+        with open(previous_path, 'r') as f:
+            delta = make_delta(json.load(f), data)
+        path = delta_path(releases_dir, name, previous, version)
+        write_json_atomic(path, dict(delta, **{'from': previous, 'to': version}), indent=None)
+        entry['deltas'] = [d for d in entry['deltas'] if d['from'] != previous]
+        entry['deltas'].append({
+            'from': previous,
+            'to': version,
+            'added': len(delta['added']),
+            'changed': len(delta['changed']),
+            'removed': len(delta['removed']),
+            'bytes': os.path.getsize(path)
+        })
+        print(f"{name} delta {previous} -> {version}: {len(delta['added'])} added, "
+              f"{len(delta['changed'])} changed, {len(delta['removed'])} removed")
+    entry['current'] = version
+
+    # Drop old releases; deltas out of them go too, as nobody can be routed through them
+    dropped = entry['releases'][:-keep] if keep else []
+    entry['releases'] = entry['releases'][len(dropped):]
+    retained = {release['hash'] for release in entry['releases']}
+    stale_deltas = [d for d in entry['deltas'] if d['from'] not in retained or d['to'] not in retained]
+    entry['deltas'] = [d for d in entry['deltas'] if d not in stale_deltas]
+
+    # Manifest first, so no published entry ever points at a removed file
+    write_json_atomic(os.path.join(releases_dir, RELEASE_MANIFEST_NAME), manifest)
+    for stale in [release_path(releases_dir, name, release['hash']) for release in dropped] + \
+                 [delta_path(releases_dir, name, d['from'], d['to']) for d in stale_deltas]:
+        try:
+            os.remove(stale)
+        except FileNotFoundError:
+            pass
+
+    print(f"Published {name} release {version} ({len(data)} records)")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish content-hashed releases of the Hidden Gems datasets")
+    parser.add_argument("datasets", nargs="*",
+                        help=f"Datasets to publish: {', '.join(sorted(DATASETS))} (default: all)")
+    parser.add_argument("--releases-dir", default=RELEASES_DIR, help="Root directory of the releases")
+    parser.add_argument("--keep", type=int, default=KEEP_RELEASES, help="Releases to retain per dataset")
+    args = parser.parse_args()
+
+    unknown = set(args.datasets) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown datasets: {', '.join(sorted(unknown))}")
+
+    for name in args.datasets or sorted(DATASETS):
+        with open(DATASETS[name], 'r') as f:
+            publish_release(name, json.load(f), args.releases_dir, args.keep)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ distribution of places across the region, while filtering out chains and franchi
 
 import os
 import json
+import argparse
 import random
 import time
 import math
@@ -20,17 +21,56 @@ import requests
 import numpy as np
 
 # Import custom modules
-from chain_filter import is_chain_establishment, is_unnamed_place
-from content_generator import format_place_to_schema
+from chain_filter import is_chain_many, is_unnamed_place
+from content_generator import GENERATED_CONTENT_VERSION, format_place_to_schema
+from adaptive_limiter import AdaptiveLimiter
+from build_manifest import BuildManifest, elements_digest
+from dataset_versions import DATASETS, publish_release
+from gazetteer import load_gazetteer
+from gem_store import default_store_path, write_gem_store
+from gem_tiles import default_tiles_path, write_gem_tiles
+from http_session import create_pooled_session
+from quadtree import DensityMask, allocate_quotas, partition_places
+from osm_crawler import CellManifest, OverpassError, crawl_cells, overpass_slots, parse_retry_after
+from osm_ingest import iter_source_elements
+from osm_store import OSMStore, element_position
+from process_pool import DEFAULT_PROCESSES, ordered_map
+from tiles import parse_tile_key, tile_bbox, tile_children, tile_key, tile_parent, tiles_for_bbox
 
 # Configuration
-OUTPUT_FILE = "hidden_gems.json"
+OUTPUT_FILE = DATASETS["hidden_gems"]  # The served dataset; its store, tiles and releases sit beside it
 CACHE_DIR = "osm_cache"
 MIN_PLACES_PER_QUADRANT = 100
 GRID_SIZE = 16  # Number of cells per dimension (16x16 grid = 256 cells)
 PLACES_PER_CELL_TARGET = 10  # Aim for this many places per cell
 MAX_RETRIES = 3
 OVERPASS_TIMEOUT = 60  # seconds
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+CRAWL_WORKERS = 4  # Upper bound on concurrent Overpass requests (capped by the server's slot count)
+MANIFEST_FILE = os.path.join(CACHE_DIR, "manifest.json")  # Per-tile crawl status
+BUILD_MANIFEST_FILE = os.path.join(CACHE_DIR, "build_manifest.json")  # Content hashes for incremental rebuilds
+
+# Tile cache: downloads are stored per web-mercator tile so any bbox can be assembled from them
+OSM_STORE_FILE = os.path.join(CACHE_DIR, "osm_cache.sqlite")  # Compressed, indexed tile store
+OSM_CACHE_TTL = 90 * 24 * 3600  # seconds before a cached tile is fetched again
+LEGACY_TILE_CACHE_DIR = os.path.join(CACHE_DIR, "tiles")  # JSON tile files from older runs, imported on first use
+TILE_ZOOM = 10  # Base zoom for assembling grid cells (~30 km tiles at NorCal latitudes)
+MIN_TILE_ZOOM = 5  # Coarsest cached ancestor consulted before fetching a tile
+MAX_TILE_ZOOM = 14  # Failed tiles are split into children down to this zoom
+
+# Adaptive quadtree sampling
+SAMPLER = "quadtree"  # "quadtree" or "grid"
+QUADTREE_ROOT_ZOOM = 7  # Zoom of the coarse root tiles before any subdivision
+QUADTREE_LEAF_PLACES = 4 * PLACES_PER_CELL_TARGET  # Downloaded cells are split locally past this many places
+QUADTREE_LEAF_DEPTH = 6  # Maximum local splits of a downloaded cell
+
+# Offline ingestion from local .osm.pbf / GeoJSON files
+OFFLINE_CHUNK_SIZE = 5000  # Elements filtered per batch
+
+# Parallel processing
+PROCESS_WORKERS = DEFAULT_PROCESSES  # Processes for filtering, selection and formatting
+SAMPLE_SEED = 42  # Per-cell sampling seeds derive from this, so output does not depend on worker count
+FORMAT_CHUNK_SIZE = 500  # Places formatted per task
 
 # Define the Northern California bounding box (Using corrected coordinates)
 # Format: [min_lat, min_lon, max_lat, max_lon]
@@ -167,97 +207,357 @@ def get_cell_quadrant(cell, bbox=NORCAL_BBOX):
     
     return get_quadrant(center_lat, center_lon, bbox)
 
-def get_cache_filename(bbox):
-    """Generate a cache filename for the given bounding box."""
-    # Create a string representation of the bbox with limited precision
-    bbox_str = "_".join([f"{coord:.4f}" for coord in bbox])
+_osm_store = None
+
+def get_osm_store():
+    """Open the shared tile store, importing JSON tile files left by older runs."""
+    global _osm_store
+    if _osm_store is None:
+        _osm_store = OSMStore(OSM_STORE_FILE, ttl=OSM_CACHE_TTL)
+        if os.path.isdir(LEGACY_TILE_CACHE_DIR):
+            import_tile_files(_osm_store, LEGACY_TILE_CACHE_DIR)
+    return _osm_store
+
+def import_tile_files(store, tile_dir):
+    """Move z/x/y.json tile files into the store, deleting each once imported."""
+    imported = 0
+    for root, _, files in os.walk(tile_dir):
+        for name in files:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                zoom, x = (int(part) for part in os.path.relpath(root, tile_dir).split(os.sep))
+                tile = (zoom, x, int(name[:-len('.json')]))
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except (ValueError, json.JSONDecodeError) as e:
+                print(f"Skipping unreadable tile file {path}: {e}")
+                continue
+            if data.get('split'):
+                store.put_split(tile)
+            else:
+                store.put_tile(tile, data.get('elements', []))
+            os.remove(path)
+            imported += 1
+    if imported:
+        print(f"Imported {imported} cached tile files into {store.path}")
+
+def build_overpass_query(bbox):
+    """Build the Overpass QL query for all POI tags within a bounding box."""
+    min_lat, min_lon, max_lat, max_lon = bbox
     
-    # Create a hash of the parameters
-    import hashlib
-    bbox_hash = hashlib.md5(bbox_str.encode()).hexdigest()
+    # Build tag query parts
+    tag_parts = []
+    for category, values in OSM_POI_TAGS.items():
+        for value in values:
+            tag_parts.append(f'node["{category}"="{value}"]({min_lat},{min_lon},{max_lat},{max_lon});')
+            tag_parts.append(f'way["{category}"="{value}"]({min_lat},{min_lon},{max_lat},{max_lon});')
     
-    return f"{CACHE_DIR}/osm_data_{bbox_hash}.json"
+    # Construct the query; "out center" gives ways a point so tiles can be clipped
+    return f"""
+    [out:json][timeout:{OVERPASS_TIMEOUT}];
+    (
+      {' '.join(tag_parts)}
+    );
+    out center;
+    """
 
-def download_osm_data(bbox, retries=MAX_RETRIES):
+def intersect_bbox(a, b):
+    """Return the overlap of two bounding boxes (may be empty if they do not touch)."""
+    return [max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])]
+
+def find_tile_sources(tile):
     """
-    Download OpenStreetMap data within a bounding box using the Overpass API.
+    Split a tile into the stored tiles that hold its data and the tiles still
+    to be fetched.
+    
+    A stored split marker is authoritative: the children that are present
+    serve their part of the tile and only the missing (or corrupt) children
+    are returned for fetching, so an over-dense parent is never queried again.
+    
+    Returns:
+    --------
+    tuple: (sources, missing), both lists of (zoom, x, y)
+    """
+    store = get_osm_store()
+    kind = store.tile_kind(tile)
+    if kind == 'data':
+        return ([tile], []) if store.check_tile(tile) else ([], [tile])
+    if kind == 'split':
+        sources, missing = [], []
+        for child in tile_children(tile):
+            if store.tile_kind(child) is None:
+                missing.append(child)
+                continue
+            child_sources, child_missing = find_tile_sources(child)
+            sources.extend(child_sources)
+            missing.extend(child_missing)
+        return sources, missing
+    
+    # A coarser tile fetched by an earlier run (at any resolution) covers this one
+    for zoom in range(tile[0] - 1, MIN_TILE_ZOOM - 1, -1):
+        ancestor = tile_parent(tile, zoom)
+        kind = store.tile_kind(ancestor)
+        if kind == 'data':
+            return ([ancestor], []) if store.check_tile(ancestor) else ([], [tile])
+        if kind == 'split':
+            # Its child on the way down to this tile is missing
+            break
+    return [], [tile]
+
+def resolve_tile_sources(tile):
+    """
+    Find the stored tiles that together hold a tile's data.
+    
+    A tile is served by its own entry, by its children if it was split, or
+    by the nearest cached ancestor (down to MIN_TILE_ZOOM).
+    
+    Returns:
+    --------
+    list of (zoom, x, y), or None if the tile is not (fully) cached
+    """
+    sources, missing = find_tile_sources(tile)
+    return None if missing else sources
+
+def iter_osm_elements(sources, bbox, seen_unpositioned=None):
+    """
+    Stream the elements of stored tiles that fall inside a bounding box.
+    
+    Parameters:
+    -----------
+    sources: list of (zoom, x, y)
+        Stored tiles, as returned by resolve_tile_sources
+    bbox: list [min_lat, min_lon, max_lat, max_lon]
+        Only elements inside this box are yielded, plus elements without a
+        position (counted as missing_coords by process_osm_elements)
+    seen_unpositioned: set or None
+        (type, id) keys of elements without a position already yielded for
+        other boxes. Shared across the cells of a run, so each of them is
+        yielded (and counted) once rather than once per cell on its tile.
+    
+    Yields:
+    -------
+    dict: Raw Overpass elements, each once even if it sits on a shared edge
+    """
+    store = get_osm_store()
+    seen = set()
+    for source in sources:
+        for element in store.iter_elements(source, bbox):
+            key = (element['type'], element['id'])
+            if key in seen:
+                continue
+            seen.add(key)
+            if seen_unpositioned is not None and None in element_position(element):
+                if key in seen_unpositioned:
+                    continue
+                seen_unpositioned.add(key)
+            yield element
+
+def fetch_osm_data(bbox, session=None):
+    """
+    Make a single Overpass request for a bounding box.
     
     Parameters:
     -----------
     bbox: list [min_lat, min_lon, max_lat, max_lon]
         Bounding box to search within
-    retries: int
-        Number of times to retry if the request fails
+    session: requests.Session or None
+        Session to send the request through
     
     Returns:
     --------
     data: dict
         The raw OSM data as returned by the Overpass API
+    
+    Raises:
+    -------
+    OverpassError: On a non-200 response (with the Retry-After hint for
+        429/504) or a query that timed out on the server
     """
-    min_lat, min_lon, max_lat, max_lon = bbox
+    post = session.post if session is not None else requests.post
+    try:
+        response = post(OVERPASS_URL, data={'data': build_overpass_query(bbox)}, timeout=OVERPASS_TIMEOUT+10)
+    except requests.exceptions.RequestException as e:
+        raise OverpassError(str(e)) from e
     
-    # Check for cached data
-    if not os.path.exists(CACHE_DIR):
-        os.makedirs(CACHE_DIR)
+    if response.status_code != 200:
+        raise OverpassError(
+            f"Status code {response.status_code}: {response.text[:200]}",
+            status_code=response.status_code,
+            retry_after=parse_retry_after(response.headers.get('Retry-After'))
+        )
     
-    cache_file = get_cache_filename(bbox)
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error reading cache: {e}")
+    data = response.json()
     
-    # Overpass API endpoint
-    overpass_url = "https://overpass-api.de/api/interpreter"
+    # Overpass reports server-side timeouts as a 200 with a remark and partial data
+    remark = data.get('remark', '')
+    if 'runtime error' in remark:
+        raise OverpassError(remark)
     
-    # Build tag query parts
-    tag_parts = []
-    for category, values in OSM_POI_TAGS.items():
-        for value in values:
-            tag_parts.append(f'node["{category}"="{value}"]({min_lat},{min_lon},{max_lat},{max_lon});')
-            tag_parts.append(f'way["{category}"="{value}"]({min_lat},{min_lon},{max_lat},{max_lon});')
+    return data
+
+def crawl_osm_tiles(tiles, max_workers=CRAWL_WORKERS, manifest_file=MANIFEST_FILE,
+                    retries=MAX_RETRIES, skip=None):
+    """
+    Make sure every tile is cached, downloading only the missing ones.
     
-    # Construct the query
-    query = f"""
-    [out:json][timeout:{OVERPASS_TIMEOUT}];
-    (
-      {' '.join(tag_parts)}
-    );
-    out body;
+    Missing tiles are fetched concurrently. A tile whose query still fails
+    after retries (usually an Overpass timeout on a dense area) is replaced
+    by its four children, down to MAX_TILE_ZOOM.
+    
+    Parameters:
+    -----------
+    tiles: list of (zoom, x, y)
+        The tiles to load
+    max_workers: int
+        Upper bound on concurrent Overpass requests
+    manifest_file: str
+        Path of the per-tile crawl manifest
+    retries: int
+        Attempts per tile before it is split or marked failed
+    skip: callable or None
+        skip(tile) returning True caches a child tile as empty instead of
+        querying it
+    
+    Returns:
+    --------
+    tile_sources: dict
+        Stored tiles holding each requested tile's data (see
+        resolve_tile_sources), with None for tiles that failed
+    failed_keys: list
+        Manifest keys of the failed tiles, retried on the next run
     """
+    store = get_osm_store()
+    tile_sources = {}
+    pending = []
+    for tile in tiles:
+        sources, missing = find_tile_sources(tile)
+        if missing:
+            # Only the missing parts of a partly fetched split go back on the list
+            pending.extend(missing)
+        else:
+            tile_sources[tile] = sources
+    pending = list(dict.fromkeys(pending))
     
-    # Make the request with retries
-    for i in range(retries):
-        try:
-            response = requests.post(overpass_url, data={'data': query}, timeout=OVERPASS_TIMEOUT+10)
-            
-            if response.status_code != 200:
-                print(f"Error: Status code {response.status_code}")
-                print(f"Response: {response.text[:200]}...")
-                if i < retries - 1:
-                    wait_time = 2 ** i  # Exponential backoff
-                    print(f"Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                continue
-            
-            data = response.json()
-            
-            # Cache the data
-            with open(cache_file, 'w') as f:
-                json.dump(data, f)
-            
-            return data
-        except Exception as e:
-            print(f"Error: {e}")
-            if i < retries - 1:
-                wait_time = 2 ** i  # Exponential backoff
-                print(f"Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
+    if not pending:
+        return tile_sources, []
+    
+    manifest = CellManifest(manifest_file)
+    retrying = [tile for tile in pending if manifest.status(tile_key(tile)) == "failed"]
+    print(f"{len(tile_sources)} tiles cached, fetching {len(pending)} "
+          f"({len(retrying)} failed last time)")
+    
+    session = create_pooled_session(max_workers)
+    slots = overpass_slots(session)
+    if slots:
+        print(f"Overpass allows {slots} concurrent queries")
+        max_workers = min(max_workers, slots)
+    
+    # Start with one request and grow while the server keeps up; back off on
+    # 429/504 errors or once responses approach the query timeout
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=max_workers, target_latency=OVERPASS_TIMEOUT / 2)
+    
+    failed_keys = []
+    queried = 0
+    while pending:
+        queried += len(pending)
+        with tqdm(total=len(pending), desc=f"Downloading z{pending[0][0]}+ tiles") as pbar:
+            fetched = crawl_cells(
+                {tile_key(tile): tile for tile in pending},
+                lambda tile: fetch_osm_data(tile_bbox(tile), session),
+                manifest=manifest,
+                max_workers=max_workers,
+                retries=retries,
+                limiter=limiter,
+                on_result=lambda key, data: pbar.update(1)
+            )
+        
+        next_pending = []
+        for tile in pending:
+            data = fetched[tile_key(tile)]
+            if data is not None:
+                store.put_tile(tile, data.get('elements', []))
+            elif tile[0] < MAX_TILE_ZOOM:
+                store.put_split(tile)
+                for child in tile_children(tile):
+                    if skip is not None and skip(child):
+                        store.put_tile(child, [])
+                    else:
+                        next_pending.append(child)
             else:
-                return {"elements": []}
+                failed_keys.append(tile_key(tile))
+        pending = next_pending
+    
+    print(f"Queried {queried} tiles")
+    for tile in tiles:
+        if tile not in tile_sources:
+            tile_sources[tile] = resolve_tile_sources(tile)
+    
+    return tile_sources, failed_keys
+
+def crawl_osm_cells(cells, max_workers=CRAWL_WORKERS, manifest_file=MANIFEST_FILE, retries=MAX_RETRIES):
+    """
+    Download OSM data for arbitrary cells by assembling them from cached tiles.
+    
+    Each cell is covered by TILE_ZOOM tiles (or a coarser cached ancestor),
+    so changing GRID_SIZE or the bounding box reuses everything already
+    downloaded and only fetches the tiles that are missing.
+    
+    Parameters:
+    -----------
+    cells: list of list [min_lat, min_lon, max_lat, max_lon]
+        The cell bounding boxes
+    max_workers: int
+        Upper bound on concurrent Overpass requests
+    manifest_file: str
+        Path of the per-tile crawl manifest
+    retries: int
+        Attempts per tile before it is split or marked failed
+    
+    Returns:
+    --------
+    sources_by_cell: list
+        Stored tiles holding each cell's data, in cell order, with None for
+        cells that failed; read them with iter_osm_elements(sources, cell)
+    failed_keys: list
+        Manifest keys of the failed tiles, retried on the next run
+    """
+    cell_tiles = [tiles_for_bbox(cell, TILE_ZOOM) for cell in cells]
+    unique_tiles = list(dict.fromkeys(tile for tiles in cell_tiles for tile in tiles))
+    tile_sources, failed_keys = crawl_osm_tiles(unique_tiles, max_workers, manifest_file, retries)
+    
+    sources_by_cell = []
+    for tiles in cell_tiles:
+        parts = [tile_sources[tile] for tile in tiles]
+        if any(part is None for part in parts):
+            sources_by_cell.append(None)
+        else:
+            sources_by_cell.append(list(dict.fromkeys(source for part in parts for source in part)))
+    
+    return sources_by_cell, failed_keys
+
+def download_osm_data(bbox, retries=MAX_RETRIES):
+    """
+    Download OpenStreetMap data within a bounding box using the Overpass API.
+    
+    Parameters:
+    -----------
+    bbox: list [min_lat, min_lon, max_lat, max_lon]
+        Bounding box to search within
+    retries: int
+        Number of times to retry if the request fails
     
-    return {"elements": []}
+    Returns:
+    --------
+    data: dict
+        The raw OSM data as returned by the Overpass API, or no elements if
+        any covering tile failed (use crawl_osm_cells to track failures)
+    """
+    sources_by_cell, _ = crawl_osm_cells([bbox], max_workers=1, retries=retries)
+    if sources_by_cell[0] is None:
+        return {"elements": []}
+    return {"elements": list(iter_osm_elements(sources_by_cell[0], bbox))}
 
 def process_osm_elements(elements):
     """
@@ -288,6 +588,10 @@ def process_osm_elements(elements):
         'accepted': 0
     }
     
+    # Check every distinct name against the chain list in one batch
+    names = list({element['tags'].get('name', '') for element in elements if 'tags' in element})
+    chain_names = {name for name, is_chain in zip(names, is_chain_many(names)) if is_chain}
+    
     for element in elements:
         # Skip elements without tags
         if 'tags' not in element:
@@ -305,7 +609,7 @@ def process_osm_elements(elements):
             continue
         
         # Skip chain establishments
-        if is_chain_establishment(name):
+        if name in chain_names:
             filtered_stats['chain_establishment'] += 1
             continue
         
@@ -431,18 +735,138 @@ def check_place_quality(place):
     # If we get here, the place meets our criteria
     return True
 
-def sample_with_grid():
+def new_filter_stats():
+    """Return zeroed filter statistics for a sampling run."""
+    return {
+        'total_elements': 0,
+        'missing_tags': 0,
+        'missing_coords': 0,
+        'unnamed': 0,
+        'chain_establishment': 0,
+        'accepted': 0,
+        'low_quality': 0
+    }
+
+def get_quality_places(elements, filter_stats):
+    """
+    Process a cell's OSM elements and keep the high-quality places.
+    
+    Parameters:
+    -----------
+    elements: list
+        List of OSM elements from the Overpass API
+    filter_stats: dict
+        Running filter statistics, updated in place
+    
+    Returns:
+    --------
+    quality_places: list
+        Places that passed filtering and the quality check
+    """
+    # Process the elements with filtering
+    places, cell_filter_stats = process_osm_elements(elements)
+    
+    # Update filter stats
+    for key in filter_stats:
+        if key in cell_filter_stats:
+            filter_stats[key] += cell_filter_stats[key]
+    
+    # Check quality and add to our collection
+    quality_places = []
+    for place in places:
+        place['is_high_quality'] = check_place_quality(place)
+        
+        if place['is_high_quality']:
+            quality_places.append(place)
+        else:
+            filter_stats['low_quality'] += 1
+    
+    return quality_places
+
+def merge_filter_stats(filter_stats, part):
+    """Add one task's filter statistics into the running totals."""
+    for key, value in part.items():
+        filter_stats[key] = filter_stats.get(key, 0) + value
+
+def cell_rng(key, seed=SAMPLE_SEED):
+    """Return the random generator for a cell, seeded from the run seed and the cell key."""
+    return random.Random(f"{seed}:{key}")
+
+def process_grid_cell(task):
+    """
+    Filter one grid cell's elements and select its places (process pool worker).
+    
+    Parameters:
+    -----------
+    task: tuple
+        (cell_idx, elements, seed)
+    
+    Returns:
+    --------
+    tuple: (selected places, filter statistics for the cell)
+    """
+    cell_idx, elements, seed = task
+    filter_stats = new_filter_stats()
+    if not elements:
+        return [], filter_stats
+    
+    quality_places = get_quality_places(elements, filter_stats)
+    
+    # If we have more places than needed for this cell, sample randomly
+    if len(quality_places) > PLACES_PER_CELL_TARGET:
+        # Select places with even category distribution if possible
+        quality_places = select_balanced_places(quality_places, PLACES_PER_CELL_TARGET, cell_rng(cell_idx, seed))
+    
+    return quality_places, filter_stats
+
+def process_quadtree_tile(task):
+    """
+    Filter one root tile's elements and split them into leaves (process pool worker).
+    
+    Parameters:
+    -----------
+    task: tuple
+        (tile, elements)
+    
+    Returns:
+    --------
+    tuple: ((bbox, places) leaves, filter statistics for the tile)
+    """
+    tile, elements = task
+    filter_stats = new_filter_stats()
+    if not elements:
+        return [], filter_stats
+    
+    quality_places = get_quality_places(elements, filter_stats)
+    leaves = partition_places(tile_bbox(tile), quality_places, QUADTREE_LEAF_PLACES, QUADTREE_LEAF_DEPTH)
+    return leaves, filter_stats
+
+def process_element_chunk(elements):
+    """Filter a chunk of elements (process pool worker); returns (quality places, filter statistics)."""
+    filter_stats = new_filter_stats()
+    return get_quality_places(elements, filter_stats), filter_stats
+
+def sample_with_grid(max_workers=CRAWL_WORKERS, processes=PROCESS_WORKERS, seed=SAMPLE_SEED, manifest=None):
     """
     Sample places using a grid-based approach for even distribution.
     
+    Parameters:
+    -----------
+    max_workers: int
+        Upper bound on concurrent Overpass requests
+    processes: int
+        Worker processes for filtering and selection
+    seed: int
+        Run seed; each cell samples with its own generator derived from it
+    manifest: BuildManifest or None
+        Cells whose elements are unchanged since the last build reuse its result
+    
     Returns:
     --------
     dict: Data with places from all quadrants and statistics
     """
     # Initialize collections
     all_places = []
-    quadrant_places = {q: [] for q in range(4)}
-    quadrant_category_counts = {q: defaultdict(int) for q in range(4)}
     
     print(f"Starting grid-based sampling of Northern California...")
     print(f"Bounding box: {NORCAL_BBOX}")
@@ -454,89 +878,305 @@ def sample_with_grid():
     print(f"Created {len(cells)} grid cells")
     
     # Track filter statistics
-    filter_stats = {
-        'total_elements': 0,
-        'missing_tags': 0,
-        'missing_coords': 0,
-        'unnamed': 0,
-        'chain_establishment': 0,
-        'accepted': 0,
-        'low_quality': 0
-    }
+    filter_stats = new_filter_stats()
     
-    # Track cells with and without places
+    # Track cells with places
     cells_with_places = 0
-    cells_without_places = 0
     
     # Sample each cell
     total_start = time.time()
     
-    with tqdm(total=len(cells), desc="Sampling cells") as pbar:
+    # Assemble cells from cached tiles, downloading missing tiles concurrently;
+    # failed tiles are recorded in the manifest
+    sources_by_cell, failed_cells = crawl_osm_cells(cells, max_workers=max_workers)
+    
+    digests = {}
+    reused = {}
+    
+    unpositioned = set()
+    
+    def cell_tasks():
+        # Elements are read lazily from the tile store, one cell at a time
         for cell_idx, cell in enumerate(cells):
-            # Determine which quadrant this cell belongs to
-            quadrant = get_cell_quadrant(cell)
-            
-            # Download OSM data for this cell
-            data = download_osm_data(cell)
-            elements = data.get('elements', [])
-            
-            if not elements:
-                cells_without_places += 1
-                pbar.update(1)
-                continue
-            
-            # Process the elements with filtering
-            places, cell_filter_stats = process_osm_elements(elements)
-            
-            # Update filter stats
-            for key in filter_stats:
-                if key in cell_filter_stats:
-                    filter_stats[key] += cell_filter_stats[key]
-            
-            # Track if this cell has valid places
-            has_places = False
-            
-            # Check quality and add to our collection
-            quality_places = []
-            for place in places:
-                place['is_high_quality'] = check_place_quality(place)
-                
-                if place['is_high_quality']:
-                    quality_places.append(place)
-                    has_places = True
+            sources = sources_by_cell[cell_idx]
+            elements = list(iter_osm_elements(sources, cell, unpositioned)) if sources else []
+            if manifest is not None:
+                digests[cell_idx] = elements_digest(elements)
+                reused[cell_idx] = manifest.cell_result(f"grid/{cell_idx}", digests[cell_idx])
+                if reused[cell_idx] is not None:
+                    elements = []  # Unchanged since the last build; nothing to process
+            yield cell_idx, elements, seed
+    
+    # Cells are fanned out to the process pool and merged back in grid order,
+    # so sampling depends on neither download order nor worker count
+    with tqdm(total=len(cells), desc="Sampling cells") as pbar:
+        results = ordered_map(process_grid_cell, cell_tasks(), processes)
+        for cell_idx, (selected_places, cell_filter_stats) in enumerate(results):
+            if manifest is not None:
+                if reused[cell_idx] is not None:
+                    selected_places, cell_filter_stats = reused[cell_idx]['places'], reused[cell_idx]['filter_stats']
                 else:
-                    filter_stats['low_quality'] += 1
-            
-            # If we have more places than needed for this cell, sample randomly
-            if len(quality_places) > PLACES_PER_CELL_TARGET:
-                # Select places with even category distribution if possible
-                selected_places = select_balanced_places(quality_places, PLACES_PER_CELL_TARGET)
-            else:
-                selected_places = quality_places
+                    manifest.record_cell(f"grid/{cell_idx}", digests[cell_idx],
+                                         {'places': selected_places, 'filter_stats': cell_filter_stats})
+            merge_filter_stats(filter_stats, cell_filter_stats)
             
             # Update counts
             if selected_places:
                 cells_with_places += 1
-                
-                # Add to collections
-                for place in selected_places:
-                    all_places.append(place)
-                    quadrant_places[quadrant].append(place)
-                    quadrant_category_counts[quadrant][place['category']] += 1
-            else:
-                cells_without_places += 1
+                all_places.extend(selected_places)
             
             # Update progress
             pbar.set_description(f"Sampling cells (found: {len(all_places)})")
             pbar.update(1)
     
+    return summarize_sample(all_places, filter_stats, failed_cells, total_start,
+                            f"Cells with places: {cells_with_places} / {len(cells)} "
+                            f"({cells_with_places/len(cells)*100:.1f}%)")
+
+def load_density_mask(manifest_file=MANIFEST_FILE):
+    """
+    Build a mask of empty and populated areas from earlier crawl results.
+    
+    Every tile (or, from older runs, bbox cell) the manifest records as done
+    contributes its bounding box and element count.
+    """
+    mask = DensityMask()
+    for key, entry in CellManifest(manifest_file).cells.items():
+        if entry.get('status') != 'done':
+            continue
+        try:
+            if '/' in key:
+                bbox = tile_bbox(parse_tile_key(key))
+            else:
+                bbox = [float(coord) for coord in key.split('_')]
+        except ValueError:
+            continue
+        mask.add(bbox, entry.get('elements') or 0)
+    return mask
+
+def sample_with_quadtree(max_workers=CRAWL_WORKERS, processes=PROCESS_WORKERS, seed=SAMPLE_SEED, manifest=None):
+    """
+    Sample places with an adaptive quadtree instead of a uniform grid.
+    
+    The quadtree is the tile pyramid: it starts from QUADTREE_ROOT_ZOOM tiles
+    and skips tiles that earlier crawls found empty (ocean, desert). Tiles
+    whose query fails (typically an Overpass timeout on a dense area) are
+    split into their four children and queried again, and children known to
+    be empty are skipped. Downloaded tiles are split locally into leaves of
+    at most QUADTREE_LEAF_PLACES places, and the overall budget of
+    GRID_SIZE**2 * PLACES_PER_CELL_TARGET places is shared across leaves by
+    density rather than clipped at a fixed per-cell target.
+    
+    Parameters:
+    -----------
+    max_workers: int
+        Upper bound on concurrent Overpass requests
+    processes: int
+        Worker processes for filtering and leaf partitioning
+    seed: int
+        Run seed; each leaf samples with its own generator derived from it
+    manifest: BuildManifest or None
+        Root tiles whose elements are unchanged since the last build reuse its result
+    
+    Returns:
+    --------
+    dict: Data with places from all quadrants and statistics
+    """
+    budget = GRID_SIZE * GRID_SIZE * PLACES_PER_CELL_TARGET
+    
+    print(f"Starting quadtree sampling of Northern California...")
+    print(f"Bounding box: {NORCAL_BBOX}")
+    print(f"Root tiles: zoom {QUADTREE_ROOT_ZOOM}, split on failure down to zoom {MAX_TILE_ZOOM}")
+    print(f"Place budget: {budget}")
+    
+    mask = load_density_mask()
+    filter_stats = new_filter_stats()
+    total_start = time.time()
+    
+    # Skip root tiles prior crawls found empty
+    root_tiles = tiles_for_bbox(NORCAL_BBOX, QUADTREE_ROOT_ZOOM)
+    is_empty = lambda tile: mask.is_empty(tile_bbox(tile))
+    to_fetch = [tile for tile in root_tiles if not is_empty(tile)]
+    pruned = len(root_tiles) - len(to_fetch)
+    
+    tile_sources, failed_cells = crawl_osm_tiles(to_fetch, max_workers=max_workers, skip=is_empty)
+    
+    fetched = [tile for tile in to_fetch if tile_sources[tile] is not None]
+    digests = {}
+    reused = {}
+    
+    unpositioned = set()
+    
+    def tile_tasks():
+        for tile in fetched:
+            # Root tiles extend past the region; keep only what lies inside it
+            elements = list(iter_osm_elements(tile_sources[tile], intersect_bbox(tile_bbox(tile), NORCAL_BBOX),
+                                              unpositioned))
+            if manifest is not None:
+                digests[tile] = elements_digest(elements)
+                reused[tile] = manifest.cell_result(tile_key(tile), digests[tile])
+                if reused[tile] is not None:
+                    elements = []  # Unchanged since the last build; nothing to process
+            yield tile, elements
+    
+    leaves = []
+    results = ordered_map(process_quadtree_tile, tile_tasks(), processes)
+    for tile, (tile_leaves, tile_filter_stats) in zip(fetched, results):
+        if manifest is not None:
+            if reused[tile] is not None:
+                tile_leaves, tile_filter_stats = reused[tile]['leaves'], reused[tile]['filter_stats']
+            else:
+                manifest.record_cell(tile_key(tile), digests[tile],
+                                     {'leaves': tile_leaves, 'filter_stats': tile_filter_stats})
+        merge_filter_stats(filter_stats, tile_filter_stats)
+        leaves.extend(tile_leaves)
+    
+    # Share the budget across leaves by density
+    quotas = allocate_quotas([len(places) for _, places in leaves], budget)
+    all_places = []
+    for (leaf_bbox, places), quota in zip(leaves, quotas):
+        if len(places) > quota:
+            leaf_key = "_".join(f"{coord:.6f}" for coord in leaf_bbox)
+            all_places.extend(select_balanced_places(places, quota, cell_rng(leaf_key, seed)))
+        else:
+            all_places.extend(places)
+    
+    return summarize_sample(all_places, filter_stats, failed_cells, total_start,
+                            f"Root tiles: {len(to_fetch)} ({pruned} skipped as empty), "
+                            f"leaves with places: {len(leaves)}")
+
+def sample_from_files(sources, bbox=NORCAL_BBOX, grid_size=GRID_SIZE, processes=PROCESS_WORKERS, seed=SAMPLE_SEED):
+    """
+    Sample places from local OSM files instead of the Overpass API.
+    
+    Elements are streamed from each source and filtered in chunks of
+    OFFLINE_CHUNK_SIZE through the same process_osm_elements / quality path
+    as downloads. Each grid cell keeps a reservoir sample of at most
+    PLACES_PER_CELL_TARGET places per category, so memory stays bounded
+    however large the extract is, and the final per-cell selection matches
+    sample_with_grid.
+    
+    Parameters:
+    -----------
+    sources: list of str
+        Paths to .osm.pbf or .geojson files
+    bbox: list [min_lat, min_lon, max_lat, max_lon]
+        Region to keep
+    grid_size: int
+        Number of cells per dimension
+    processes: int
+        Worker processes for filtering chunks
+    seed: int
+        Run seed; each cell samples with its own generator derived from it
+    
+    Returns:
+    --------
+    dict: Data with places from all quadrants and statistics
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    lat_step = (max_lat - min_lat) / grid_size
+    lon_step = (max_lon - min_lon) / grid_size
+    
+    print(f"Starting offline sampling from {len(sources)} file(s)...")
+    print(f"Bounding box: {bbox}")
+    print(f"Grid size: {grid_size}x{grid_size} cells")
+    
+    filter_stats = new_filter_stats()
+    total_start = time.time()
+    
+    # reservoirs[cell_idx][category] -> [places kept, places seen]
+    reservoirs = defaultdict(lambda: defaultdict(lambda: [[], 0]))
+    rngs = {}
+    
+    def add_to_reservoir(place):
+        lon, lat = place['coordinates']
+        i = min(int((lat - min_lat) / lat_step), grid_size - 1)
+        j = min(int((lon - min_lon) / lon_step), grid_size - 1)
+        cell_idx = i * grid_size + j
+        if cell_idx not in rngs:
+            rngs[cell_idx] = cell_rng(cell_idx, seed)
+        reservoir = reservoirs[cell_idx][place['category']]
+        reservoir[1] += 1
+        if len(reservoir[0]) < PLACES_PER_CELL_TARGET:
+            reservoir[0].append(place)
+        else:
+            slot = rngs[cell_idx].randrange(reservoir[1])
+            if slot < PLACES_PER_CELL_TARGET:
+                reservoir[0][slot] = place
+    
+    def chunks(source):
+        chunk = []
+        for element in tqdm(iter_source_elements(source, OSM_POI_TAGS), desc=os.path.basename(source), unit=" elements"):
+            chunk.append(element)
+            if len(chunk) >= OFFLINE_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    for source in sources:
+        # Chunks are filtered in the process pool and merged back in file
+        # order, so the reservoirs see places in the same order for any
+        # worker count
+        for quality_places, chunk_filter_stats in ordered_map(process_element_chunk, chunks(source), processes):
+            merge_filter_stats(filter_stats, chunk_filter_stats)
+            for place in quality_places:
+                lon, lat = place['coordinates']
+                if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                    add_to_reservoir(place)
+        print(f"Read {source}")
+    
+    # Select per cell in grid order, exactly as sample_with_grid would
+    all_places = []
+    for cell_idx in sorted(reservoirs):
+        places = [place for kept, _ in reservoirs[cell_idx].values() for place in kept]
+        if len(places) > PLACES_PER_CELL_TARGET:
+            places = select_balanced_places(places, PLACES_PER_CELL_TARGET, rngs[cell_idx])
+        all_places.extend(places)
+    
+    return summarize_sample(all_places, filter_stats, [], total_start,
+                            f"Cells with places: {len(reservoirs)} / {grid_size * grid_size} "
+                            f"({len(reservoirs) / (grid_size * grid_size) * 100:.1f}%)")
+
+def summarize_sample(all_places, filter_stats, failed_cells, total_start, coverage_line):
+    """
+    Print a summary of a sampling run and compile its result.
+    
+    Parameters:
+    -----------
+    all_places: list
+        The selected places
+    filter_stats: dict
+        Filter statistics for the run
+    failed_cells: list
+        Manifest keys of cells that could not be downloaded
+    total_start: float
+        Start time of the run
+    coverage_line: str
+        Sampler-specific line describing cell coverage
+    
+    Returns:
+    --------
+    dict: Data with places from all quadrants and statistics
+    """
+    quadrant_places = {q: [] for q in range(4)}
+    quadrant_category_counts = {q: defaultdict(int) for q in range(4)}
+    for place in all_places:
+        lon, lat = place['coordinates']
+        quadrant = get_quadrant(lat, lon)
+        quadrant_places[quadrant].append(place)
+        quadrant_category_counts[quadrant][place['category']] += 1
+    
     total_elapsed = (time.time() - total_start) / 60
     
     # Print summary
     print("\nSampling complete!")
     print(f"Total places: {len(all_places)}")
     print(f"Total time: {total_elapsed:.1f} minutes")
-    print(f"Cells with places: {cells_with_places} / {len(cells)} ({cells_with_places/len(cells)*100:.1f}%)")
+    print(coverage_line)
+    if failed_cells:
+        print(f"WARNING: {len(failed_cells)} tiles failed to download and were skipped; "
+              f"they are recorded in {MANIFEST_FILE} and will be retried on the next run")
     
     print("\nQuadrant distribution:")
     for q in range(4):
@@ -582,12 +1222,13 @@ def sample_with_grid():
         'quadrant_counts': [len(quadrant_places[q]) for q in range(4)],
         'category_counts': {cat: count for cat, count in category_counts.items()},
         'places': all_places,
-        'filter_stats': filter_stats
+        'filter_stats': filter_stats,
+        'failed_cells': failed_cells
     }
     
     return result
 
-def select_balanced_places(places, target_count):
+def select_balanced_places(places, target_count, rng=None):
     """
     Select a balanced set of places by category.
     
@@ -597,6 +1238,8 @@ def select_balanced_places(places, target_count):
         List of places to select from
     target_count: int
         Number of places to select
+    rng: random.Random or None
+        Generator used for sampling (default: the global random module)
         
     Returns:
     --------
@@ -636,12 +1279,20 @@ def select_balanced_places(places, target_count):
             selected_places.extend(available)
         else:
             # Otherwise, select random samples
-            selected = random.sample(available, count)
+            selected = (rng or random).sample(available, count)
             selected_places.extend(selected)
     
     return selected_places
 
-def format_to_hidden_gems_schema(data):
+def format_place_chunk(places):
+    """Format a chunk of places to the Hidden Gems schema (process pool worker)."""
+    # Nearest cities for the whole chunk in one vectorized lookup, for the places that have coordinates
+    located = [place['coordinates'] for place in places if 'coordinates' in place]
+    cities = iter(load_gazetteer().nearest(located) if located else [])
+    return [format_place_to_schema(place, city=next(cities) if 'coordinates' in place else None)
+            for place in places]
+
+def format_to_hidden_gems_schema(data, processes=PROCESS_WORKERS, manifest=None, previous_gems=None):
     """
     Format the sampled data to the Hidden Gems schema.
     
@@ -649,24 +1300,58 @@ def format_to_hidden_gems_schema(data):
     -----------
     data: dict
         The data returned by sample_with_grid
+    processes: int
+        Worker processes for formatting
+    manifest: BuildManifest or None
+        Records this build's place hashes; places unchanged since the last
+        build keep their previous gem
+    previous_gems: list or None
+        Gems from the last build, carried forward unchanged where possible
         
     Returns:
     --------
     list: Formatted hidden gems
     """
     raw_places = data.get('places', [])
-    hidden_gems = []
     
+    reusable = {}
+    if manifest is not None and previous_gems:
+        previous = {gem['id']: gem for gem in previous_gems}
+        reusable = {
+            place['id']: previous[place['id']] for place in raw_places
+            if place['id'] in previous and manifest.place_unchanged(place)
+        }
+    
+    to_format = [place for place in raw_places if place['id'] not in reusable]
+    tasks = (to_format[start:start + FORMAT_CHUNK_SIZE] for start in range(0, len(to_format), FORMAT_CHUNK_SIZE))
+    formatted = (gem for gems in ordered_map(format_place_chunk, tasks, processes) for gem in gems)
+    
+    # Merge reused and newly formatted gems back in sample order
+    hidden_gems = []
     for place in raw_places:
-        gem = format_place_to_schema(place)
+        gem = reusable[place['id']] if place['id'] in reusable else next(formatted)
         if gem:
             hidden_gems.append(gem)
     
+    if manifest is not None:
+        manifest.reused_gems = len(reusable)
+        manifest.record_places(raw_places)
+    
     return hidden_gems
 
+def load_previous_gems(output_file=OUTPUT_FILE):
+    """Return the gems of the last build, or an empty list if there is none."""
+    try:
+        with open(output_file, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
 def save_hidden_gems(hidden_gems, output_file=OUTPUT_FILE):
     """
-    Save hidden gems to a JSON file.
+    Save hidden gems to a JSON file, with a columnar gem store and per-tile
+    shards next to it, and publish it as a versioned release when it is the
+    served dataset (the default output file).
     
     Parameters:
     -----------
@@ -683,17 +1368,73 @@ def save_hidden_gems(hidden_gems, output_file=OUTPUT_FILE):
         json.dump(hidden_gems, f, indent=2)
     
     print(f"\nResults saved to {output_file}")
+    
+    # Columnar copy for consumers that memory-map the dataset
+    store_path = default_store_path(output_file)
+    write_gem_store(hidden_gems, store_path)
+    print(f"Gem store written to {store_path}")
+    
+    # Per-tile shards so clients can load just their viewport or route
+    tiles_path = default_tiles_path(output_file)
+    tile_manifest = write_gem_tiles(hidden_gems, tiles_path)
+    print(f"{len(tile_manifest['tiles'])} gem tiles written to {tiles_path}")
+    
+    # Immutable release plus a delta from the previous one for incremental refreshes.
+    # Only the served dataset is published, so a release never names gems the server lacks.
+    if os.path.abspath(output_file) == os.path.abspath(DATASETS["hidden_gems"]):
+        publish_release("hidden_gems", hidden_gems)
+    else:
+        print(f"Not publishing a release: {output_file} is not the served dataset {DATASETS['hidden_gems']}")
 
 def main():
-    """Main function to run the grid-based OpenStreetMap sampler."""
-    # Sample using grid
-    data = sample_with_grid()
+    """Main function to run the OpenStreetMap sampler."""
+    parser = argparse.ArgumentParser(description="Sample Northern California hidden gems from OpenStreetMap")
+    parser.add_argument("--sampler", choices=["quadtree", "grid"], default=SAMPLER,
+                        help=f"Cell sampling strategy (default: {SAMPLER})")
+    parser.add_argument("--workers", type=int, default=CRAWL_WORKERS,
+                        help=f"Maximum concurrent Overpass requests (default: {CRAWL_WORKERS})")
+    parser.add_argument("--source", action="append", default=[], metavar="PATH",
+                        help="Read a local .osm.pbf or .geojson file instead of querying Overpass "
+                             "(repeatable; uses the grid sampler)")
+    parser.add_argument("--processes", type=int, default=PROCESS_WORKERS,
+                        help=f"Worker processes for filtering and formatting (default: {PROCESS_WORKERS})")
+    parser.add_argument("--seed", type=int, default=SAMPLE_SEED,
+                        help=f"Sampling seed; output is the same for any --processes (default: {SAMPLE_SEED})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only reprocess cells and places that changed since the last build, "
+                             f"carrying the rest forward from {OUTPUT_FILE}")
+    args = parser.parse_args()
+    
+    # The manifest is always written so the next build can be incremental
+    sampler = "files" if args.source else args.sampler
+    manifest = BuildManifest(BUILD_MANIFEST_FILE, {
+        'sampler': sampler,
+        'seed': args.seed,
+        'grid_size': GRID_SIZE,
+        'places_per_cell': PLACES_PER_CELL_TARGET,
+        'quadtree_root_zoom': QUADTREE_ROOT_ZOOM,
+        'quadtree_leaf_places': QUADTREE_LEAF_PLACES,
+        'quadtree_leaf_depth': QUADTREE_LEAF_DEPTH
+    }, reuse=args.incremental, content_version=GENERATED_CONTENT_VERSION)
+    previous_gems = load_previous_gems() if args.incremental else None
+    
+    # Sample using the chosen strategy
+    if args.source:
+        data = sample_from_files(args.source, processes=args.processes, seed=args.seed)
+    elif args.sampler == "grid":
+        data = sample_with_grid(args.workers, args.processes, args.seed, manifest)
+    else:
+        data = sample_with_quadtree(args.workers, args.processes, args.seed, manifest)
     
     # Format to Hidden Gems schema
-    hidden_gems = format_to_hidden_gems_schema(data)
+    hidden_gems = format_to_hidden_gems_schema(data, args.processes, manifest, previous_gems)
     
     # Save to JSON
     save_hidden_gems(hidden_gems)
+    manifest.save()
+    if args.incremental:
+        print(f"Incremental build: reused {manifest.reused_cells} cells and "
+              f"{manifest.reused_gems} / {len(hidden_gems)} gems from the last build")
     
     print(f"Sampling completed. Found {len(hidden_gems)} hidden gems.")
 
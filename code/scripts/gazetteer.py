@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Gazetteer Module for Hidden Gems
+
+This module provides a nearest-city index over a gazetteer of Northern
+California towns (name, coordinates, ZIP code). Cities are stored as unit
+vectors on the sphere, where the largest dot product is the smallest
+great-circle distance, so a whole batch of places is resolved with a few
+array operations. A k-d tree is used instead when scipy is installed.
+"""
+
+import csv
+import os
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # Brute-force dot products are fast enough for a few hundred cities
+    cKDTree = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+GAZETTEER_PATH = os.path.join(ROOT_DIR, "static/assets/data/norcal_gazetteer.csv")
+
+QUERY_CHUNK_SIZE = 8192  # Places per dot-product block, bounding the temporary matrix
+
+
+def _unit_vectors(lons, lats):
+    lon_rad = np.radians(np.asarray(lons, dtype=np.float64))
+    lat_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack((cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)))
+
+
+class Gazetteer:
+    """
+    Nearest-city index built once over a list of cities.
+
+    Parameters:
+    -----------
+    names: list of str
+        City names
+    coordinates: array-like of [lon, lat]
+        City coordinates
+    zips: list of str
+        Representative ZIP code per city
+    """
+
+    def __init__(self, names, coordinates, zips):
+        self.names = list(names)
+        self.zips = list(zips)
+        self.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        self._vectors = _unit_vectors(self.coordinates[:, 0], self.coordinates[:, 1])
+        self._tree = cKDTree(self._vectors) if cKDTree is not None else None
+
+    @classmethod
+    def from_csv(cls, path=GAZETTEER_PATH):
+        """Load a gazetteer from a CSV file with name, lat, lon and zip columns."""
+        names, coordinates, zips = [], [], []
+        with open(path, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                names.append(row['name'])
+                coordinates.append([float(row['lon']), float(row['lat'])])
+                zips.append(row['zip'])
+        return cls(names, coordinates, zips)
+
+    def __len__(self):
+        return len(self.names)
+
+    def nearest_indices(self, coordinates):
+        """
+        Return the index of the nearest city for every point.
+
+        Parameters:
+        -----------
+        coordinates: array-like of [lon, lat]
+            Points to look up
+
+        Returns:
+        --------
+        numpy.ndarray: City index per point
+        """
+        points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        vectors = _unit_vectors(points[:, 0], points[:, 1])
+        if self._tree is not None:
+            return self._tree.query(vectors)[1]
+
+        indices = np.empty(len(vectors), dtype=np.intp)
+        for start in range(0, len(vectors), QUERY_CHUNK_SIZE):
+            block = vectors[start:start + QUERY_CHUNK_SIZE]
+            indices[start:start + len(block)] = np.argmax(block @ self._vectors.T, axis=1)
+        return indices
+
+    def nearest(self, coordinates):
+        """Return (city name, ZIP code) of the nearest city for every [lon, lat] point."""
+        return [(self.names[i], self.zips[i]) for i in self.nearest_indices(coordinates)]
+
+    def nearest_city(self, lon, lat):
+        """Return (city name, ZIP code) of the city nearest to one point."""
+        return self.nearest([[lon, lat]])[0]
+
+
+@lru_cache(maxsize=None)
+def load_gazetteer(path=GAZETTEER_PATH):
+    """Return the gazetteer at path, loading and indexing it once per process."""
+    return Gazetteer.from_csv(path)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Gem Index Module for Hidden Gems
+
+This module provides an in-memory spatial index over the hidden gems dataset so
+that bounding-box and route-corridor queries only look at gems in nearby grid
+cells instead of scanning the whole dataset.
+"""
+
+import math
+from collections import defaultdict
+from math import radians, cos
+import numpy as np
+
+from route_geometry import filter_points_along_route, parse_route, route_metrics
+
+DEFAULT_CELL_SIZE = 0.1  # degrees (~11 km of latitude)
+KM_PER_DEGREE_LAT = 111.32
+
+
+def project_gem(gem, fields=None):
+    """
+    Return a copy of a gem restricted to the requested fields.
+
+    Parameters:
+    -----------
+    gem: dict
+        The gem to project
+    fields: list or None
+        Field names to keep; None keeps every field. 'id' is always kept.
+
+    Returns:
+    --------
+    dict: Projected copy of the gem
+    """
+    if not fields:
+        return dict(gem)
+    return {key: gem[key] for key in gem if key == 'id' or key in fields}
+
+
+class GemIndex:
+    """
+    Uniform lat/lon grid index over a list of gems.
+
+    Each gem is bucketed by its coordinates into cells of `cell_size` degrees.
+    Queries enumerate only the cells that can intersect the query region and
+    run the exact distance test on the gems inside them.
+    """
+
+    def __init__(self, gems, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.gems = []
+        self.cells = defaultdict(list)
+
+        for gem in gems:
+            coords = gem.get('coordinates')
+            if not coords or len(coords) != 2:
+                continue
+            self.cells[self._cell_key(coords[0], coords[1])].append(len(self.gems))
+            self.gems.append(gem)
+
+        self.coords = np.array([gem['coordinates'] for gem in self.gems], dtype=float).reshape(-1, 2)
+        self.categories = [gem.get('category') for gem in self.gems]
+
+    @classmethod
+    def from_store(cls, store, cell_size=DEFAULT_CELL_SIZE):
+        """
+        Build an index over a memory-mapped GemStore without decoding its gems.
+
+        Cells are computed from the coordinate column in one pass; gems are
+        decoded from the store only when a query returns them. A store
+        without a coordinate column (empty, or with malformed coordinates) is
+        indexed from its decoded gems instead.
+        """
+        if not any(field['kind'] == 'coords' for field in store.fields if field['name'] == 'coordinates'):
+            return cls(store, cell_size)
+
+        index = cls([], cell_size)
+        coords = np.asarray(store.coordinates)
+        located = np.flatnonzero(~np.isnan(coords).any(axis=1))
+        if len(located) < len(coords):
+            # Keep a dense position -> store row mapping only when some gems are unlocated
+            index.gems = _Rows(store, located)
+            coords = coords[located]
+        else:
+            index.gems = store
+        index.coords = coords
+        index.categories = np.asarray(store.column('category'))[located] if any(
+            field['name'] == 'category' for field in store.fields) else [None] * len(coords)
+
+        # Group positions by cell with one sort instead of a Python loop per gem
+        keys = np.floor(coords / cell_size).astype(np.int64)
+        order = np.lexsort((keys[:, 1], keys[:, 0]))
+        sorted_keys = keys[order]
+        boundaries = np.flatnonzero(np.any(np.diff(sorted_keys, axis=0), axis=1)) + 1
+        for group in np.split(order, boundaries):
+            if len(group):
+                index.cells[(int(keys[group[0], 0]), int(keys[group[0], 1]))] = np.sort(group).tolist()
+        return index
+
+    def __len__(self):
+        return len(self.gems)
+
+    def _cell_key(self, lon, lat):
+        return (math.floor(lon / self.cell_size), math.floor(lat / self.cell_size))
+
+    def _cells_in_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Yield the keys of populated cells overlapping a bounding box."""
+        min_x, min_y = self._cell_key(min_lon, min_lat)
+        max_x, max_y = self._cell_key(max_lon, max_lat)
+
+        # Walk whichever is smaller: the grid window or the populated cells
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self.cells):
+            for key in self.cells:
+                if min_x <= key[0] <= max_x and min_y <= key[1] <= max_y:
+                    yield key
+            return
+
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                if (x, y) in self.cells:
+                    yield (x, y)
+
+    def query_bbox(self, bbox, categories=None):
+        """
+        Find gems inside a bounding box.
+
+        Parameters:
+        -----------
+        bbox: list [min_lat, min_lon, max_lat, max_lon]
+            The bounding box to search
+        categories: collection or None
+            Only return gems whose 'category' is in this collection
+
+        Returns:
+        --------
+        list: Matching gems, in dataset order
+        """
+        min_lat, min_lon, max_lat, max_lon = bbox
+        matches = []
+
+        for key in self._cells_in_bbox(min_lat, min_lon, max_lat, max_lon):
+            for i in self.cells[key]:
+                lon, lat = self.coords[i]
+                if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+                    continue
+                if categories and self.categories[i] not in categories:
+                    continue
+                matches.append(i)
+
+        return [self.gems[i] for i in sorted(matches)]
+
+    def query_along_route(self, route, buffer_km=30, categories=None):
+        """
+        Find gems within a buffer distance of a route polyline.
+
+        Parameters:
+        -----------
+        route: str or list
+            Route vertices as [lon, lat] pairs (two for a straight
+            origin->destination trip), or an encoded polyline
+        buffer_km: float
+            Maximum distance from the route in kilometers
+        categories: collection or None
+            Only return gems whose 'category' is in this collection
+
+        Returns:
+        --------
+        list: Copies of matching gems with 'distanceFromRoute' and
+            'routeProgress' set, ordered by progress along the route
+        """
+        vertices = parse_route(route)
+
+        # Pad the route's bounding box by the buffer, converted to degrees
+        mid_lat = vertices[:, 1].mean()
+        pad_lat = buffer_km / KM_PER_DEGREE_LAT
+        pad_lon = buffer_km / (KM_PER_DEGREE_LAT * max(cos(radians(mid_lat)), 0.01))
+        min_lon, min_lat = vertices.min(axis=0) - [pad_lon, pad_lat]
+        max_lon, max_lat = vertices.max(axis=0) + [pad_lon, pad_lat]
+
+        keys = list(self._cells_in_bbox(min_lat, min_lon, max_lat, max_lon))
+        if not keys:
+            return []
+
+        # Drop cells whose centre is further from the route than the buffer
+        # plus half the cell diagonal; they cannot contain a match
+        cell_radius_km = self.cell_size * KM_PER_DEGREE_LAT * math.sqrt(2) / 2
+        centers = (np.array(keys, dtype=float) + 0.5) * self.cell_size
+        cell_distances, _ = route_metrics(centers, vertices)
+
+        candidates = []
+        for key, cell_distance in zip(keys, cell_distances):
+            if cell_distance <= buffer_km + cell_radius_km:
+                candidates.extend(self.cells[key])
+        if categories:
+            candidates = [i for i in candidates if self.categories[i] in categories]
+        if not candidates:
+            return []
+
+        candidates = np.array(candidates)
+        hits, distances, progress = filter_points_along_route(
+            self.coords[candidates], vertices, buffer_km
+        )
+
+        results = []
+        for hit, distance, fraction in zip(hits, distances, progress):
+            match = dict(self.gems[candidates[hit]])
+            match['distanceFromRoute'] = float(distance)
+            match['routeProgress'] = float(fraction)
+            results.append(match)
+
+        results.sort(key=lambda g: g['routeProgress'])
+        return results
+
+
+class _Rows:
+    """Sequence view of selected rows of a GemStore."""
+
+    def __init__(self, store, rows):
+        self.store = store
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        return self.store[int(self.rows[i])]
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Gem Store Module for Hidden Gems
+
+This module provides a columnar, memory-mapped binary form of hidden_gems.json.
+A store is a directory of NumPy arrays: coordinates as an (N, 2) float array,
+numeric fields as int/float arrays, low-cardinality text (category, rarity,
+description templates...) as small integer codes into a vocabulary, and
+free text (names, addresses) as a UTF-8 blob with an offset index. Readers
+map the files read-only, so opening a store costs the same for a thousand
+gems or a million, and worker processes share the pages through the OS
+page cache. Gems are decoded into dicts only when they are accessed.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+STORE_VERSION = 1
+CATEGORY_MAX_VALUES = 65535  # Text fields with more distinct values are stored as strings
+
+
+def _field_kind(name, values, count):
+    """Choose the column kind for a field from its present values."""
+    if name == 'coordinates' and all(
+            isinstance(v, list) and len(v) == 2 and
+            all(isinstance(c, (int, float)) and not isinstance(c, bool) for c in v) for v in values):
+        return 'coords'
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return 'int'
+    if all(isinstance(v, float) for v in values):
+        return 'float'
+    if all(isinstance(v, str) for v in values):
+        distinct = len(set(values))
+        # Worth a vocabulary when values repeat on average
+        if distinct <= CATEGORY_MAX_VALUES and distinct * 2 <= max(count, 2):
+            return 'category'
+        return 'string'
+    return 'json'
+
+
+def _write_strings(directory, name, strings):
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+    with open(os.path.join(directory, f"{name}.utf8"), 'wb') as f:
+        for b in encoded:
+            f.write(b)
+
+
+def write_gem_store(gems, path):
+    """
+    Write gems as a columnar store directory, replacing any existing store.
+
+    Parameters:
+    -----------
+    gems: list of dict
+        Gems in the Hidden Gems schema
+    path: str
+        Store directory to create
+
+    Returns:
+    --------
+    dict: The store's metadata
+    """
+    count = len(gems)
+
+    # Fields in first-seen order; gems are rebuilt with their keys in this order
+    names = []
+    for gem in gems:
+        for key in gem:
+            if key not in names:
+                names.append(key)
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".gem_store.")
+    os.chmod(tmp_dir, 0o755)  # mkdtemp is owner-only; the store is read by other processes
+
+    fields = []
+    for name in names:
+        present = np.array([name in gem for gem in gems], dtype=bool)
+        values = [gem[name] for gem in gems if name in gem]
+        kind = _field_kind(name, values, count)
+        field = {'name': name, 'kind': kind}
+
+        # Absent values are filled with a placeholder and masked out
+        column = [gem.get(name) for gem in gems]
+        if kind == 'coords':
+            data = np.array([v if v is not None else [np.nan, np.nan] for v in column], dtype=np.float64)
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), data.reshape(-1, 2))
+        elif kind in ('int', 'float'):
+            dtype = np.int64 if kind == 'int' else np.float64
+            np.save(os.path.join(tmp_dir, f"{name}.npy"),
+                    np.array([v if v is not None else 0 for v in column], dtype=dtype))
+        elif kind == 'category':
+            vocab = sorted(set(values))
+            codes = {value: code for code, value in enumerate(vocab)}
+            dtype = np.uint8 if len(vocab) <= 256 else np.uint16
+            np.save(os.path.join(tmp_dir, f"{name}.npy"),
+                    np.array([codes.get(v, 0) for v in column], dtype=dtype))
+            field['vocab'] = vocab
+        elif kind == 'string':
+            _write_strings(tmp_dir, name, [v if v is not None else '' for v in column])
+        else:
+            _write_strings(tmp_dir, name, [json.dumps(v) if name in gem else '' for v, gem in zip(column, gems)])
+
+        if not present.all():
+            np.save(os.path.join(tmp_dir, f"{name}.present.npy"), present)
+            field['optional'] = True
+        fields.append(field)
+
+    meta = {'version': STORE_VERSION, 'count': count, 'fields': fields}
+    with open(os.path.join(tmp_dir, "meta.json"), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    # Swap the new store in; readers holding the old files keep their mappings
+    replace_directory(tmp_dir, path)
+    return meta
+
+
+def replace_directory(new_dir, path):
+    """
+    Move a fully written directory to path, replacing whatever is there.
+
+    The old directory is renamed aside before the new one moves in, so path
+    always holds a complete tree; open files in the old one stay readable.
+    """
+    old_dir = None
+    if os.path.exists(path):
+        old_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".replaced.")
+        os.rename(path, os.path.join(old_dir, "previous"))
+    os.rename(new_dir, path)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+class GemStore:
+    """
+    Read-only, memory-mapped view of a gem store directory.
+
+    Behaves like a sequence of gem dicts (len, indexing, slicing, iteration);
+    columns can also be read directly without decoding gems.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), 'r') as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported gem store version {meta.get('version')} in {path}")
+
+        self.count = meta['count']
+        self.fields = meta['fields']
+        self._arrays = {}
+        self._offsets = {}
+        self._blobs = {}
+        self._present = {}
+        self._vocab = {}
+
+        for field in self.fields:
+            name, kind = field['name'], field['kind']
+            if kind in ('string', 'json'):
+                self._offsets[name] = np.load(os.path.join(path, f"{name}.offsets.npy"), mmap_mode='r')
+                blob_path = os.path.join(path, f"{name}.utf8")
+                # np.memmap cannot map an empty file
+                self._blobs[name] = (np.memmap(blob_path, dtype=np.uint8, mode='r')
+                                     if os.path.getsize(blob_path) else np.zeros(0, dtype=np.uint8))
+            else:
+                self._arrays[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+            if kind == 'category':
+                self._vocab[name] = field['vocab']
+            if field.get('optional'):
+                self._present[name] = np.load(os.path.join(path, f"{name}.present.npy"), mmap_mode='r')
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self._gem(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._gem(i) for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("gem index out of range")
+        return self._gem(int(index))
+
+    @property
+    def coordinates(self):
+        """(N, 2) array of [lon, lat], NaN where a gem has no coordinates."""
+        return self._arrays['coordinates']
+
+    def column(self, name):
+        """
+        Return a whole field as an array without decoding gems.
+
+        Numeric fields and coordinates are returned as mapped arrays,
+        categorical fields as an object array of their values, and text
+        fields as a list of strings.
+        """
+        field = next(f for f in self.fields if f['name'] == name)
+        if field['kind'] in ('coords', 'int', 'float'):
+            return self._arrays[name]
+        if field['kind'] == 'category':
+            return np.array(self._vocab[name], dtype=object)[self._arrays[name]]
+        return [self._value(field, i) for i in range(self.count)]
+
+    def _value(self, field, i):
+        name, kind = field['name'], field['kind']
+        if kind == 'coords':
+            return [float(c) for c in self._arrays[name][i]]
+        if kind == 'int':
+            return int(self._arrays[name][i])
+        if kind == 'float':
+            return float(self._arrays[name][i])
+        if kind == 'category':
+            return self._vocab[name][self._arrays[name][i]]
+        offsets = self._offsets[name]
+        text = self._blobs[name][offsets[i]:offsets[i + 1]].tobytes().decode('utf-8')
+        return text if kind == 'string' else json.loads(text)
+
+    def _gem(self, i):
+        gem = {}
+        for field in self.fields:
+            name = field['name']
+            if name in self._present and not self._present[name][i]:
+                continue
+            gem[name] = self._value(field, i)
+        return gem
+
+
+def store_is_current(json_path, store_path):
+    """Return True if a store exists and is at least as new as its source JSON file."""
+    meta_path = os.path.join(store_path, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    return not os.path.exists(json_path) or os.path.getmtime(meta_path) >= os.path.getmtime(json_path)
+
+
+def default_store_path(json_path):
+    """Return the store directory that sits next to a gems JSON file."""
+    return os.path.splitext(json_path)[0] + ".store"
+
+
+def load_gems(json_path, store_path=None):
+    """
+    Load gems from the columnar store if it is current, else from JSON.
+
+    Parameters:
+    -----------
+    json_path: str
+        Path to hidden_gems.json
+    store_path: str or None
+        Store directory (default: next to json_path, see default_store_path)
+
+    Returns:
+    --------
+    GemStore or list: The gems
+    """
+    store_path = store_path or default_store_path(json_path)
+    if store_is_current(json_path, store_path):
+        try:
+            return GemStore(store_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not open gem store {store_path}: {e}; falling back to {json_path}")
+    with open(json_path, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a columnar gem store from hidden_gems.json")
+    parser.add_argument("gems", help="Path to hidden_gems.json")
+    parser.add_argument("--output", help="Store directory (default: next to the JSON file)")
+    parser.add_argument("--check", action="store_true", help="Verify the store decodes back to the JSON gems")
+    args = parser.parse_args()
+
+    with open(args.gems, 'r') as f:
+        gems = json.load(f)
+    output = args.output or default_store_path(args.gems)
+    meta = write_gem_store(gems, output)
+    kinds = ", ".join(f"{field['name']}:{field['kind']}" for field in meta['fields'])
+    print(f"Wrote {meta['count']} gems to {output} ({kinds})")
+
+    if args.check:
+        mismatches = sum(1 for a, b in zip(gems, GemStore(output)) if a != b)
+        print(f"{mismatches} gems differ after decoding")
+
+
+if __name__ == "__main__":
+    main()
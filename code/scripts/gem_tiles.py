@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Gem Tiles Module for Hidden Gems
+
+This module shards the gem dataset into web-mercator tiles so clients can
+load only the gems around a viewport or route (served by /api/gems/tiles)
+instead of the whole hidden_gems.json. Each populated tile is written as compact JSON
+(z/x/y.json) with a gzip-precompressed copy (z/x/y.json.gz), and a small
+manifest lists every tile with its gem count, sizes and content hash.
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import os
+import tempfile
+from collections import defaultdict
+
+import numpy as np
+
+from gem_store import replace_directory
+from route_geometry import KM_PER_DEGREE_LAT, parse_route, route_metrics
+from tiles import lonlat_to_tile, tile_bbox, tile_key, tiles_for_bbox
+
+GEM_TILE_ZOOM = 9  # ~60 km tiles at Northern California latitudes
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+GZIP_LEVEL = 9
+
+
+def tile_path(directory, tile, compressed=False):
+    """Return the file a tile's gems are stored in."""
+    zoom, x, y = tile
+    return os.path.join(directory, str(zoom), str(x), f"{y}.json" + (".gz" if compressed else ""))
+
+
+def write_gem_tiles(gems, directory, zoom=GEM_TILE_ZOOM):
+    """
+    Write gems as per-tile shards plus a manifest, replacing any existing shards.
+
+    Parameters:
+    -----------
+    gems: list of dict
+        Gems in the Hidden Gems schema; gems without coordinates are skipped
+    directory: str
+        Output directory
+    zoom: int
+        Tile zoom level of the shards
+
+    Returns:
+    --------
+    dict: The manifest
+    """
+    by_tile = defaultdict(list)
+    for gem in gems:
+        coords = gem.get('coordinates')
+        if not coords or len(coords) != 2:
+            continue
+        by_tile[lonlat_to_tile(coords[0], coords[1], zoom)].append(gem)
+
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".gem_tiles.")
+    os.chmod(tmp_dir, 0o755)  # mkdtemp is owner-only; the shards are served to clients
+
+    tiles = {}
+    for tile in sorted(by_tile):
+        body = json.dumps(by_tile[tile], separators=(',', ':')).encode('utf-8')
+        # mtime=0 keeps the compressed bytes identical across rebuilds
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+        path = tile_path(tmp_dir, tile)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        with open(path + ".gz", 'wb') as f:
+            f.write(compressed)
+
+        tiles[tile_key(tile)] = {
+            'count': len(by_tile[tile]),
+            'bytes': len(body),
+            'gzip_bytes': len(compressed),
+            'hash': hashlib.sha256(body).hexdigest()[:16]
+        }
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'zoom': zoom,
+        'count': sum(entry['count'] for entry in tiles.values()),
+        'tiles': tiles
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+    replace_directory(tmp_dir, directory)
+    return manifest
+
+
+def default_tiles_path(json_path):
+    """Return the shard directory that sits next to a gems JSON file."""
+    return os.path.splitext(json_path)[0] + ".tiles"
+
+
+def tiles_are_current(json_path, directory):
+    """Return True if shards exist and are at least as new as their source JSON file."""
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return False
+    return not os.path.exists(json_path) or os.path.getmtime(manifest_path) >= os.path.getmtime(json_path)
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_NAME), 'r') as f:
+        return json.load(f)
+
+
+def tiles_for_route(route, buffer_km, zoom=GEM_TILE_ZOOM):
+    """
+    Return the tiles that can hold gems within buffer_km of a route.
+
+    Tiles in the route's padded bounding box are kept when their center is
+    within the buffer plus half the tile diagonal of the route.
+
+    Parameters:
+    -----------
+    route: str or list
+        Route vertices as [lon, lat] pairs, or an encoded polyline
+    buffer_km: float
+        Corridor half-width in kilometers
+    zoom: int
+        Tile zoom level
+
+    Returns:
+    --------
+    list: (zoom, x, y) tiles
+    """
+    vertices = parse_route(route)
+    mid_lat = vertices[:, 1].mean()
+    pad_lat = buffer_km / KM_PER_DEGREE_LAT
+    pad_lon = buffer_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(mid_lat)), 0.01))
+    min_lon, min_lat = vertices.min(axis=0) - [pad_lon, pad_lat]
+    max_lon, max_lat = vertices.max(axis=0) + [pad_lon, pad_lat]
+
+    candidates = tiles_for_bbox([min_lat, min_lon, max_lat, max_lon], zoom)
+    boxes = np.array([tile_bbox(tile) for tile in candidates])
+    centers = np.column_stack(((boxes[:, 1] + boxes[:, 3]) / 2, (boxes[:, 0] + boxes[:, 2]) / 2))
+    half_diagonals = 0.5 * np.hypot(
+        (boxes[:, 2] - boxes[:, 0]) * KM_PER_DEGREE_LAT,
+        (boxes[:, 3] - boxes[:, 1]) * KM_PER_DEGREE_LAT * np.cos(np.radians(centers[:, 1]))
+    )
+    distances, _ = route_metrics(centers, vertices)
+    return [tile for tile, distance, radius in zip(candidates, distances, half_diagonals)
+            if distance <= buffer_km + radius]
+
@@ -1,50 +1,217 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
-import json, os, random, re, requests, time
+import hashlib, json, os, random, re, requests, threading, time
+
+from dataset_versions import DATASETS, RELEASES_DIR, current_release, load_release_manifest
+from gem_index import GemIndex, project_gem
+from gem_store import GemStore, load_gems
+from gem_tiles import (MANIFEST_NAME as GEM_TILES_MANIFEST_NAME, default_tiles_path, load_manifest, tile_path,
+                       tiles_are_current, tiles_for_route, write_gem_tiles)
+from jobs import JobManager, QueueFullError
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from ollama_client import get_client
+from recommendation_cache import RecommendationCache
+from response_time_store import ResponseTimeStore
+from road_network import ROAD_GRAPH_PATH, RoadNetwork
+from route_geometry import DEFAULT_SIMPLIFY_TOLERANCE_KM, parse_route, simplify_polyline
+from tiles import tile_key, tiles_for_bbox
+from singleflight import SingleFlight
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*", "methods": ["GET", "POST", "OPTIONS"], "allow_headers": "*"}})
 
 OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
 OLLAMA_MODEL = "gemma3:1b"
+OLLAMA_POOL_SIZE = 10  # Keep-alive connections to Ollama shared by all request threads
 
 # Determine the root directory based on where the script is run from
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, os.pardir))  # Parent directory of the script
 
 # Adjust paths based on where the script is run from
-GEMS_PATH = os.path.join(ROOT_DIR, "static/assets/data/hidden_gems.json")
+GEMS_PATH = DATASETS["hidden_gems"]  # Also where the builder writes the store, tiles and releases
+GEM_TILES_DIR = default_tiles_path(GEMS_PATH)
+GEM_TILE_MAX_AGE = 3600  # seconds clients may cache a tile before revalidating
+GEM_RELEASE_CHECK_SECONDS = 60  # how often the gem index looks for a newer hidden_gems release
+RELEASE_MAX_AGE = 365 * 24 * 3600  # releases and deltas never change once published
 RECOMMENDATIONS_DIR = os.path.join(ROOT_DIR, "static/assets/data/recommendations")
 RESPONSE_TIMES_PATH = os.path.join(ROOT_DIR, "static/assets/data/response_times.json")
+RECOMMENDATION_CACHE_DIR = os.path.join(RECOMMENDATIONS_DIR, "cache")
+
+# Read-through cache of LLM recommendations, keyed on the normalized request
+RECOMMENDATION_CACHE_TTL = 7 * 24 * 3600  # seconds
+recommendation_cache = RecommendationCache(
+    RECOMMENDATION_CACHE_DIR,
+    ttl=RECOMMENDATION_CACHE_TTL,
+    max_memory_entries=256,
+    max_disk_entries=5000
+)
+
+# Prometheus metrics served at /metrics
+metrics = MetricsRegistry()
+REQUEST_SECONDS = metrics.histogram(
+    "hidden_gems_http_request_duration_seconds", "HTTP request latency by endpoint", ["endpoint"])
+STAGE_SECONDS = metrics.histogram(
+    "hidden_gems_stage_duration_seconds", "Latency of recommendation pipeline stages", ["stage"])
+RECOMMENDATIONS_TOTAL = metrics.counter(
+    "hidden_gems_recommendations_total", "Recommendation responses by selection method", ["method"])
+PARSE_FAILURES_TOTAL = metrics.counter(
+    "hidden_gems_index_parse_failures_total", "LLM responses without usable gem indices")
+CACHE_REQUESTS_TOTAL = metrics.counter(
+    "hidden_gems_recommendation_cache_requests_total", "Recommendation cache lookups by result", ["result"])
+metrics.gauge(
+    "hidden_gems_recommendation_cache_hit_ratio", "Recommendation cache hit ratio since start",
+    callback=lambda: recommendation_cache.stats()["hit_ratio"])
+LLM_IN_FLIGHT = metrics.gauge(
+    "hidden_gems_llm_requests_in_flight", "Ollama requests currently running")
+
+# Bounded worker pool for the submit/poll recommendation job API
+RECOMMENDATION_WORKERS = 4
+FALLBACK_MIN_DURATION = 30.0  # seconds before fallback results are released
+DEFAULT_EXPECTED_LLM_SECONDS = 90.0  # ETA used before any response times are recorded
+MAX_PENDING_JOBS = 50  # queued jobs before new submissions get 429
+QUEUE_FULL_RETRY_AFTER = 30  # seconds suggested to clients turned away with 429
+recommendation_jobs = JobManager(max_workers=RECOMMENDATION_WORKERS, max_pending=MAX_PENDING_JOBS)
+
+# Paging limits for the gem query endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Coalesces identical in-flight LLM recommendation requests
+recommendation_flights = SingleFlight()
+
+# Spatial index over hidden_gems.json (or its memory-mapped store), built on first use
+_gem_index = None
+_gem_index_lock = threading.Lock()
+_gem_index_release = None  # hidden_gems release current when the index was built
+_gem_release_checked_at = 0.0
+
+def build_gem_index():
+    """Open the gems (from the memory-mapped store when it is current) and index them"""
+    gems = load_gems(GEMS_PATH)
+    if isinstance(gems, GemStore):
+        index = GemIndex.from_store(gems)
+        print(f"Indexed {len(index)} gems from {gems.path}")
+    else:
+        index = GemIndex(gems)
+        print(f"Indexed {len(index)} gems from {GEMS_PATH}")
+    return index
+
+def get_gem_index():
+    """Load the gems into the spatial index once and reuse it across requests"""
+    global _gem_index, _gem_index_release, _gem_release_checked_at
+    if _gem_index is None:
+        with _gem_index_lock:
+            if _gem_index is None:
+                _gem_index_release = current_release("hidden_gems")
+                _gem_index = build_gem_index()
+                _gem_release_checked_at = time.time()
+    refresh_gem_index()
+    return _gem_index
+
+def refresh_gem_index():
+    """
+    Rebuild the gem index from the store once a new hidden_gems release is
+    published, checking at most every GEM_RELEASE_CHECK_SECONDS. The store is
+    rewritten before each release is published, so it holds the new gems.
+    """
+    global _gem_index, _gem_index_release, _gem_release_checked_at
+    if time.time() - _gem_release_checked_at < GEM_RELEASE_CHECK_SECONDS:
+        return
+    with _gem_index_lock:
+        if time.time() - _gem_release_checked_at < GEM_RELEASE_CHECK_SECONDS:
+            return
+        _gem_release_checked_at = time.time()
+        release = current_release("hidden_gems")
+        if release == _gem_index_release:
+            return
+        try:
+            _gem_index = build_gem_index()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not reload gems for release {release}: {e}")
+            return
+        _gem_index_release = release
+        print(f"Switched to hidden_gems release {release}")
+
+# Driving graph for detour times, loaded on first use (None if unavailable)
+_road_network = None
+_road_network_loaded = False
+_road_network_lock = threading.Lock()
+
+def get_road_network():
+    """Load the driving graph once; returns None when it is missing or unreadable"""
+    global _road_network, _road_network_loaded
+    if not _road_network_loaded:
+        with _road_network_lock:
+            if not _road_network_loaded:
+                try:
+                    _road_network = RoadNetwork.from_source(ROAD_GRAPH_PATH)
+                    print(f"Loaded road network with {len(_road_network)} nodes from {ROAD_GRAPH_PATH}")
+                except Exception as e:
+                    print(f"Road network unavailable, detours fall back to route distance: {e}")
+                _road_network_loaded = True
+    return _road_network
+
+def annotate_detours(gems, origin, destination):
+    """
+    Return copies of gems with 'detourMinutes', the extra driving time to visit
+    each one from the origin-destination route on the road network. Gems off
+    the network (or all gems, when no network is loaded or the route cannot be
+    driven) are returned without the field.
+    """
+    network = get_road_network()
+    if network is None or not origin or not destination:
+        return list(gems)
+
+    with_coords = [gem for gem in gems if gem.get('coordinates') and len(gem['coordinates']) == 2]
+    try:
+        _, minutes = network.detours(origin, destination, [gem['coordinates'] for gem in with_coords])
+    except ValueError as e:
+        print(f"No road-network detours: {e}")
+        return list(gems)
+
+    detours = {id(gem): m for gem, m in zip(with_coords, minutes) if m is not None}
+    return [dict(gem, detourMinutes=round(detours[id(gem)], 1)) if id(gem) in detours else gem
+            for gem in gems]
+
+# Per-tile gem shards, (re)built from hidden_gems.json whenever they are stale
+_gem_tiles_manifest = None
+_gem_tiles_manifest_mtime = None
+_gem_tiles_lock = threading.Lock()
+
+def gem_tiles_manifest_mtime():
+    """Return the modification time of the gem tile manifest, or None if it is missing"""
+    try:
+        return os.path.getmtime(os.path.join(GEM_TILES_DIR, GEM_TILES_MANIFEST_NAME))
+    except OSError:
+        return None
+
+def get_gem_tiles_manifest():
+    """
+    Return the gem tile manifest, rewriting the shards when hidden_gems.json is
+    newer and reloading the manifest when the shards were rebuilt on disk
+    """
+    global _gem_tiles_manifest, _gem_tiles_manifest_mtime
+    if (_gem_tiles_manifest is not None and gem_tiles_manifest_mtime() == _gem_tiles_manifest_mtime
+            and tiles_are_current(GEMS_PATH, GEM_TILES_DIR)):
+        return _gem_tiles_manifest
+    with _gem_tiles_lock:
+        if not tiles_are_current(GEMS_PATH, GEM_TILES_DIR):
+            _gem_tiles_manifest = write_gem_tiles(list(load_gems(GEMS_PATH)), GEM_TILES_DIR)
+            _gem_tiles_manifest_mtime = gem_tiles_manifest_mtime()
+            print(f"Wrote {len(_gem_tiles_manifest['tiles'])} gem tiles to {GEM_TILES_DIR}")
+        elif _gem_tiles_manifest is None or gem_tiles_manifest_mtime() != _gem_tiles_manifest_mtime:
+            _gem_tiles_manifest_mtime = gem_tiles_manifest_mtime()
+            _gem_tiles_manifest = load_manifest(GEM_TILES_DIR)
+    return _gem_tiles_manifest
+
+# In-memory response time samples, flushed to RESPONSE_TIMES_PATH in the background
+response_times = ResponseTimeStore(RESPONSE_TIMES_PATH, max_samples=1000, flush_interval=5.0)
 
 # Function to track response times
-def track_response_time(duration, model=OLLAMA_MODEL):
+def track_response_time(duration, model=OLLAMA_MODEL, endpoint="generate"):
     try:
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(RESPONSE_TIMES_PATH), exist_ok=True)
-        
-        # Load existing times or create new
-        try:
-            with open(RESPONSE_TIMES_PATH, "r") as f:
-                data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            data = {"times": [], "average": 0}
-        
-        # Add new time
-        data["times"].append(duration)
-        
-        # Keep only the last 20 times
-        if len(data["times"]) > 20:
-            data["times"] = data["times"][-20:]
-        
-        # Update average
-        data["average"] = sum(data["times"]) / len(data["times"])
-        
-        # Save updated data
-        with open(RESPONSE_TIMES_PATH, "w") as f:
-            json.dump(data, f, indent=2)
-            
-        return data["average"]
+        return response_times.record(duration, endpoint=endpoint, model=model)
     except Exception as e:
         print(f"Error tracking response time: {e}")
         return None
@@ -91,14 +258,23 @@ def filter_gems_by_preferences(gems, user_data):
         if 'wheelchair' in accessibility and gem.get('category_2') in ['Peaceful retreat', 'Scenic viewpoint']:
             score += 5
         
-        # Score based on distanceFromRoute - prefer gems closer to route
-        distance = gem.get('distanceFromRoute', 0)
-        if distance < 5:
-            score += 5
-        elif distance < 10:
-            score += 3
-        elif distance < 20:
-            score += 1
+        # Score based on road-network detour time when known, else on distanceFromRoute
+        detour = gem.get('detourMinutes')
+        if detour is not None:
+            if detour < 10:
+                score += 5
+            elif detour < 20:
+                score += 3
+            elif detour < 40:
+                score += 1
+        else:
+            distance = gem.get('distanceFromRoute', 0)
+            if distance < 5:
+                score += 5
+            elif distance < 10:
+                score += 3
+            elif distance < 20:
+                score += 1
         
         # Reward variety in categories
         if gem.get('category_1') == 'Food & Drink':
@@ -171,25 +347,28 @@ Generate 1 short review (1-2 sentences) from a visitor.
 Return only the review as a plain string.
 """
 
-def call_ollama(prompt, stream=False, timeout=180):
-    """Call Ollama with a timeout"""
+def call_ollama(prompt, stream=False, timeout=180, endpoint="generate"):
+    """Call Ollama with a timeout; endpoint labels the response time sample"""
     try:
         start_time = time.time()
         print(f"Sending request to Ollama (timeout: {timeout}s)")
-        res = requests.post(OLLAMA_URL, json={
-            "model": OLLAMA_MODEL,
-            "prompt": prompt,
-            "stream": stream,
-            "options": {
-                "temperature": 0.7,
-                "max_tokens": 1024
-            }
-        }, timeout=timeout)  # Add timeout parameter
+        with LLM_IN_FLIGHT.track_in_progress(), STAGE_SECONDS.time(stage="llm_call"):
+            res = get_client(OLLAMA_URL, pool_size=OLLAMA_POOL_SIZE).generate(
+                prompt,
+                model=OLLAMA_MODEL,
+                stream=stream,
+                timeout=timeout,
+                options={
+                    "temperature": 0.7,
+                    "max_tokens": 1024
+                }
+            )
 
         # Calculate response time
         duration = time.time() - start_time
-        avg_time = track_response_time(duration)
-        print(f"📊 LLM response time: {duration:.2f}s (Avg: {avg_time:.2f}s)")
+        avg_time = track_response_time(duration, endpoint=endpoint)
+        if avg_time is not None:
+            print(f"📊 LLM response time: {duration:.2f}s (Avg: {avg_time:.2f}s)")
         
         if res.status_code != 200:
             print(f"⚠️ Ollama returned status code {res.status_code}")
@@ -204,6 +383,86 @@ def call_ollama(prompt, stream=False, timeout=180):
         print(f"⚠️ Error in call_ollama: {str(e)}")
         return None
     
+def select_gems_from_indices(indices, gem_sample, count=5):
+    """Map LLM indices onto the gem sample, topping up with random gems to reach count"""
+    # Make sure indices are valid (between 0 and length of gem_sample)
+    valid_indices = [i for i in indices if isinstance(i, int) and 0 <= i < len(gem_sample)]
+    if not valid_indices:
+        return []
+
+    selected_gems = [gem_sample[i] for i in valid_indices]
+    print(f"Selected {len(selected_gems)} gems based on indices")
+
+    # Ensure we have 5 gems (or as many as possible)
+    if len(selected_gems) < count and len(gem_sample) > len(selected_gems):
+        # Add more gems to reach 5 if possible
+        remaining_indices = [i for i in range(len(gem_sample)) if i not in valid_indices]
+        additional_indices = random.sample(
+            remaining_indices,
+            min(count - len(selected_gems), len(remaining_indices))
+        )
+        selected_gems.extend([gem_sample[i] for i in additional_indices])
+        print(f"Added {len(additional_indices)} more gems to reach desired count")
+
+    return selected_gems
+
+class IndexStreamParser:
+    """
+    Incrementally extract integers from a streamed JSON index array.
+
+    Text is fed in as the LLM produces it; each index is returned as soon as
+    the character after it (a comma, space or closing bracket) arrives.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self.digits = ""
+        self.negative = False
+        self.seen = set()
+
+    def feed(self, text):
+        """Consume a text fragment and return the indices it completed"""
+        completed = []
+        for char in text:
+            if self.finished:
+                break
+            if not self.started:
+                self.started = char == "["
+                continue
+            if char.isdigit():
+                self.digits += char
+                continue
+            if char == "-" and not self.digits:
+                self.negative = True
+                continue
+            if self.digits:
+                index = int(self.digits)
+                negative = self.negative
+                self.digits = ""
+                self.negative = False
+                # Negative indices are invalid; drop them rather than read them as positive
+                if not negative and index not in self.seen:
+                    self.seen.add(index)
+                    completed.append(index)
+            else:
+                self.negative = False
+            if char == "]":
+                self.finished = True
+        return completed
+
+def format_sse(event, data):
+    """Format a Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def save_recommendations(filepath, gems):
+    """Write selected gems to the recommendations folder"""
+    with STAGE_SECONDS.time(stage="file_save"):
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, "w") as f:
+            json.dump(gems, f, indent=2)
+    print(f"Saved recommendations to {filepath}")
+
 def get_recommendations_filename(origin, destination):
     """Create a sanitized filename from origin and destination"""
     # Remove special characters and replace spaces with underscores
@@ -256,6 +515,112 @@ def list_saved_recommendations():
         print(f"Error listing recommendations: {e}")
         return []
     
+def recommendation_request_key(user_data):
+    """Hash the normalized recommendation inputs so identical requests share a key"""
+    def normalize_list(field):
+        return sorted(str(item).strip().lower() for item in user_data.get(field, []) or [])
+
+    normalized = {
+        "model": OLLAMA_MODEL,
+        "origin": str(user_data.get('origin', '')).strip().lower(),
+        "destination": str(user_data.get('destination', '')).strip().lower(),
+        "activities": normalize_list('activities'),
+        "amenities": normalize_list('amenities'),
+        "accessibility": normalize_list('accessibility'),
+        "effortLevel": str(user_data.get('effortLevel', '')).strip().lower(),
+        "time": str(user_data.get('time', '')).strip().lower(),
+        "candidates": sorted(str(gem.get('id', gem.get('name', ''))) for gem in user_data.get('candidates', []))
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+def run_llm_recommendation(user_data, filepath):
+    """
+    Build the prompt, call the LLM and map its indices onto gems.
+
+    Returns a (body, status_code) pair. On success the body holds
+    'recommendations' and a partial 'meta'; otherwise it holds an 'error'.
+    """
+    with STAGE_SECONDS.time(stage="prompt_build"):
+        prompt = build_recommendation_prompt(user_data)
+    print("📤 Prompt to LLM:\n", prompt)
+    
+    # Store the gem_sample for later use
+    gem_sample = user_data.get('gem_sample', [])
+    
+    # Call Ollama with timeout
+    print("Calling Ollama...")
+    response = call_ollama(prompt, endpoint="recommendations")
+    
+    # Check if response is None (timeout or error)
+    if response is None:
+        print("⚠️ Ollama request failed - using fallback")
+        # Apply filtering based on user preferences
+        filtered_gems = filter_gems_by_preferences(user_data.get('candidates', []), user_data)
+        
+        # Select top 5 gems
+        selected = filtered_gems[:min(5, len(filtered_gems))]
+        return {"recommendations": selected, "meta": {"method": "fallback"}}, 200
+    
+    print("📥 Raw LLM response received, processing...")
+    
+    try:
+        with STAGE_SECONDS.time(stage="index_parse"):
+            # Extract indices from response
+            match = re.search(r'\[.*\]', response, re.DOTALL)
+            if not match:
+                print("⚠️ LLM did not return valid indices")
+                PARSE_FAILURES_TOTAL.inc()
+                return {"error": "LLM did not return valid indices", "raw": response}, 500
+
+            # Parse the indices
+            indices = json.loads(match.group(0))
+            print(f"Parsed indices: {indices}")
+
+            # Select the gems based on the indices, topping up to 5
+            selected_gems = select_gems_from_indices(indices, gem_sample)
+        if not selected_gems:
+            print("⚠️ No valid indices found")
+            PARSE_FAILURES_TOTAL.inc()
+            return {"error": "No valid indices in LLM response"}, 500
+        
+        # Save the selected gems to file
+        save_recommendations(filepath, selected_gems)
+        
+        return {
+            "recommendations": selected_gems,
+            "meta": {
+                "filepath": filepath,
+                "method": "llm_indices"
+            }
+        }, 200
+        
+    except Exception as e:
+        print(f"⚠️ Error processing indices: {str(e)}")
+        PARSE_FAILURES_TOTAL.inc()
+        return {"error": "Error processing indices", "details": str(e), "raw": response}, 500
+
+@app.before_request
+def start_request_timer():
+    g.request_start_time = time.time()
+
+@app.after_request
+def record_request_latency(response):
+    start = g.get("request_start_time")
+    if start is None:
+        return response
+    endpoint = request.endpoint or "unknown"
+    if response.is_streamed:
+        # Streamed bodies (SSE) are still being generated; time them until the stream closes
+        response.call_on_close(lambda: REQUEST_SECONDS.observe(time.time() - start, endpoint=endpoint))
+    else:
+        REQUEST_SECONDS.observe(time.time() - start, endpoint=endpoint)
+    return response
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route("/", methods=["GET", "OPTIONS"])
 def root():
     return jsonify({
@@ -264,14 +629,69 @@ def root():
         "timestamp": time.time()
     })
 
+def is_mobile_request():
+    """Check the User-Agent for a mobile device"""
+    user_agent = request.headers.get('User-Agent', '').lower()
+    return 'mobile' in user_agent or 'android' in user_agent or 'iphone' in user_agent or 'ipad' in user_agent
+
+def run_fallback_recommendation(user_data, filepath):
+    """Rank candidates by preference score without the LLM and save the top 5"""
+    # Price each candidate's detour on the road network, then score on preferences
+    route_info = user_data.get('routeInfo') or {}
+    candidates = annotate_detours(user_data.get('candidates', []),
+                                  route_info.get('originCoords'), route_info.get('destinationCoords'))
+    filtered_gems = filter_gems_by_preferences(candidates, user_data)
+    
+    # Take the top 5 gems
+    selected = filtered_gems[:min(5, len(filtered_gems))]
+    
+    # Save the recommendations to file
+    try:
+        save_recommendations(filepath, selected)
+    except Exception as e:
+        print(f"Warning: Could not save fallback recommendations: {e}")
+    
+    return selected
+
+def get_recommendation(user_data, filepath):
+    """
+    Serve a recommendation from the cache, or from a (possibly shared) LLM call.
+
+    Returns (body, status_code, cached, shared) where body is the
+    run_llm_recommendation() payload.
+    """
+    key = recommendation_request_key(user_data)
+    body = recommendation_cache.get(key)
+    CACHE_REQUESTS_TOTAL.inc(result="hit" if body is not None else "miss")
+
+    if body is not None:
+        print(f"Serving cached recommendations {key[:12]}")
+        try:
+            save_recommendations(filepath, body["recommendations"])
+        except Exception as e:
+            print(f"Warning: Could not save cached recommendations: {e}")
+        return body, 200, True, False
+
+    # Identical requests already in flight share the leader's LLM call
+    (body, status), shared = recommendation_flights.do(
+        key, lambda: run_llm_recommendation(user_data, filepath)
+    )
+    if shared:
+        print(f"Joined in-flight recommendation request {key[:12]}")
+
+    # Only real LLM picks are cached; fallbacks should be retried next time
+    if status == 200 and not shared and body["meta"]["method"] == "llm_indices":
+        recommendation_cache.set(key, body)
+
+    return body, status, False, shared
+
 @app.route("/generate_recommendations", methods=["POST"])
 def generate_recommendations():
     start_time = time.time()
     print("Received recommendation request")
     
     # Check if request is from mobile
-    user_agent = request.headers.get('User-Agent', '').lower()
-    is_mobile = 'mobile' in user_agent or 'android' in user_agent or 'iphone' in user_agent or 'ipad' in user_agent
+    is_mobile = is_mobile_request()
     force_fallback = request.args.get('fallback', 'false').lower() == 'true'
     
     # Use fallback for mobile or when explicitly requested
@@ -298,170 +718,446 @@ def generate_recommendations():
         
         # If using fallback, skip the LLM call completely
         if use_fallback:
-            request_start_time = time.time()
-            # Apply scoring and filtering based on user preferences
-            filtered_gems = filter_gems_by_preferences(candidate_gems, user_data)
-            
-            # Take the top 5 gems
-            selected = filtered_gems[:min(5, len(filtered_gems))]
+            selected = run_fallback_recommendation(user_data, filepath)
             
             total_duration = time.time() - start_time
             print(f"⏱️ Total API request processing time (fallback): {total_duration:.2f}s")
 
-            # Calculate how long the processing took so far
-            processing_duration = time.time() - request_start_time
-
-            # Calculate how much longer we need to wait to reach 30 seconds
-            remaining_time = max(0, 30.0 - processing_duration)
-
-            # Add the artificial delay
-            if remaining_time > 0:
-                print(f"Adding artificial delay of {remaining_time:.2f}s for fallback method")
-                time.sleep(remaining_time)
-
-            # Recalculate the total duration after the delay
-            total_duration = time.time() - start_time
-            print(f"⏱️ Total API request processing time (fallback with delay): {total_duration:.2f}s")
-            
-            # Save the recommendations to file
-            try:
-                os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                with open(filepath, "w") as f:
-                    json.dump(selected, f, indent=2)
-                    print(f"Saved fallback recommendations to {filepath}")
-            except Exception as e:
-                print(f"Warning: Could not save fallback recommendations: {e}")
+            # The minimum perceived duration is left to the client (readyAt / delay)
+            # instead of holding this worker thread asleep until it passes
+            remaining_time = max(0, FALLBACK_MIN_DURATION - total_duration)
             
+            method = "mobile_fallback" if is_mobile else "forced_fallback"
+            RECOMMENDATIONS_TOTAL.inc(method=method)
             return jsonify({
                 "recommendations": selected,
                 "meta": {
                     "processingTime": total_duration,
+                    "readyAt": start_time + FALLBACK_MIN_DURATION,
+                    "delay": remaining_time,
                     "filename": filename,
                     "filepath": filepath,
-                    "method": "mobile_fallback" if is_mobile else "forced_fallback"
+                    "method": method
                 }
             })
-        else:
-            prompt = build_recommendation_prompt(user_data)
-        print("📤 Prompt to LLM:\n", prompt)
-        
-        # Store the gem_sample for later use
-        gem_sample = user_data.get('gem_sample', [])
-        
-        # Call Ollama with timeout
-        print("Calling Ollama...")
-        response = call_ollama(prompt)
-        
-        # Check if response is None (timeout or error)
-        if response is None:
-            print("⚠️ Ollama request failed - using fallback")
-            # Use fallback
-            candidate_gems = user_data.get('candidates', [])
-            if not candidate_gems:
-                return jsonify({"error": "LLM call failed and no candidate gems available"}), 500
-                
-            # Apply filtering based on user preferences
-            filtered_gems = filter_gems_by_preferences(candidate_gems, user_data)
-            
-            # Select top 5 gems
-            selected = filtered_gems[:min(5, len(filtered_gems))]
+
+        body, status, cached, shared = get_recommendation(user_data, filepath)
+        if status != 200:
+            return jsonify(body), status
+
+        # Calculate total duration
+        total_duration = time.time() - start_time
+        print(f"⏱️ Total API request processing time ({body['meta']['method']}): {total_duration:.2f}s")
+
+        meta = dict(body["meta"], processingTime=total_duration, filename=filename,
+                    coalesced=shared, cached=cached)
+        RECOMMENDATIONS_TOTAL.inc(method=meta["method"])
+        print("Sending response to client")
+        return jsonify({"recommendations": body["recommendations"], "meta": meta})
             
-            total_duration = time.time() - start_time
-            print(f"⏱️ Total API request processing time (fallback): {total_duration:.2f}s")
+    except Exception as e:
+        print(f"⚠️ Unexpected error: {str(e)}")
+        return jsonify({"error": "Unexpected error", "details": str(e)}), 500
             
-            return jsonify({
+
+@app.route("/api/jobs/recommendations", methods=["POST"])
+def submit_recommendation_job():
+    """
+    Queue a recommendation on the worker pool and return a job id at once.
+
+    Accepts the same body and ?fallback flag as /generate_recommendations;
+    poll /api/jobs/<job_id> for status, ETA and the result.
+    """
+    submitted_at = time.time()
+    user_data = request.get_json(silent=True) or {}
+    if not user_data.get('candidates'):
+        return jsonify({"error": "No candidate gems provided"}), 400
+
+    filename = get_recommendations_filename(user_data.get('origin', 'unknown'), user_data.get('destination', 'unknown'))
+    filepath = os.path.join(RECOMMENDATIONS_DIR, filename)
+    is_mobile = is_mobile_request()
+    use_fallback = is_mobile or request.args.get('fallback', 'false').lower() == 'true'
+
+    if use_fallback:
+        method = "mobile_fallback" if is_mobile else "forced_fallback"
+
+        def work():
+            selected = run_fallback_recommendation(user_data, filepath)
+            RECOMMENDATIONS_TOTAL.inc(method=method)
+            return {
                 "recommendations": selected,
                 "meta": {
-                    "processingTime": total_duration,
-                    "filename": filename,
-                    "method": "fallback"
-                }
-            })
-        
-        print("📥 Raw LLM response received, processing...")
-        
-        # Extract indices from response
-        match = re.search(r'\[.*\]', response, re.DOTALL)
-        if not match:
-            print("⚠️ LLM did not return valid indices")
-            return jsonify({"error": "LLM did not return valid indices", "raw": response}), 500
-        
-        try:
-            # Parse the indices
-            indices = json.loads(match.group(0))
-            print(f"Parsed indices: {indices}")
-            
-            # Make sure indices are valid (between 0 and length of gem_sample)
-            valid_indices = [i for i in indices if 0 <= i < len(gem_sample)]
-            if not valid_indices:
-                print("⚠️ No valid indices found")
-                return jsonify({"error": "No valid indices in LLM response"}), 500
-                
-            # Select the gems based on the indices
-            selected_gems = [gem_sample[i] for i in valid_indices]
-            print(f"Selected {len(selected_gems)} gems based on indices")
-            
-            # Ensure we have 5 gems (or as many as possible)
-            if len(selected_gems) < 5 and len(gem_sample) > len(selected_gems):
-                # Add more gems to reach 5 if possible
-                remaining_indices = [i for i in range(len(gem_sample)) if i not in valid_indices]
-                additional_indices = random.sample(
-                    remaining_indices, 
-                    min(5 - len(selected_gems), len(remaining_indices))
-                )
-                selected_gems.extend([gem_sample[i] for i in additional_indices])
-                print(f"Added {len(additional_indices)} more gems to reach desired count")
-            
-            # Save the selected gems to file
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            with open(filepath, "w") as f:
-                json.dump(selected_gems, f, indent=2)
-                print(f"Saved recommendations to {filepath}")
-            
-            # Calculate total duration
-            total_duration = time.time() - start_time
-            print(f"⏱️ Total API request processing time: {total_duration:.2f}s")
-            
-            result = {
-                "recommendations": selected_gems,
-                "meta": {
-                    "processingTime": total_duration,
+                    # The job is released no earlier than FALLBACK_MIN_DURATION
+                    "processingTime": max(time.time() - submitted_at, FALLBACK_MIN_DURATION),
                     "filename": filename,
                     "filepath": filepath,
-                    "method": "llm_indices"
+                    "method": method
                 }
             }
-            print("Sending response to client")
-            return jsonify(result)
-            
+
+        submit = lambda: recommendation_jobs.submit(work, min_duration=FALLBACK_MIN_DURATION, kind=method)
+    else:
+        def work():
+            body, status, cached, shared = get_recommendation(user_data, filepath)
+            if status != 200:
+                raise RuntimeError(body.get("error", "Recommendation failed"))
+            meta = dict(body["meta"], processingTime=time.time() - submitted_at, filename=filename,
+                        coalesced=shared, cached=cached)
+            RECOMMENDATIONS_TOTAL.inc(method=meta["method"])
+            return {"recommendations": body["recommendations"], "meta": meta}
+
+        expected = response_times.stats()["p50"] or DEFAULT_EXPECTED_LLM_SECONDS
+        submit = lambda: recommendation_jobs.submit(work, expected_duration=expected, kind="llm")
+
+    try:
+        job = submit()
+    except QueueFullError as e:
+        response = jsonify({"error": "Too many recommendation jobs queued, try again later", "details": str(e)})
+        response.headers["Retry-After"] = str(QUEUE_FULL_RETRY_AFTER)
+        return response, 429
+
+    job["statusUrl"] = f"/api/jobs/{job['jobId']}"
+    return jsonify(job), 202
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_recommendation_job(job_id):
+    """Status, ETA and (once finished) the result of a recommendation job"""
+    job = recommendation_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route("/generate_recommendations/stream", methods=["POST"])
+def generate_recommendations_stream():
+    """
+    Streaming variant of /generate_recommendations over Server-Sent Events.
+
+    Emits a 'gem' event as soon as each index appears in the LLM output,
+    periodic 'progress' events while tokens arrive, and a final 'done' event
+    with the same payload shape as /generate_recommendations.
+    """
+    start_time = time.time()
+    user_data = request.get_json(silent=True) or {}
+    candidate_gems = user_data.get('candidates', [])
+    if not candidate_gems:
+        return jsonify({"error": "No candidate gems provided"}), 400
+
+    filename = get_recommendations_filename(user_data.get('origin', 'unknown'), user_data.get('destination', 'unknown'))
+    filepath = os.path.join(RECOMMENDATIONS_DIR, filename)
+    key = recommendation_request_key(user_data)
+    cached = recommendation_cache.get(key)
+    CACHE_REQUESTS_TOTAL.inc(result="hit" if cached is not None else "miss")
+    with STAGE_SECONDS.time(stage="prompt_build"):
+        prompt = build_recommendation_prompt(user_data)
+    gem_sample = user_data.get('gem_sample', [])
+
+    def cached_events():
+        try:
+            save_recommendations(filepath, cached["recommendations"])
         except Exception as e:
-            print(f"⚠️ Error processing indices: {str(e)}")
-            return jsonify({"error": "Error processing indices", "details": str(e), "raw": response}), 500
-            
-    except Exception as e:
-        print(f"⚠️ Unexpected error: {str(e)}")
-        return jsonify({"error": "Unexpected error", "details": str(e)}), 500
-            
+            print(f"Warning: Could not save cached recommendations: {e}")
 
-        
+        for position, gem in enumerate(cached["recommendations"]):
+            yield format_sse("gem", {
+                "index": None,
+                "position": position,
+                "gem": gem,
+                "elapsed": time.time() - start_time
+            })
+        RECOMMENDATIONS_TOTAL.inc(method=cached["meta"]["method"])
+        yield format_sse("done", {
+            "recommendations": cached["recommendations"],
+            "meta": dict(cached["meta"], processingTime=time.time() - start_time,
+                         filename=filename, cached=True)
+        })
+
+    def events():
+        parser = IndexStreamParser()
+        streamed = []
+        indices = []
+        fragments = 0
+        last_progress = 0
+        method = "llm_indices"
+        llm_failed = False
+        llm_start = time.time()
+        LLM_IN_FLIGHT.inc()
+
+        try:
+            client = get_client(OLLAMA_URL, pool_size=OLLAMA_POOL_SIZE)
+            for text in client.generate_stream(prompt, model=OLLAMA_MODEL, options={
+                "temperature": 0.7,
+                "max_tokens": 1024
+            }):
+                fragments += 1
+                for index in parser.feed(text):
+                    indices.append(index)
+                    if 0 <= index < len(gem_sample) and len(streamed) < 5:
+                        streamed.append(gem_sample[index])
+                        yield format_sse("gem", {
+                            "index": index,
+                            "position": len(streamed) - 1,
+                            "gem": gem_sample[index],
+                            "elapsed": time.time() - start_time
+                        })
+
+                now = time.time()
+                if now - last_progress >= 1:
+                    last_progress = now
+                    yield format_sse("progress", {
+                        "tokens": fragments,
+                        "gems": len(streamed),
+                        "elapsed": now - start_time
+                    })
+
+                if parser.finished:
+                    break
+
+            avg_time = track_response_time(time.time() - start_time, endpoint="recommendations_stream")
+            if avg_time is not None:
+                print(f"📊 LLM streamed response time: {time.time() - start_time:.2f}s (Avg: {avg_time:.2f}s)")
+            selected = select_gems_from_indices(indices, gem_sample)
+        except Exception as e:
+            print(f"⚠️ Streaming Ollama request failed: {e}")
+            llm_failed = True
+            selected = []
+        finally:
+            LLM_IN_FLIGHT.dec()
+            STAGE_SECONDS.observe(time.time() - llm_start, stage="llm_call")
+
+        if not selected and not llm_failed:
+            PARSE_FAILURES_TOTAL.inc()
+
+        if not selected:
+            # Keep whatever already reached the client, fill the rest from the fallback ranking
+            method = "fallback"
+            selected = list(streamed)
+            for gem in filter_gems_by_preferences(candidate_gems, user_data):
+                if len(selected) >= 5:
+                    break
+                if gem.get('id') not in {chosen.get('id') for chosen in selected}:
+                    selected.append(gem)
+
+        # Announce any gems the client has not seen yet (top-ups and fallbacks)
+        for position in range(len(streamed), len(selected)):
+            yield format_sse("gem", {
+                "index": None,
+                "position": position,
+                "gem": selected[position],
+                "elapsed": time.time() - start_time
+            })
+
+        try:
+            save_recommendations(filepath, selected)
+        except Exception as e:
+            print(f"Warning: Could not save streamed recommendations: {e}")
+
+        if method == "llm_indices":
+            recommendation_cache.set(key, {
+                "recommendations": selected,
+                "meta": {"filepath": filepath, "method": method}
+            })
+
+        RECOMMENDATIONS_TOTAL.inc(method=method)
+        yield format_sse("done", {
+            "recommendations": selected,
+            "meta": {
+                "processingTime": time.time() - start_time,
+                "filename": filename,
+                "filepath": filepath,
+                "method": method
+            }
+        })
+
+    stream = cached_events() if cached is not None else events()
+    return Response(stream_with_context(stream), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
 
 @app.route("/generate_review", methods=["POST"])
 def generate_review():
     gem = request.get_json()
     prompt = build_review_prompt(gem)
     print("✍️ Review prompt:\n", prompt)
-    response = call_ollama(prompt)
+    response = call_ollama(prompt, endpoint="review")
     return jsonify({"review": response.strip()})
 
 @app.route("/api/response_time", methods=["GET"])
 def get_response_time():
-    try:
-        with open(RESPONSE_TIMES_PATH, "r") as f:
-            data = json.load(f)
-        return jsonify(data)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return jsonify({"average": 8, "times": []})
+    """Response time percentiles, counts and per-endpoint/per-model breakdowns"""
+    stats = response_times.stats()
+    if not stats["count"]:
+        stats["average"] = 8
+    return jsonify(stats)
     
+def parse_coordinate_pair(value):
+    """Parse a 'lon,lat' query string value into [lon, lat]"""
+    lon, lat = (float(part) for part in value.split(","))
+    return [lon, lat]
+
+def parse_list_arg(name):
+    """Parse a comma-separated query string value into a list (empty if absent)"""
+    value = request.args.get(name, "")
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def paginate_gems(gems, fields):
+    """Apply offset/limit paging and field projection to a list of gems"""
+    offset = max(0, request.args.get("offset", 0, type=int))
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    page = [project_gem(gem, fields) for gem in gems[offset:offset + limit]]
+    return {
+        "gems": page,
+        "total": len(gems),
+        "offset": offset,
+        "limit": limit
+    }
+
+@app.route("/api/gems/along_route", methods=["GET", "POST"])
+def get_gems_along_route():
+    """
+    Return gems within a buffer of a route.
+
+    The route is either a 'route' polyline (encoded string, or a list of
+    [lon, lat] pairs in a JSON body) or a straight 'origin'/'destination' pair.
+    """
+    params = request.get_json(silent=True) or {}
+    try:
+        route = params.get("route") or request.args.get("route")
+        if not route:
+            origin = params.get("origin") or parse_coordinate_pair(request.args["origin"])
+            destination = params.get("destination") or parse_coordinate_pair(request.args["destination"])
+            route = [origin, destination]
+        route = simplify_polyline(route, float(params.get("tolerance", request.args.get(
+            "tolerance", DEFAULT_SIMPLIFY_TOLERANCE_KM))))
+        buffer_km = float(params.get("buffer", request.args.get("buffer", 30)))
+    except (KeyError, ValueError, TypeError, IndexError):
+        return jsonify({"error": "route must be a polyline, or origin and destination given as 'lon,lat'"}), 400
+
+    fields = parse_list_arg("fields")
+    if fields:
+        fields += ["distanceFromRoute", "routeProgress", "detourMinutes"]
+
+    try:
+        gems = get_gem_index().query_along_route(
+            route, buffer_km, categories=parse_list_arg("category") or None
+        )
+        # detour=true ranks by extra driving minutes on the road network (unpriced gems last)
+        if str(params.get("detour", request.args.get("detour", "false"))).lower() == "true":
+            vertices = parse_route(route)
+            gems = sorted(annotate_detours(gems, vertices[0].tolist(), vertices[-1].tolist()),
+                          key=lambda gem: (gem.get("detourMinutes") is None, gem.get("detourMinutes", 0)))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify(paginate_gems(gems, fields))
+
+@app.route("/api/gems", methods=["GET"])
+def get_gems_in_bbox():
+    """Return gems inside a 'min_lat,min_lon,max_lat,max_lon' bounding box"""
+    try:
+        bbox = [float(part) for part in request.args["bbox"].split(",")]
+        if len(bbox) != 4:
+            raise ValueError
+    except (KeyError, ValueError):
+        return jsonify({"error": "bbox must be given as 'min_lat,min_lon,max_lat,max_lon'"}), 400
+
+    try:
+        gems = get_gem_index().query_bbox(bbox, categories=parse_list_arg("category") or None)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify(paginate_gems(gems, parse_list_arg("fields")))
+
+@app.route("/api/gems/tiles", methods=["GET"])
+def get_gem_tiles():
+    """
+    Return the gem tile manifest.
+
+    With a 'bbox' (min_lat,min_lon,max_lat,max_lon) or a 'route' / 'origin' and
+    'destination' plus 'buffer', only the populated tiles covering that area
+    are listed; fetch each from /api/gems/tiles/<z>/<x>/<y>.json.
+    """
+    manifest = get_gem_tiles_manifest()
+    zoom = manifest["zoom"]
+    try:
+        if "bbox" in request.args:
+            bbox = [float(part) for part in request.args["bbox"].split(",")]
+            if len(bbox) != 4:
+                raise ValueError
+            covering = tiles_for_bbox(bbox, zoom)
+        elif "route" in request.args or "origin" in request.args:
+            route = request.args.get("route") or [
+                parse_coordinate_pair(request.args["origin"]),
+                parse_coordinate_pair(request.args["destination"])
+            ]
+            covering = tiles_for_route(route, float(request.args.get("buffer", 30)), zoom)
+        else:
+            covering = None
+    except (KeyError, ValueError, TypeError, IndexError):
+        return jsonify({"error": "give bbox as 'min_lat,min_lon,max_lat,max_lon', or a route or "
+                                 "origin and destination as 'lon,lat'"}), 400
+
+    if covering is not None:
+        keys = [tile_key(tile) for tile in covering]
+        manifest = dict(manifest, tiles={key: manifest["tiles"][key] for key in keys if key in manifest["tiles"]})
+    return jsonify(manifest)
+
+@app.route("/api/gems/tiles/<int:z>/<int:x>/<int:y>.json", methods=["GET"])
+def get_gem_tile(z, x, y):
+    """Return one tile's gems, precompressed with gzip when the client accepts it"""
+    manifest = get_gem_tiles_manifest()
+    if z != manifest["zoom"]:
+        return jsonify({"error": f"gem tiles are only available at zoom {manifest['zoom']}"}), 404
+
+    entry = manifest["tiles"].get(tile_key((z, x, y)))
+    if entry is None:
+        # Tiles without gems are not written
+        response = Response("[]", mimetype="application/json")
+    else:
+        compressed = "gzip" in request.accept_encodings
+        try:
+            with open(tile_path(GEM_TILES_DIR, (z, x, y), compressed), "rb") as f:
+                response = Response(f.read(), mimetype="application/json")
+        except FileNotFoundError:
+            # The shards were swapped out under this manifest; the next manifest request reloads it
+            return jsonify({"error": f"gem tile {tile_key((z, x, y))} not found"}), 404
+        if compressed:
+            response.headers["Content-Encoding"] = "gzip"
+        # The gzip body differs from the identity one, so it needs its own entity tag
+        response.set_etag(entry["hash"] + ("-gz" if compressed else ""))
+
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = f"public, max-age={GEM_TILE_MAX_AGE}"
+    return response.make_conditional(request)
+
+@app.route("/api/datasets", methods=["GET"])
+def get_dataset_releases():
+    """Return the release manifest: current release and available deltas of each dataset"""
+    response = jsonify(load_release_manifest())
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.route("/api/datasets/<name>/<filename>", methods=["GET"])
+def get_dataset_release(name, filename):
+    """
+    Return a published release (<hash>.json) or delta (<from>-<to>.delta.json).
+
+    Both are immutable, so they are served with a year-long cache lifetime.
+    """
+    entry = load_release_manifest()["datasets"].get(name)
+    if entry is None:
+        return jsonify({"error": f"Unknown dataset {name}"}), 404
+    published = {f"{release['hash']}.json" for release in entry["releases"]}
+    published.update(f"{delta['from']}-{delta['to']}.delta.json" for delta in entry["deltas"])
+    if filename not in published:
+        return jsonify({"error": f"{filename} is not a published {name} release or delta"}), 404
+
+    response = send_from_directory(os.path.join(RELEASES_DIR, name), filename, max_age=RELEASE_MAX_AGE)
+    response.headers["Cache-Control"] = f"public, max-age={RELEASE_MAX_AGE}, immutable"
+    return response
+
 @app.route("/api/saved_recommendations", methods=["GET"])
 def get_saved_recommendations():
     """Endpoint to list all saved recommendations"""
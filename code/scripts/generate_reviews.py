@@ -9,13 +9,36 @@ from collections import defaultdict
 from math import radians, cos, sin, asin, sqrt
 import random
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from adaptive_limiter import AdaptiveLimiter
+from dataset_versions import publish_release
+from gem_store import load_gems
+from http_session import create_pooled_session, post_with_retries
+from review_journal import ReviewJournal
 
 # Configuration
 GEM_DATA_PATH = "static/assets/data/hidden_gems.json"  # Path to your gems file
 OUTPUT_DIR = "static/assets/data/review_batches"  # Directory to save batch review files
 FINAL_OUTPUT_PATH = "static/assets/data/reviews.json"  # Where to save the final combined reviews
+JOURNAL_PATH = os.path.join(OUTPUT_DIR, "reviews_journal.jsonl")  # Append-only log of reviews generated since the last compaction
 REVIEWS_API_ENDPOINT = "http://127.0.0.1:5000/generate_review"  # Your review generation endpoint
-RATE_LIMIT_DELAY = 0.5  # Delay between API calls in seconds
+REVIEW_CONCURRENCY = 4  # Maximum parallel review requests
+REVIEW_INITIAL_CONCURRENCY = 2  # Parallel requests before the limiter has measured latency
+REVIEW_TARGET_LATENCY = None  # Seconds; None backs off relative to the best latency observed
+REVIEW_POOL_SIZE = REVIEW_CONCURRENCY  # Keep-alive connections to the review endpoint
+REVIEW_RETRIES = 2  # Retries for connection errors and 502/503/504 responses
+REVIEW_TIMEOUT = 30  # seconds
+
+# Shared keep-alive session for all review requests
+review_session = create_pooled_session(REVIEW_POOL_SIZE)
+
+# Adjusts parallelism from observed review latency and errors
+review_limiter = AdaptiveLimiter(
+    initial_limit=REVIEW_INITIAL_CONCURRENCY,
+    max_limit=REVIEW_CONCURRENCY,
+    target_latency=REVIEW_TARGET_LATENCY
+)
 
 # Northern California bounding box [min_lat, min_lon, max_lat, max_lon]
 NORCAL_BBOX = [
@@ -259,8 +282,8 @@ def create_balanced_batches(gems, batch_size=GEMS_PER_BATCH):
     
     return batches
 
-def load_existing_reviews():
-    """Load existing reviews from all batch files and the main reviews file."""
+def load_existing_reviews(journal=None):
+    """Load existing reviews from legacy batch files, the main reviews file and the journal."""
     all_reviews = {}
     
     # Create output directory if it doesn't exist
@@ -285,50 +308,64 @@ def load_existing_reviews():
         except (json.JSONDecodeError, FileNotFoundError) as e:
             print(f"Error reading final reviews file: {e}")
     
+    # Reviews generated since the last compaction (e.g. by an interrupted run)
+    all_reviews.update((journal or ReviewJournal(JOURNAL_PATH)).replay())
+    
     return all_reviews
 
-def save_batch_reviews(batch_num, reviews):
-    """Save a batch of reviews to a file."""
-    batch_file = os.path.join(OUTPUT_DIR, f'reviews_batch_{batch_num:03d}.json')
-    with open(batch_file, 'w') as f:
-        json.dump(reviews, f, indent=2)
-    print(f"Saved batch {batch_num} reviews to {batch_file}")
-
-def update_main_reviews_file():
-    """Combine all batch files into the main reviews file."""
-    all_reviews = load_existing_reviews()
+def update_main_reviews_file(journal=None):
+    """Compact the journal into the main reviews file in a single atomic write."""
+    journal = journal or ReviewJournal(JOURNAL_PATH)
     
-    with open(FINAL_OUTPUT_PATH, 'w') as f:
-        json.dump(all_reviews, f, indent=2)
+    # Legacy batch files and the current main file sit underneath the journal
+    base_reviews = load_existing_reviews(journal)
+    all_reviews = journal.compact(FINAL_OUTPUT_PATH, base_reviews)
     
     print(f"Updated main reviews file with {len(all_reviews)} total reviews")
     return all_reviews
 
-def generate_review(gem):
-    """Generate a review for a single gem."""
+def request_review(gem):
+    """Request a review for a single gem, raising on HTTP or connection errors."""
+    response = post_with_retries(
+        review_session,
+        REVIEWS_API_ENDPOINT,
+        retries=REVIEW_RETRIES,
+        json=gem,
+        headers={"Content-Type": "application/json"},
+        timeout=REVIEW_TIMEOUT
+    )
+    response.raise_for_status()
+    result = response.json()
+    return result.get("review", "No review available")
+
+def generate_review(gem, limiter=None):
+    """Generate a review for a single gem, throttled by the adaptive limiter."""
+    limiter = limiter or review_limiter
     try:
-        response = requests.post(
-            REVIEWS_API_ENDPOINT,
-            json=gem,
-            headers={"Content-Type": "application/json"},
-            timeout=30  # 30 second timeout
-        )
-        response.raise_for_status()
-        result = response.json()
-        return result.get("review", "No review available")
+        with limiter.slot():
+            return request_review(gem)
     except requests.exceptions.RequestException as e:
         print(f"Error generating review for gem {gem.get('id', 'unknown')}: {e}")
         # Return a fallback review
         return f"This location has unique features and is worth exploring."
 
-def process_batch(batch_num, batch, existing_reviews):
-    """Process a batch of gems, generating reviews for each."""
+def process_batch(batch_num, batch, existing_reviews, limiter=None, journal=None):
+    """
+    Process a batch of gems, generating missing reviews concurrently.
+
+    Up to limiter.max_limit requests are queued at once; the limiter decides
+    how many actually run in parallel from the latency and errors it sees.
+    Each new review is appended to the journal as soon as it arrives.
+    """
+    limiter = limiter or review_limiter
+    journal = journal or ReviewJournal(JOURNAL_PATH)
     batch_reviews = {}
     batch_start_time = time.time()
     
     print(f"\nProcessing Batch {batch_num} with {len(batch)} gems")
     
-    for gem in tqdm(batch, desc=f"Batch {batch_num}"):
+    pending = []
+    for gem in batch:
         gem_id = gem.get('id')
         if not gem_id:
             print(f"Skipping gem without ID: {gem.get('name', 'Unknown')}")
@@ -339,21 +376,23 @@ def process_batch(batch_num, batch, existing_reviews):
             batch_reviews[gem_id] = existing_reviews[gem_id]
             continue
         
-        # Generate review
-        review = generate_review(gem)
-        batch_reviews[gem_id] = review
-        
-        # Add a small delay
-        time.sleep(RATE_LIMIT_DELAY)
+        pending.append(gem)
+    
+    if pending:
+        with ThreadPoolExecutor(max_workers=limiter.max_limit) as executor:
+            futures = {executor.submit(generate_review, gem, limiter): gem['id'] for gem in pending}
+            with tqdm(total=len(futures), desc=f"Batch {batch_num}", unit="review") as progress:
+                for future in as_completed(futures):
+                    gem_id = futures[future]
+                    batch_reviews[gem_id] = future.result()
+                    journal.append(gem_id, batch_reviews[gem_id])
+                    progress.update(1)
+                    progress.set_postfix(concurrency=limiter.stats()["limit"])
     
     batch_time = time.time() - batch_start_time
-    print(f"Batch {batch_num} completed in {batch_time:.1f} seconds")
-    
-    # Save this batch
-    save_batch_reviews(batch_num, batch_reviews)
-    
-    # Update the main reviews file
-    update_main_reviews_file()
+    throughput = len(pending) / batch_time if batch_time > 0 else 0
+    print(f"Batch {batch_num} completed in {batch_time:.1f} seconds "
+          f"({len(pending)} new reviews, {throughput:.2f} reviews/s)")
     
     return batch_reviews
 
@@ -363,22 +402,36 @@ def main():
                         help="Maximum number of batches to process (default: all)")
     parser.add_argument("--start-batch", type=int, default=1,
                         help="Batch number to start with (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=REVIEW_CONCURRENCY,
+                        help=f"Maximum parallel review requests (default: {REVIEW_CONCURRENCY})")
+    parser.add_argument("--target-latency", type=float, default=REVIEW_TARGET_LATENCY,
+                        help="Back off when review latency exceeds twice this many seconds "
+                             "(default: relative to the best latency observed)")
     args = parser.parse_args()
     
+    global review_session
+    if args.concurrency > REVIEW_POOL_SIZE:
+        review_session = create_pooled_session(args.concurrency)
+    limiter = AdaptiveLimiter(
+        initial_limit=min(REVIEW_INITIAL_CONCURRENCY, args.concurrency),
+        max_limit=args.concurrency,
+        target_latency=args.target_latency
+    )
+    
     # Create output directory
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
     # Load all gems
     try:
-        with open(GEM_DATA_PATH, 'r') as f:
-            all_gems = json.load(f)
+        all_gems = list(load_gems(GEM_DATA_PATH))
         print(f"Loaded {len(all_gems)} gems from {GEM_DATA_PATH}")
     except (FileNotFoundError, json.JSONDecodeError) as e:
         print(f"Error loading gems file: {e}")
         return
     
-    # Load existing reviews
-    existing_reviews = load_existing_reviews()
+    # Load existing reviews, including any journaled by an interrupted run
+    journal = ReviewJournal(JOURNAL_PATH)
+    existing_reviews = load_existing_reviews(journal)
     print(f"Loaded {len(existing_reviews)} existing reviews")
     
     # Create batches with balanced geographical distribution
@@ -395,6 +448,7 @@ def main():
     # Initialize stats
     total_start = time.time()
     processed_gems = 0
+    generated_reviews = 0
     
     # Process each batch
     for batch_idx in range(start_batch - 1, end_batch):
@@ -402,32 +456,40 @@ def main():
         batch = batches[batch_idx]
         
         print(f"\nProcessing batch {batch_num}/{len(batches)}")
-        batch_reviews = process_batch(batch_num, batch, existing_reviews)
+        new_reviews = sum(1 for gem in batch if gem.get('id') and gem['id'] not in existing_reviews)
+        batch_reviews = process_batch(batch_num, batch, existing_reviews, limiter, journal)
         
         # Update existing reviews
         existing_reviews.update(batch_reviews)
         processed_gems += len(batch)
+        generated_reviews += new_reviews
         
-        # Calculate and display stats
+        # Throughput counts only reviews that needed an API call
         elapsed = time.time() - total_start
-        avg_time_per_gem = elapsed / processed_gems if processed_gems > 0 else 0
-        remaining_batches = end_batch - batch_num
-        remaining_gems = sum(len(batches[i]) for i in range(batch_idx + 1, end_batch))
-        estimated_time_remaining = avg_time_per_gem * remaining_gems
+        throughput = generated_reviews / elapsed if elapsed > 0 else 0
+        remaining_reviews = sum(
+            1 for i in range(batch_idx + 1, end_batch)
+            for gem in batches[i] if gem.get('id') and gem['id'] not in existing_reviews
+        )
+        estimated_time_remaining = remaining_reviews / throughput if throughput > 0 else 0
+        limiter_stats = limiter.stats()
         
-        print(f"\nProgress: {processed_gems} gems processed")
-        print(f"Average time per gem: {avg_time_per_gem:.2f} seconds")
-        print(f"Estimated time remaining: {estimated_time_remaining/60:.1f} minutes")
+        print(f"\nProgress: {processed_gems} gems processed ({generated_reviews} new reviews)")
+        print(f"Throughput: {throughput:.2f} reviews/s at concurrency {limiter_stats['limit']} "
+              f"({limiter_stats['errors']} errors)")
+        print(f"Estimated time remaining: {estimated_time_remaining/60:.1f} minutes "
+              f"for {remaining_reviews} reviews")
     
-    # Final update to main reviews file
-    final_reviews = update_main_reviews_file()
+    # Single compaction of the journal into the main reviews file
+    final_reviews = update_main_reviews_file(journal)
+    publish_release("reviews", final_reviews)
     
     # Display final stats
     total_time = time.time() - total_start
     print(f"\nReview generation complete!")
     print(f"Processed {processed_gems} gems in {len(batches)} batches")
     print(f"Total time: {total_time/60:.1f} minutes")
-    print(f"Average time per review: {total_time/processed_gems:.2f} seconds if {processed_gems} > 0 else 'N/A'")
+    print(f"Throughput: {generated_reviews / total_time if total_time > 0 else 0:.2f} reviews/s")
     print(f"Final reviews file: {FINAL_OUTPUT_PATH} with {len(final_reviews)} reviews")
 
 if __name__ == "__main__":
@@ -1,9 +1,10 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import requests
 import json
 import re
 
+from ollama_client import get_client
+
 app = Flask(__name__)
 CORS(app)  # Allow CORS from frontend
 
@@ -71,15 +72,16 @@ def generate_gems():
 
     raw = ""  
     try:
-        response = requests.post(OLLAMA_URL, json={
-            "model": OLLAMA_MODEL,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
+        response = get_client(OLLAMA_URL).generate(
+            prompt,
+            model=OLLAMA_MODEL,
+            stream=False,
+            timeout=None,
+            options={
                 "temperature": 0.7,
                 "max_tokens": 5000
             }
-        })
+        )
 
         print("📡 Response status code:", response.status_code)
         print("📄 Raw response:", response.text[:500])
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+HTTP Session Module for Hidden Gems
+
+This module provides keep-alive, connection-pooled requests sessions and a
+retrying POST helper shared by the Ollama client and the Overpass crawler,
+so every outbound HTTP caller reuses sockets instead of opening one per
+request.
+"""
+
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10  # Keep-alive connections kept open per host
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5  # seconds, doubled after each failed attempt
+RETRY_STATUS_CODES = (502, 503, 504)
+
+
+def create_pooled_session(pool_size=DEFAULT_POOL_SIZE):
+    """
+    Create a requests session backed by a keep-alive connection pool.
+
+    Parameters:
+    -----------
+    pool_size: int
+        Maximum number of connections kept open per host
+
+    Returns:
+    --------
+    requests.Session: Session that reuses connections across calls
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def post_with_retries(session, url, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, **kwargs):
+    """
+    POST through a session, retrying connection errors and gateway errors.
+
+    Read timeouts are not retried: a model that is still generating after the
+    timeout will not be faster on a second attempt.
+
+    Parameters:
+    -----------
+    session: requests.Session
+        The session to send the request through
+    url: str
+        The URL to POST to
+    retries: int
+        Number of extra attempts after the first one
+    backoff: float
+        Delay before the first retry, doubled for each later retry
+    **kwargs:
+        Passed through to session.post
+
+    Returns:
+    --------
+    requests.Response: The last response received
+    """
+    for attempt in range(retries + 1):
+        try:
+            response = session.post(url, **kwargs)
+        except requests.exceptions.ConnectionError:
+            if attempt == retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                return response
+
+        wait_time = backoff * (2 ** attempt)
+        print(f"Retrying {url} in {wait_time:.1f}s (attempt {attempt + 2}/{retries + 1})")
+        time.sleep(wait_time)
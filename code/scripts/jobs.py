@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Job Queue Module for Hidden Gems
+
+This module runs long recommendation work on a bounded worker pool so HTTP
+requests can submit a job, return immediately with a job id, and poll for
+status, ETA and the result instead of holding a server thread for minutes.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_JOB_TTL = 3600  # seconds a finished job stays retrievable
+DEFAULT_MAX_JOBS = 1000  # cap on remembered jobs, oldest finished ones go first
+DEFAULT_MAX_PENDING = 100  # jobs waiting for a worker before submit() refuses more
+
+
+class QueueFullError(Exception):
+    """Raised by JobManager.submit when too many jobs are already waiting."""
+
+
+class JobManager:
+    """
+    Submit/poll job registry backed by a thread pool.
+
+    A job may carry a ready_at time: its result is withheld (status stays
+    'running') until then. This lets callers enforce a minimum perceived
+    duration without a worker sleeping through it.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, ttl=DEFAULT_JOB_TTL, max_jobs=DEFAULT_MAX_JOBS,
+                 max_pending=DEFAULT_MAX_PENDING):
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, expected_duration=0, min_duration=0, kind="job"):
+        """
+        Queue fn() on the worker pool.
+
+        Parameters:
+        -----------
+        fn: callable
+            Zero-argument function returning a JSON-serializable result
+        expected_duration: float
+            Expected run time in seconds, used for ETA estimates
+        min_duration: float
+            The result is not released before this many seconds after submit
+        kind: str
+            Label reported back in the job status
+
+        Returns:
+        --------
+        dict: Status snapshot of the new job
+
+        Raises:
+        -------
+        QueueFullError: If max_pending jobs are already waiting for a worker
+        """
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "submitted_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "ready_at": now + min_duration,
+            "expected_duration": max(expected_duration, min_duration),
+            "result": None,
+            "error": None
+        }
+
+        with self._lock:
+            pending = sum(1 for other in self._jobs.values() if other["status"] == "queued")
+            if pending >= self.max_pending:
+                raise QueueFullError(f"{pending} jobs already waiting for a worker")
+            self._evict(now)
+            self._jobs[job["id"]] = job
+
+        self._executor.submit(self._run, job, fn)
+        return self.get(job["id"])
+
+    def get(self, job_id):
+        """
+        Return a status snapshot for a job, or None if it is unknown or expired.
+
+        The snapshot holds id, kind, status, eta (seconds until the result is
+        expected), elapsed time and, once released, the result or error.
+        """
+        now = time.time()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+
+            status = job["status"]
+            if status in ("done", "failed") and now < job["ready_at"]:
+                status = "running"
+
+            snapshot = {
+                "jobId": job["id"],
+                "kind": job["kind"],
+                "status": status,
+                "eta": self._eta(job, now),
+                "elapsed": now - job["submitted_at"]
+            }
+            if status == "done":
+                snapshot["result"] = job["result"]
+            elif status == "failed":
+                snapshot["error"] = job["error"]
+            return snapshot
+
+    def stats(self):
+        """Return job counts by status."""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
+
+    def _run(self, job, fn):
+        with self._lock:
+            job["status"] = "running"
+            job["started_at"] = time.time()
+        try:
+            result = fn()
+        except Exception as e:
+            print(f"⚠️ Job {job['id']} failed: {e}")
+            with self._lock:
+                job["status"] = "failed"
+                job["error"] = str(e)
+                job["finished_at"] = time.time()
+            return
+
+        with self._lock:
+            job["status"] = "done"
+            job["result"] = result
+            job["finished_at"] = time.time()
+
+    def _eta(self, job, now):
+        """Seconds until the job's result should be available; caller holds the lock."""
+        if job["status"] in ("done", "failed"):
+            return max(0, job["ready_at"] - now)
+
+        if job["status"] == "running":
+            expected_end = job["started_at"] + job["expected_duration"]
+        else:
+            # Jobs ahead of this one each take a worker for about their expected duration
+            ahead = sum(
+                1 for other in self._jobs.values()
+                if other["status"] in ("queued", "running") and other["submitted_at"] < job["submitted_at"]
+            )
+            waves = ahead // self.max_workers + 1
+            expected_end = now + waves * job["expected_duration"]
+
+        return max(0, expected_end - now, job["ready_at"] - now)
+
+    def _evict(self, now):
+        """Forget expired finished jobs, then the oldest finished ones over the cap."""
+        for job_id in [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and now - job["finished_at"] > self.ttl
+        ]:
+            del self._jobs[job_id]
+
+        if len(self._jobs) >= self.max_jobs:
+            finished = sorted(
+                (job for job in self._jobs.values() if job["finished_at"] is not None),
+                key=lambda job: job["finished_at"]
+            )
+            for job in finished[:len(self._jobs) - self.max_jobs + 1]:
+                del self._jobs[job["id"]]
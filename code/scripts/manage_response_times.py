@@ -9,6 +9,8 @@ import argparse
 import datetime
 import sys
 
+from response_time_store import summarize
+
 # Get script directory and calculate paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.dirname(SCRIPT_DIR)  # Assuming this script is in a subdirectory
@@ -66,8 +68,13 @@ def view_database():
         with open(RESPONSE_TIMES_PATH, "r") as f:
             data = json.load(f)
         
-        times = data.get("times", [])
-        average = data.get("average", 0)
+        # Files written by the server keep every sample; older files only "times"
+        if "samples" in data:
+            times = [sample["duration"] for sample in data["samples"]]
+            average = sum(times) / len(times) if times else 0
+        else:
+            times = data.get("times", [])
+            average = data.get("average", 0)
         synthetic = data.get("synthetic", False)
         
         print("\n📊 Response Times Database Stats:")
@@ -81,6 +88,8 @@ def view_database():
         
         if times:
             print(f"   Min: {min(times):.2f}s, Max: {max(times):.2f}s")
+            stats = summarize(times)
+            print(f"   p50: {stats['p50']:.2f}s, p90: {stats['p90']:.2f}s, p99: {stats['p99']:.2f}s")
             
             # Show histogram of times
             if len(times) >= 5:
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Ollama Client Module for Hidden Gems
+
+This module provides a shared, connection-pooled HTTP client for the local
+Ollama server so that recommendation and review calls reuse keep-alive
+connections instead of opening a new socket per request.
+"""
+
+import json
+import threading
+
+from http_session import DEFAULT_BACKOFF, DEFAULT_POOL_SIZE, DEFAULT_RETRIES, create_pooled_session, post_with_retries
+
+OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
+DEFAULT_TIMEOUT = 180  # seconds
+DEFAULT_CONNECT_TIMEOUT = 5  # seconds
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class OllamaClient:
+    """
+    Thin wrapper around the Ollama /api/generate endpoint.
+
+    One instance holds one pooled session; use get_client() to share it
+    between the Flask endpoints and the batch scripts.
+    """
+
+    def __init__(self, url=OLLAMA_URL, pool_size=DEFAULT_POOL_SIZE,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.url = url
+        self.retries = retries
+        self.backoff = backoff
+        self.session = create_pooled_session(pool_size)
+
+    def generate(self, prompt, model, stream=False, timeout=DEFAULT_TIMEOUT,
+                 options=None, retries=None):
+        """
+        Send a generation request to Ollama.
+
+        Parameters:
+        -----------
+        prompt: str
+            The prompt to send
+        model: str
+            The Ollama model name
+        stream: bool
+            Whether Ollama should stream the response as JSON lines
+        timeout: float or None
+            Read timeout in seconds (None waits forever)
+        options: dict or None
+            Ollama generation options such as temperature
+        retries: int or None
+            Override the client's retry count for this call
+
+        Returns:
+        --------
+        requests.Response: The raw Ollama response
+        """
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream
+        }
+        if options:
+            payload["options"] = options
+
+        return post_with_retries(
+            self.session,
+            self.url,
+            retries=self.retries if retries is None else retries,
+            backoff=self.backoff,
+            json=payload,
+            stream=stream,
+            timeout=(DEFAULT_CONNECT_TIMEOUT, timeout)
+        )
+
+    def generate_stream(self, prompt, model, timeout=DEFAULT_TIMEOUT, options=None):
+        """
+        Stream a generation from Ollama, yielding text fragments as they arrive.
+
+        Parameters:
+        -----------
+        prompt: str
+            The prompt to send
+        model: str
+            The Ollama model name
+        timeout: float or None
+            Maximum wait in seconds between streamed chunks
+        options: dict or None
+            Ollama generation options such as temperature
+
+        Yields:
+        -------
+        str: The next fragment of generated text
+        """
+        response = self.generate(prompt, model, stream=True, timeout=timeout, options=options)
+        with response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                yield chunk.get("response", "")
+                if chunk.get("done"):
+                    break
+
+
+def get_client(url=OLLAMA_URL, pool_size=DEFAULT_POOL_SIZE):
+    """
+    Return the shared OllamaClient for a URL, creating it on first use.
+
+    Parameters:
+    -----------
+    url: str
+        The Ollama generate endpoint
+    pool_size: int
+        Connection pool size, only used when the client is first created
+
+    Returns:
+    --------
+    OllamaClient: The shared client
+    """
+    with _clients_lock:
+        if url not in _clients:
+            _clients[url] = OllamaClient(url, pool_size=pool_size)
+        return _clients[url]
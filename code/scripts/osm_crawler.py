@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+OSM Crawler Module for Hidden Gems
+
+This module downloads many Overpass cells concurrently. A bounded worker pool
+is throttled by an adaptive limiter that backs off on 429/504 responses, retries
+use jittered exponential backoff (honouring Retry-After), and a persistent
+per-cell manifest records which cells finished or failed so an interrupted or
+partially failed crawl can be resumed.
+"""
+
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from adaptive_limiter import AdaptiveLimiter
+
+OVERPASS_STATUS_URL = "https://overpass-api.de/api/status"
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_CELL_RETRIES = 4
+DEFAULT_BACKOFF = 2.0  # seconds, upper bound of the first jittered retry delay
+MAX_BACKOFF = 120.0  # seconds
+
+# Separate generator so retry jitter never disturbs seeded sampling
+_jitter = random.Random()
+
+
+class OverpassError(Exception):
+    """A failed Overpass request, with the server's Retry-After hint if any."""
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """Return a Retry-After header value in seconds, or None if absent or a date."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=DEFAULT_BACKOFF, cap=MAX_BACKOFF, retry_after=None):
+    """
+    Full-jitter exponential backoff, never shorter than the server's hint.
+
+    Parameters:
+    -----------
+    attempt: int
+        Zero-based number of the attempt that just failed
+    base: float
+        Upper bound of the delay after the first failure
+    cap: float
+        Maximum upper bound
+    retry_after: float or None
+        Seconds the server asked us to wait
+
+    Returns:
+    --------
+    float: Seconds to sleep before the next attempt
+    """
+    delay = _jitter.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def overpass_slots(session, url=OVERPASS_STATUS_URL, timeout=10):
+    """
+    Ask the Overpass server how many query slots this client has.
+
+    Returns:
+    --------
+    int or None: The slot limit, or None if it could not be determined
+    """
+    try:
+        response = session.get(url, timeout=timeout)
+        match = re.search(r"Rate limit:\s*(\d+)", response.text)
+    except Exception as e:
+        print(f"Could not read Overpass status: {e}")
+        return None
+    if not match or int(match.group(1)) == 0:
+        return None
+    return int(match.group(1))
+
+
+class CellManifest:
+    """
+    Persistent per-cell crawl status, stored as one JSON file.
+
+    Entries map a cell key to {"status": "done" | "failed", "attempts",
+    "elements", "error", "updated_at"}. Writes are atomic renames.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r") as f:
+                self.cells = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.cells = {}
+
+    def status(self, key):
+        entry = self.cells.get(key)
+        return entry["status"] if entry else None
+
+    def mark(self, key, status, attempts, elements=None, error=None):
+        """Record the outcome of a cell and persist the manifest."""
+        with self._lock:
+            previous = self.cells.get(key, {})
+            self.cells[key] = {
+                "status": status,
+                "attempts": previous.get("attempts", 0) + attempts,
+                "elements": elements,
+                "error": error,
+                "updated_at": time.time()
+            }
+            self._save()
+
+    def failed(self):
+        """Return the keys of cells whose last crawl failed."""
+        with self._lock:
+            return [key for key, entry in self.cells.items() if entry["status"] == "failed"]
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.cells, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def crawl_cells(cells, fetch, manifest=None, max_workers=DEFAULT_MAX_WORKERS,
+                retries=DEFAULT_CELL_RETRIES, limiter=None, on_result=None):
+    """
+    Fetch many cells concurrently with adaptive, rate-aware throttling.
+
+    Parameters:
+    -----------
+    cells: dict
+        Mapping of cell key to the argument passed to fetch (e.g. a bbox)
+    fetch: callable
+        fetch(cell) returns the cell's data or raises (OverpassError for
+        HTTP failures, so its Retry-After hint is honoured)
+    manifest: CellManifest or None
+        Where to record per-cell outcomes
+    max_workers: int
+        Upper bound on concurrent requests
+    retries: int
+        Attempts per cell before it is marked failed
+    limiter: AdaptiveLimiter or None
+        Shared limiter; one starting at a single request is created if None
+    on_result: callable or None
+        on_result(key, data) is called from the caller's thread as cells finish
+        (data is None for cells that failed every attempt)
+
+    Returns:
+    --------
+    dict: Mapping of cell key to data, with None for failed cells
+    """
+    limiter = limiter or AdaptiveLimiter(initial_limit=1, max_limit=max_workers)
+
+    def crawl_one(key, cell):
+        error = None
+        for attempt in range(retries):
+            try:
+                with limiter.slot():
+                    data = fetch(cell)
+            except Exception as e:
+                error = e
+                if attempt < retries - 1:
+                    delay = backoff_delay(attempt, retry_after=getattr(e, "retry_after", None))
+                    print(f"Cell {key} failed ({e}); retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                continue
+
+            if manifest is not None:
+                manifest.mark(key, "done", attempt + 1, elements=len(data.get("elements", [])))
+            return data
+
+        print(f"Cell {key} failed after {retries} attempts: {error}")
+        if manifest is not None:
+            manifest.mark(key, "failed", retries, error=str(error))
+        return None
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(crawl_one, key, cell): key for key, cell in cells.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            results[key] = future.result()
+            if on_result is not None:
+                on_result(key, results[key])
+
+    return results
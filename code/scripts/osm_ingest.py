@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+OSM Ingest Module for Hidden Gems
+
+This module streams OpenStreetMap elements from local files instead of the
+Overpass API: .osm.pbf extracts (through pyosmium, if installed) and GeoJSON
+exports such as sample_data/bishop_restaurants.geojson. Elements are yielded
+one at a time in the same shape Overpass returns ("out center"), so they can
+go straight into process_osm_elements.
+"""
+
+import json
+import os
+
+try:
+    import ijson
+except ImportError:  # GeoJSON falls back to line-by-line or whole-file parsing
+    ijson = None
+
+try:
+    import osmium
+except ImportError:  # PBF ingestion is optional; GeoJSON works without it
+    osmium = None
+
+# Location index for resolving way nodes; use "sparse_file_array,<path>" for
+# state-sized extracts on machines with little memory
+LOCATION_INDEX = "flex_mem"
+
+# GeoJSON properties that describe the feature rather than being OSM tags
+GEOJSON_META_PROPERTIES = ('element_type', 'osmid', 'id', 'nodes')
+
+
+def _matches_tags(tags, poi_tags):
+    """Return True if any category=value pair of poi_tags is present in tags."""
+    return any(tags.get(category) in values for category, values in poi_tags.items())
+
+
+def _center(coordinates):
+    """Return the bbox center (lat, lon) of a list of [lon, lat] positions."""
+    lons = [position[0] for position in coordinates]
+    lats = [position[1] for position in coordinates]
+    return (min(lats) + max(lats)) / 2, (min(lons) + max(lons)) / 2
+
+
+def _flatten_positions(geometry):
+    """Return every [lon, lat] position of a GeoJSON geometry."""
+    positions = []
+
+    def walk(value):
+        if value and isinstance(value[0], (int, float)):
+            positions.append(value)
+        else:
+            for item in value:
+                walk(item)
+
+    walk(geometry.get('coordinates') or [])
+    return positions
+
+
+def iter_pbf_elements(path, poi_tags):
+    """
+    Stream POI nodes and ways from an OSM PBF extract.
+
+    Ways get an Overpass-style "center" (the center of their node bbox).
+    Requires pyosmium 3.7+.
+
+    Parameters:
+    -----------
+    path: str
+        Path to the .osm.pbf file
+    poi_tags: dict
+        Mapping of tag key to accepted values, like OSM_POI_TAGS
+
+    Yields:
+    -------
+    dict: Elements shaped like Overpass "out center" output
+    """
+    if osmium is None:
+        raise ImportError("PBF ingestion requires pyosmium (pip install osmium)")
+
+    processor = (
+        osmium.FileProcessor(path, osmium.osm.NODE | osmium.osm.WAY)
+        .with_locations(LOCATION_INDEX)
+        .with_filter(osmium.filter.KeyFilter(*poi_tags.keys()))
+    )
+
+    for obj in processor:
+        tags = dict(obj.tags)
+        if not _matches_tags(tags, poi_tags):
+            continue
+
+        if obj.is_node():
+            if not obj.location.valid():
+                continue
+            yield {'type': 'node', 'id': obj.id, 'lat': obj.location.lat, 'lon': obj.location.lon, 'tags': tags}
+        elif obj.is_way():
+            positions = [[node.lon, node.lat] for node in obj.nodes if node.location.valid()]
+            if not positions:
+                continue
+            lat, lon = _center(positions)
+            yield {'type': 'way', 'id': obj.id, 'center': {'lat': lat, 'lon': lon}, 'tags': tags}
+
+
+def _geojson_feature_to_element(feature, index):
+    properties = feature.get('properties') or {}
+    geometry = feature.get('geometry') or {}
+
+    tags = {
+        key: value for key, value in properties.items()
+        if value is not None and key not in GEOJSON_META_PROPERTIES
+    }
+    element_type = properties.get('element_type') or 'node'
+    element_id = properties.get('osmid') or properties.get('id') or feature.get('id') or index
+
+    if geometry.get('type') == 'Point':
+        lon, lat = geometry['coordinates'][:2]
+        return {'type': 'node', 'id': element_id, 'lat': lat, 'lon': lon, 'tags': tags}
+
+    positions = _flatten_positions(geometry)
+    if not positions:
+        return None
+    lat, lon = _center(positions)
+    # Non-point features are reported like Overpass ways, with a center
+    return {'type': 'way' if element_type == 'node' else element_type, 'id': element_id,
+            'center': {'lat': lat, 'lon': lon}, 'tags': tags}
+
+
+def _iter_geojson_features(path):
+    """
+    Yield the features of a GeoJSON FeatureCollection.
+
+    With ijson installed, features are parsed incrementally whatever the
+    layout. Otherwise files written one feature per line (as GDAL/OSMnx do)
+    are streamed line by line, a compact one-line collection (as json.dump
+    writes it) is parsed from its line, and anything else is loaded in one go.
+    """
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'features.item', use_float=True)
+        return
+
+    streamed = False
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip().rstrip(',')
+            if not (line.startswith('{') and '"Feature' in line):
+                continue
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError:
+                if streamed:
+                    raise
+                break
+            if value.get('type') == 'Feature':
+                streamed = True
+                yield value
+            elif value.get('type') == 'FeatureCollection':
+                streamed = True
+                yield from value.get('features', [])
+            elif not streamed:
+                break
+
+    if not streamed:
+        with open(path, 'r') as f:
+            yield from json.load(f).get('features', [])
+
+
+def iter_geojson_elements(path, poi_tags=None):
+    """
+    Stream elements from a GeoJSON file of OSM features.
+
+    Properties become tags (nulls dropped); OSMnx's element_type/osmid give
+    the element type and id. Non-point geometries get a center.
+
+    Parameters:
+    -----------
+    path: str
+        Path to the .geojson file
+    poi_tags: dict or None
+        If given, only features with a matching category=value tag are kept
+
+    Yields:
+    -------
+    dict: Elements shaped like Overpass "out center" output
+    """
+    for index, feature in enumerate(_iter_geojson_features(path)):
+        element = _geojson_feature_to_element(feature, index)
+        if element is None:
+            continue
+        if poi_tags is not None and not _matches_tags(element['tags'], poi_tags):
+            continue
+        yield element
+
+
+def iter_source_elements(path, poi_tags):
+    """Stream elements from a .osm.pbf or .geojson/.json file, chosen by extension."""
+    name = os.path.basename(path).lower()
+    if name.endswith('.pbf'):
+        return iter_pbf_elements(path, poi_tags)
+    if name.endswith('.geojson') or name.endswith('.json'):
+        return iter_geojson_elements(path, poi_tags)
+    raise ValueError(f"Unsupported OSM source {path}: expected .osm.pbf or .geojson")
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+OSM Store Module for Hidden Gems
+
+This module provides a single-file SQLite store for downloaded OpenStreetMap
+tiles. Elements are stored one row per tile and OSM id with their JSON body
+zlib-compressed, alongside lat/lon columns so a tile can be clipped to a
+bounding box in SQL and read lazily as a stream. Each tile carries a checksum
+over its element bodies and an expiry time.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_TTL = 90 * 24 * 3600  # seconds before a tile is considered stale
+COMPRESSION_LEVEL = 6
+READ_BATCH_SIZE = 500  # element rows fetched per lock acquisition while streaming
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiles (
+    z INTEGER NOT NULL,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    kind TEXT NOT NULL,              -- 'data', or 'split' when held by the four children
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    element_count INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    PRIMARY KEY (z, x, y)
+);
+CREATE TABLE IF NOT EXISTS elements (
+    z INTEGER NOT NULL,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    osm_type TEXT NOT NULL,
+    osm_id INTEGER NOT NULL,
+    lat REAL,
+    lon REAL,
+    body BLOB NOT NULL,
+    PRIMARY KEY (z, x, y, osm_type, osm_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS elements_position ON elements (z, x, y, lat, lon);
+"""
+
+
+def element_position(element):
+    """Return an OSM element's (lat, lon), using the center for ways, or (None, None)."""
+    if 'lat' in element and 'lon' in element:
+        return element['lat'], element['lon']
+    center = element.get('center') or {}
+    return center.get('lat'), center.get('lon')
+
+
+def _checksum(bodies):
+    digest = hashlib.sha256()
+    for body in bodies:
+        digest.update(body)
+    return digest.hexdigest()
+
+
+class OSMStore:
+    """
+    Compressed, indexed tile store backed by one SQLite database.
+
+    Tiles are addressed as (zoom, x, y). A tile is written in one transaction,
+    so readers see either all of its elements or none.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._verified = set()
+
+    def tile_kind(self, tile, allow_expired=False):
+        """
+        Return 'data' or 'split' for a stored tile, or None if it is missing.
+
+        Expired tiles count as missing unless allow_expired is set.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, expires_at FROM tiles WHERE z = ? AND x = ? AND y = ?", tile
+            ).fetchone()
+        if row is None or (not allow_expired and row[1] < time.time()):
+            return None
+        return row[0]
+
+    def put_tile(self, tile, elements):
+        """
+        Replace a tile's elements.
+
+        Parameters:
+        -----------
+        tile: (zoom, x, y)
+            The tile the elements were fetched for
+        elements: iterable of dict
+            Raw Overpass elements
+        """
+        rows = {}
+        for element in elements:
+            lat, lon = element_position(element)
+            body = zlib.compress(json.dumps(element, separators=(',', ':')).encode(), COMPRESSION_LEVEL)
+            rows[(element['type'], element['id'])] = (lat, lon, body)
+
+        keys = sorted(rows)
+        checksum = _checksum(rows[key][2] for key in keys)
+        now = time.time()
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM elements WHERE z = ? AND x = ? AND y = ?", tile)
+            self._conn.executemany(
+                "INSERT INTO elements VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [tile + key + rows[key] for key in keys]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, 'data', ?, ?, ?, ?)",
+                tile + (now, now + self.ttl, len(keys), checksum)
+            )
+            self._verified.add(tile)
+
+    def put_split(self, tile):
+        """Record that a tile is held by its four children instead of its own data."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM elements WHERE z = ? AND x = ? AND y = ?", tile)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, 'split', ?, ?, 0, '')",
+                tile + (now, now + self.ttl)
+            )
+
+    def delete_tile(self, tile):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM elements WHERE z = ? AND x = ? AND y = ?", tile)
+            self._conn.execute("DELETE FROM tiles WHERE z = ? AND x = ? AND y = ?", tile)
+            self._verified.discard(tile)
+
+    def verify_tile(self, tile):
+        """
+        Check a data tile's element bodies against its stored checksum.
+
+        Returns:
+        --------
+        bool: True if the tile is intact (or not a data tile)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, element_count, checksum FROM tiles WHERE z = ? AND x = ? AND y = ?", tile
+            ).fetchone()
+            if row is None or row[0] != 'data':
+                return True
+            bodies = [body for (body,) in self._conn.execute(
+                "SELECT body FROM elements WHERE z = ? AND x = ? AND y = ? ORDER BY osm_type, osm_id", tile
+            )]
+        return len(bodies) == row[1] and _checksum(bodies) == row[2]
+
+    def check_tile(self, tile):
+        """
+        Verify a tile the first time it is used in this process.
+
+        A corrupt tile is deleted so it will be fetched again.
+
+        Returns:
+        --------
+        bool: True if the tile is intact
+        """
+        if tile in self._verified:
+            return True
+        if not self.verify_tile(tile):
+            print(f"OSM store tile {tile} failed its integrity check; dropping it")
+            self.delete_tile(tile)
+            return False
+        self._verified.add(tile)
+        return True
+
+    def iter_elements(self, tile, bbox=None):
+        """
+        Stream a tile's elements, optionally clipped to a bounding box.
+
+        The tile is checked with check_tile() first; a corrupt tile raises
+        ValueError. Rows are read in batches of READ_BATCH_SIZE, and the lock
+        is only held while a batch is fetched.
+
+        Parameters:
+        -----------
+        tile: (zoom, x, y)
+            The tile to read
+        bbox: list [min_lat, min_lon, max_lat, max_lon] or None
+            Only yield elements positioned inside this box. Elements without
+            a position are always yielded, so callers can count them.
+
+        Yields:
+        -------
+        dict: Raw Overpass elements
+        """
+        if not self.check_tile(tile):
+            raise ValueError(f"OSM store tile {tile} failed its integrity check")
+
+        query = "SELECT body FROM elements WHERE z = ? AND x = ? AND y = ?"
+        params = list(tile)
+        if bbox is not None:
+            query += (" AND ((lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?)"
+                      " OR lat IS NULL OR lon IS NULL)")
+            params += [bbox[0], bbox[2], bbox[1], bbox[3]]
+
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+        try:
+            while True:
+                with self._lock:
+                    bodies = cursor.fetchmany(READ_BATCH_SIZE)
+                if not bodies:
+                    break
+                for (body,) in bodies:
+                    yield json.loads(zlib.decompress(body))
+        finally:
+            cursor.close()
+
+    def stats(self):
+        """Return tile and element counts and the database size in bytes."""
+        with self._lock:
+            tiles = self._conn.execute("SELECT kind, COUNT(*) FROM tiles GROUP BY kind").fetchall()
+            elements = self._conn.execute("SELECT COUNT(*) FROM elements").fetchone()[0]
+            expired = self._conn.execute(
+                "SELECT COUNT(*) FROM tiles WHERE expires_at < ?", (time.time(),)
+            ).fetchone()[0]
+        return {
+            "tiles": dict(tiles),
+            "expired_tiles": expired,
+            "elements": elements,
+            "size_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        }
+
+    def verify(self):
+        """
+        Run SQLite's integrity check and verify every data tile.
+
+        Returns:
+        --------
+        list: Tiles whose checksum did not match
+        """
+        with self._lock:
+            result = self._conn.execute("PRAGMA integrity_check").fetchone()[0]
+            tiles = self._conn.execute("SELECT z, x, y FROM tiles WHERE kind = 'data'").fetchall()
+        if result != "ok":
+            print(f"SQLite integrity check failed: {result}")
+        return [tuple(tile) for tile in tiles if not self.verify_tile(tuple(tile))]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or verify the OSM tile store")
+    parser.add_argument("path", help="Path to the SQLite store")
+    parser.add_argument("--verify", action="store_true", help="Check every tile's checksum")
+    parser.add_argument("--purge-corrupt", action="store_true",
+                        help="With --verify, delete corrupt tiles so they are fetched again")
+    args = parser.parse_args()
+
+    store = OSMStore(args.path)
+    print(json.dumps(store.stats(), indent=2))
+
+    if args.verify:
+        corrupt = store.verify()
+        print(f"{len(corrupt)} corrupt tiles")
+        for tile in corrupt:
+            print(f"  {tile}")
+            if args.purge_corrupt:
+                store.delete_tile(tile)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
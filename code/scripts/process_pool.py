@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Process Pool Module for Hidden Gems
+
+This module provides an order-preserving parallel map over a process pool for
+the CPU-bound stages of the OSM pipeline (filtering, quality checks,
+selection and formatting). Results come back in input order whatever the
+worker count, so merged statistics and seeded sampling are reproducible, and
+only a bounded window of tasks is in flight so large extracts can be
+streamed through it.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_PROCESSES = os.cpu_count() or 1
+WINDOW_PER_PROCESS = 4  # Tasks queued ahead per worker
+
+
+def ordered_map(fn, items, processes=DEFAULT_PROCESSES, window=None):
+    """
+    Apply fn to every item in a process pool, yielding results in input order.
+
+    Parameters:
+    -----------
+    fn: callable
+        Module-level function (it is pickled by reference)
+    items: iterable
+        Picklable arguments; consumed lazily
+    processes: int
+        Worker processes; 1 or less runs fn in this process
+    window: int or None
+        Maximum tasks submitted but not yet yielded
+        (default: WINDOW_PER_PROCESS per worker)
+
+    Yields:
+    -------
+    The result of fn(item) for each item, in order
+    """
+    if processes <= 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    window = window or processes * WINDOW_PER_PROCESS
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
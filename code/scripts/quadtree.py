@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Quadtree Module for Hidden Gems
+
+This module provides the spatial pieces of adaptive sampling: splitting
+bounding boxes into quadrants, a mask of areas prior crawls found empty (ocean,
+desert) so they can be skipped, partitioning dense results into smaller
+leaves, and density-weighted quota allocation across leaves.
+"""
+
+import math
+
+MASK_SAMPLES = 4  # Probe points per side when testing a cell against the mask
+
+
+def split_bbox(bbox):
+    """
+    Split a bounding box into its four quadrants.
+
+    Parameters:
+    -----------
+    bbox: list [min_lat, min_lon, max_lat, max_lon]
+        The box to split
+
+    Returns:
+    --------
+    list: Four child boxes ordered SW, SE, NW, NE
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    mid_lat = (min_lat + max_lat) / 2
+    mid_lon = (min_lon + max_lon) / 2
+    return [
+        [min_lat, min_lon, mid_lat, mid_lon],
+        [min_lat, mid_lon, mid_lat, max_lon],
+        [mid_lat, min_lon, max_lat, mid_lon],
+        [mid_lat, mid_lon, max_lat, max_lon]
+    ]
+
+
+def bbox_contains(bbox, lat, lon):
+    min_lat, min_lon, max_lat, max_lon = bbox
+    return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+
+
+class DensityMask:
+    """
+    Record of which areas earlier crawls found empty or populated.
+
+    A cell is considered empty when every probe point inside it falls in an
+    area a prior query returned no elements for, and none falls in an area
+    that had elements.
+    """
+
+    def __init__(self, observations=()):
+        self.empty = []
+        self.populated = []
+        for bbox, count in observations:
+            self.add(bbox, count)
+
+    def add(self, bbox, count):
+        """Record that a query over bbox returned count elements."""
+        (self.populated if count else self.empty).append(bbox)
+
+    def is_empty(self, bbox):
+        """Return True if prior results show nothing inside bbox."""
+        if not self.empty:
+            return False
+
+        min_lat, min_lon, max_lat, max_lon = bbox
+        lat_step = (max_lat - min_lat) / MASK_SAMPLES
+        lon_step = (max_lon - min_lon) / MASK_SAMPLES
+        for i in range(MASK_SAMPLES):
+            for j in range(MASK_SAMPLES):
+                lat = min_lat + (i + 0.5) * lat_step
+                lon = min_lon + (j + 0.5) * lon_step
+                if any(bbox_contains(cell, lat, lon) for cell in self.populated):
+                    return False
+                if not any(bbox_contains(cell, lat, lon) for cell in self.empty):
+                    return False
+        return True
+
+
+def partition_places(bbox, places, max_places, max_depth):
+    """
+    Split a cell's places into quadtree leaves holding at most max_places each.
+
+    Parameters:
+    -----------
+    bbox: list [min_lat, min_lon, max_lat, max_lon]
+        The cell the places were fetched for
+    places: list
+        Places with 'coordinates' as [lon, lat]
+    max_places: int
+        Leaves with more places than this are split further
+    max_depth: int
+        Maximum number of splits below bbox
+
+    Returns:
+    --------
+    list: (bbox, places) leaves, in quadrant order, excluding empty leaves
+    """
+    if len(places) <= max_places or max_depth <= 0:
+        return [(bbox, places)] if places else []
+
+    children = split_bbox(bbox)
+    buckets = [[] for _ in children]
+    for place in places:
+        lon, lat = place['coordinates']
+        # First matching quadrant, so points on a shared edge are not duplicated
+        for index, child in enumerate(children):
+            if bbox_contains(child, lat, lon):
+                buckets[index].append(place)
+                break
+        else:
+            buckets[0].append(place)
+
+    leaves = []
+    for child, bucket in zip(children, buckets):
+        leaves.extend(partition_places(child, bucket, max_places, max_depth - 1))
+    return leaves
+
+
+def allocate_quotas(counts, budget, exponent=0.5):
+    """
+    Share a sampling budget across leaves in proportion to their density.
+
+    Weights are count ** exponent, so dense leaves get more places without
+    drowning out sparse ones. No leaf is given more than it has; budget
+    freed by small leaves is redistributed to the rest.
+
+    Parameters:
+    -----------
+    counts: list of int
+        Places available per leaf
+    budget: int
+        Total places to select
+    exponent: float
+        Density weighting exponent (1 is proportional, 0 is uniform)
+
+    Returns:
+    --------
+    list of int: Places to select per leaf
+    """
+    quotas = [0] * len(counts)
+    remaining = min(budget, sum(counts))
+    active = [i for i, count in enumerate(counts) if count > 0]
+
+    while remaining > 0 and active:
+        weights = {i: counts[i] ** exponent for i in active}
+        total_weight = sum(weights.values())
+        shares = {i: remaining * weights[i] / total_weight for i in active}
+
+        # Leaves whose share covers everything they have are filled first
+        capped = [i for i in active if quotas[i] + shares[i] >= counts[i]]
+        if capped:
+            for i in capped:
+                remaining -= counts[i] - quotas[i]
+                quotas[i] = counts[i]
+            active = [i for i in active if i not in capped]
+            continue
+
+        # Largest remainder rounding for the rest
+        floors = {i: math.floor(shares[i]) for i in active}
+        for i in active:
+            quotas[i] += floors[i]
+        leftover = remaining - sum(floors.values())
+        by_remainder = sorted(active, key=lambda i: (floors[i] - shares[i], i))
+        for i in by_remainder[:leftover]:
+            quotas[i] += 1
+        remaining = 0
+
+    return quotas
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Recommendation Cache Module for Hidden Gems
+
+This module provides a two-tier read-through cache for LLM recommendations: a
+bounded in-memory LRU in front of a bounded on-disk store, both expiring entries
+after a TTL. Keys are content hashes of the normalized request, so any change to
+preferences or candidate gems maps to a different entry.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 7 * 24 * 3600  # seconds
+DEFAULT_MAX_MEMORY_ENTRIES = 256
+DEFAULT_MAX_DISK_ENTRIES = 5000
+
+
+class RecommendationCache:
+    """
+    Read-through LRU cache with a memory tier and a disk tier.
+
+    Disk entries are one JSON file per key; their modification time doubles
+    as the LRU clock, so the disk tier survives restarts and is shared by
+    every server process pointing at the same directory.
+    """
+
+    def __init__(self, cache_dir, ttl=DEFAULT_TTL, max_memory_entries=DEFAULT_MAX_MEMORY_ENTRIES,
+                 max_disk_entries=DEFAULT_MAX_DISK_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _expired(self, created_at):
+        return time.time() - created_at > self.ttl
+
+    def get(self, key):
+        """
+        Look a key up in memory, then on disk.
+
+        Parameters:
+        -----------
+        key: str
+            The content hash of the request
+
+        Returns:
+        --------
+        The cached value, or None on a miss or an expired entry
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, value[0], value[1])
+        return value[1]
+
+    def set(self, key, value):
+        """
+        Store a value in both tiers.
+
+        Parameters:
+        -----------
+        key: str
+            The content hash of the request
+        value: JSON-serializable
+            The value to cache
+        """
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, created_at, value)
+
+        try:
+            self._write_disk(key, created_at, value)
+        except OSError as e:
+            print(f"Warning: Could not write recommendation cache entry: {e}")
+
+    def stats(self):
+        """Return hit/miss counters and tier sizes."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0,
+                "memory_entries": len(self._memory)
+            }
+
+    def _remember(self, key, created_at, value):
+        """Insert into the memory tier; caller holds the lock."""
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if self._expired(entry.get("created_at", 0)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        # Touch the file so disk eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["created_at"], entry["value"]
+
+    def _write_disk(self, key, created_at, value):
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"created_at": created_at, "value": value}, f)
+        os.replace(tmp_path, self._path(key))
+
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Drop the least recently used disk entries beyond the size bound."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+
+        if len(entries) <= self.max_disk_entries:
+            return
+
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
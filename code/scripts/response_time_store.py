@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Response Time Store Module for Hidden Gems
+
+This module keeps LLM response times in an in-process ring buffer and flushes
+them to response_times.json in the background. Flushes merge with whatever
+other server processes have written under a file lock and replace the file
+atomically, so concurrent writers never lose samples and request threads never
+touch the disk.
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+DEFAULT_MAX_SAMPLES = 1000
+DEFAULT_FLUSH_INTERVAL = 5.0  # seconds
+RECENT_TIMES_COUNT = 20  # Length of the legacy "times" list
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values, pct):
+    """
+    Linear-interpolated percentile of an already sorted list.
+
+    Parameters:
+    -----------
+    sorted_values: list
+        Values in ascending order
+    pct: float
+        Percentile between 0 and 100
+
+    Returns:
+    --------
+    float: The percentile, or None for an empty list
+    """
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def summarize(durations):
+    """Return count, mean, min/max and percentiles for a list of durations."""
+    ordered = sorted(durations)
+    summary = {
+        "count": len(ordered),
+        "average": sum(ordered) / len(ordered) if ordered else 0,
+        "min": ordered[0] if ordered else None,
+        "max": ordered[-1] if ordered else None
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}"] = percentile(ordered, pct)
+    return summary
+
+
+def load_samples(path):
+    """
+    Read samples from a response times file.
+
+    Files written by manage_response_times.py or simple_response_seed.py only
+    carry a "times" list; those are loaded as samples with unknown endpoint.
+    """
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+    if "samples" in data:
+        return data["samples"]
+    return [
+        {"ts": 0, "duration": duration, "endpoint": "unknown", "model": "unknown"}
+        for duration in data.get("times", [])
+    ]
+
+
+class ResponseTimeStore:
+    """
+    Thread-safe ring buffer of response times with periodic atomic flushes.
+
+    record() only appends to memory. A daemon thread flushes pending samples
+    every flush_interval seconds (and once more at exit), merging them with
+    the samples other processes have flushed to the same file.
+    """
+
+    def __init__(self, path, max_samples=DEFAULT_MAX_SAMPLES, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.max_samples = max_samples
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._samples = deque(load_samples(path), maxlen=max_samples)
+        self._pending = []
+        self._file_mtime = self._mtime()
+        self._flusher = None
+
+    def record(self, duration, endpoint="generate", model="unknown"):
+        """
+        Add a response time sample.
+
+        Parameters:
+        -----------
+        duration: float
+            Response time in seconds
+        endpoint: str
+            Which endpoint or call site produced the sample
+        model: str
+            The model that served the request
+
+        Returns:
+        --------
+        float: Mean of the samples currently held
+        """
+        sample = {"ts": time.time(), "duration": duration, "endpoint": endpoint, "model": model}
+        with self._lock:
+            self._samples.append(sample)
+            self._pending.append(sample)
+            average = sum(s["duration"] for s in self._samples) / len(self._samples)
+
+        self._ensure_flusher()
+        return average
+
+    def stats(self):
+        """
+        Summarize the held samples.
+
+        Returns:
+        --------
+        dict: Overall count/mean/percentiles plus per-endpoint and per-model
+            breakdowns. The legacy "times" (most recent durations) and
+            "average" keys are kept for existing clients.
+        """
+        with self._lock:
+            samples = list(self._samples)
+
+        durations = [s["duration"] for s in samples]
+        result = summarize(durations)
+        result["times"] = durations[-RECENT_TIMES_COUNT:]
+
+        for field, key in (("endpoint", "by_endpoint"), ("model", "by_model")):
+            groups = {}
+            for sample in samples:
+                groups.setdefault(sample.get(field, "unknown"), []).append(sample["duration"])
+            result[key] = {name: summarize(values) for name, values in groups.items()}
+
+        return result
+
+    def flush(self):
+        """Merge pending samples into the file and refresh the in-memory view."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+
+            # Nothing new here and nobody else has written: skip the I/O
+            if not pending and self._mtime() == self._file_mtime:
+                return
+
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with self._file_lock():
+                    merged = (load_samples(self.path) + pending)[-self.max_samples:]
+                    if pending:
+                        self._write(merged)
+                    self._file_mtime = self._mtime()
+            except OSError as e:
+                print(f"Error flushing response times: {e}")
+                with self._lock:
+                    self._pending = pending + self._pending
+                return
+
+            with self._lock:
+                # Keep samples recorded while the flush was running
+                self._samples = deque(merged + self._pending, maxlen=self.max_samples)
+
+    def _write(self, samples):
+        recent = [s["duration"] for s in samples[-RECENT_TIMES_COUNT:]]
+        data = {
+            "times": recent,
+            "average": sum(recent) / len(recent) if recent else 0,
+            "samples": samples
+        }
+
+        # Write to a temp file and rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def _mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def _file_lock(self):
+        return _FileLock(self.path + ".lock")
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._flush_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+class _FileLock:
+    """Exclusive advisory lock on a sidecar file, shared across processes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._handle = None
+
+    def __enter__(self):
+        self._handle = open(self.path, "a")
+        if fcntl:
+            fcntl.flock(self._handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self._handle, fcntl.LOCK_UN)
+        self._handle.close()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Review Journal Module for Hidden Gems
+
+This module provides an append-only JSONL journal for generated reviews. Each
+review is written as one fsync'd line the moment it is generated, so a run can
+be interrupted at any point and resumed from the journal, and the combined
+reviews file is only rewritten once, by compaction, at the end of a run.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def write_json_atomic(path, data, indent=2):
+    """
+    Write JSON to a temp file in the same directory and rename it into place.
+
+    Parameters:
+    -----------
+    path: str
+        Destination file
+    data: JSON-serializable
+        The data to write
+    indent: int or None
+        Passed to json.dump
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ReviewJournal:
+    """
+    Append-only log of {"id", "review", "ts"} records, one JSON object per line.
+
+    Appends are serialized with a lock and fsync'd before returning. A torn
+    final line left by a crash is ignored on replay.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._handle = None
+
+    def append(self, gem_id, review):
+        """
+        Durably record one review.
+
+        Parameters:
+        -----------
+        gem_id: str
+            The gem the review belongs to
+        review: str
+            The review text
+        """
+        line = json.dumps({"id": gem_id, "review": review, "ts": time.time()}) + "\n"
+        with self._lock:
+            if self._handle is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._handle = open(self.path, "a")
+                # Start on a fresh line if the previous run crashed mid-write
+                if self._handle.tell() > 0 and not self._ends_with_newline():
+                    self._handle.write("\n")
+            self._handle.write(line)
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+
+    def replay(self):
+        """
+        Read every complete record from the journal.
+
+        Returns:
+        --------
+        dict: Mapping of gem id to review, later records winning
+        """
+        reviews = {}
+        try:
+            with open(self.path, "r") as f:
+                for line_number, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"Skipping unreadable journal line {line_number} in {self.path}")
+                        continue
+                    reviews[record["id"]] = record["review"]
+        except FileNotFoundError:
+            pass
+        return reviews
+
+    def compact(self, output_path, base_reviews=None):
+        """
+        Merge the journal into a combined reviews file and reset the journal.
+
+        The combined file is replaced atomically before the journal is
+        truncated, so a crash in between only leaves records that are
+        already in the combined file.
+
+        Parameters:
+        -----------
+        output_path: str
+            The combined reviews JSON file
+        base_reviews: dict or None
+            Reviews to merge underneath the journal's records
+
+        Returns:
+        --------
+        dict: The combined reviews
+        """
+        with self._lock:
+            self._close_locked()
+            combined = dict(base_reviews or {})
+            combined.update(self.replay())
+            write_json_atomic(output_path, combined)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        return combined
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self):
+        """Close the append handle; caller holds the lock."""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Road Graph Store Module for Hidden Gems
+
+This module provides a compact, memory-mapped form of the driving graph for
+routing. A store is a directory of NumPy arrays in compressed sparse row
+(CSR) layout: node ids and [lon, lat] coordinates, an index pointer per node
+into flat arrays of edge targets, travel times (seconds) and lengths
+(meters), plus the same arrays for the reversed graph. Parallel edges are
+collapsed to the fastest one. Opening a store maps the files read-only, so
+loading costs the same for a city or a whole region and holds no per-edge
+Python objects. Shortest paths run on the arrays with scipy's csgraph when
+scipy is installed, and with a heap-based Dijkstra otherwise.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from gem_store import replace_directory
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+except ImportError:  # The pure-Python Dijkstra below works on the same arrays
+    csr_matrix = None
+    csgraph_dijkstra = None
+
+STORE_VERSION = 1
+SOURCE_EDGE_SHIFT = 1.0  # Added to staggered start offsets; csgraph drops zero-weight edges
+ARRAYS = ('node_ids', 'coordinates', 'indptr', 'targets', 'travel_time', 'length',
+          'reverse_indptr', 'reverse_targets', 'reverse_travel_time')
+
+
+def _csr(sources, targets, node_count):
+    """Order edges by source and return (indptr, order)."""
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=node_count), out=indptr[1:])
+    return indptr, order
+
+
+def write_road_graph(node_ids, coordinates, edge_sources, edge_targets, travel_time, length, path):
+    """
+    Write a driving graph as a CSR store directory, replacing any existing store.
+
+    Parameters:
+    -----------
+    node_ids: array-like of int
+        OSM node ids
+    coordinates: array-like of [lon, lat]
+        Node coordinates, in node_ids order
+    edge_sources, edge_targets: array-like of int
+        Node positions (indices into node_ids) of each directed edge
+    travel_time: array-like of float
+        Edge travel times in seconds
+    length: array-like of float
+        Edge lengths in meters
+    path: str
+        Store directory to create
+
+    Returns:
+    --------
+    dict: The store's metadata
+    """
+    node_ids = np.asarray(node_ids, dtype=np.int64)
+    count = len(node_ids)
+    sources = np.asarray(edge_sources, dtype=np.int64)
+    targets = np.asarray(edge_targets, dtype=np.int64)
+    travel_time = np.asarray(travel_time, dtype=np.float64)
+    length = np.asarray(length, dtype=np.float64)
+
+    # Keep only the fastest of parallel edges
+    order = np.lexsort((travel_time, targets, sources))
+    sources, targets, travel_time, length = sources[order], targets[order], travel_time[order], length[order]
+    first = np.ones(len(sources), dtype=bool)
+    first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+    sources, targets, travel_time, length = sources[first], targets[first], travel_time[first], length[first]
+
+    indptr, _ = _csr(sources, targets, count)  # already sorted by source
+    reverse_indptr, reverse_order = _csr(targets, sources, count)
+
+    arrays = {
+        'node_ids': node_ids,
+        'coordinates': np.asarray(coordinates, dtype=np.float64).reshape(-1, 2),
+        'indptr': indptr,
+        'targets': targets.astype(np.int32),
+        'travel_time': travel_time.astype(np.float32),
+        'length': length.astype(np.float32),
+        'reverse_indptr': reverse_indptr,
+        'reverse_targets': sources[reverse_order].astype(np.int32),
+        'reverse_travel_time': travel_time[reverse_order].astype(np.float32)
+    }
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".road_graph.")
+    os.chmod(tmp_dir, 0o755)  # mkdtemp is owner-only; the store is read by the server
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+
+    meta = {'version': STORE_VERSION, 'nodes': count, 'edges': int(len(targets))}
+    with open(os.path.join(tmp_dir, "meta.json"), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    replace_directory(tmp_dir, path)
+    return meta
+
+
+class RoadGraph:
+    """
+    Read-only, memory-mapped CSR driving graph.
+
+    Node positions (0..N-1) index every per-node array; node_ids maps them
+    back to OSM node ids.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), 'r') as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported road graph store version {meta.get('version')} in {path}")
+
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r'))
+        self.edge_count = meta['edges']
+        self._matrices = {}
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def edge(self, u, v):
+        """Return (travel_time, length) of the edge between two node positions."""
+        start, end = self.indptr[u], self.indptr[u + 1]
+        hits = np.nonzero(self.targets[start:end] == v)[0]
+        if not len(hits):
+            raise KeyError(f"No edge from {u} to {v}")
+        return float(self.travel_time[start + hits[0]]), float(self.length[start + hits[0]])
+
+    def _arrays(self, reverse):
+        if reverse:
+            return self.reverse_indptr, self.reverse_targets, self.reverse_travel_time
+        return self.indptr, self.targets, self.travel_time
+
+    def shortest_paths(self, sources, reverse=False, cutoff=None, target=None, offsets=None):
+        """
+        Multi-source Dijkstra over travel time.
+
+        Parameters:
+        -----------
+        sources: iterable of int
+            Node positions the search starts from
+        reverse: bool
+            Search against edge direction (distances *to* the sources)
+        cutoff: float or None
+            Stop expanding beyond this many seconds
+        target: int or None
+            Stop once this node is settled (heap search only)
+        offsets: iterable of float or None
+            Seconds each source starts at, in sources order (default: all 0)
+
+        Returns:
+        --------
+        tuple: (seconds per node, np.inf if unreached; predecessor position
+                per node, -1 for sources and unreached nodes)
+        """
+        starts = {}
+        for source, offset in zip(sources, offsets if offsets is not None else itertools.repeat(0.0)):
+            starts[int(source)] = min(float(offset), starts.get(int(source), float('inf')))
+        if csgraph_dijkstra is not None:
+            return self._csgraph_dijkstra(starts, reverse, cutoff)
+        return self._heap_dijkstra(starts, reverse, cutoff, target)
+
+    def _csgraph_dijkstra(self, starts, reverse, cutoff):
+        limit = cutoff if cutoff is not None else np.inf
+        matrix = self._matrices.get(reverse)
+        if matrix is None:
+            indptr, targets, weights = self._arrays(reverse)
+            # csgraph treats explicit zeros as missing edges; nudge zero-length edges
+            matrix = csr_matrix((np.maximum(weights, 1e-6), targets, indptr), shape=(len(self), len(self)))
+            self._matrices[reverse] = matrix
+
+        if not any(starts.values()):
+            distances, predecessors, _ = csgraph_dijkstra(
+                matrix, directed=True, indices=sorted(starts), min_only=True, return_predecessors=True, limit=limit)
+            return distances, np.where(predecessors < 0, -1, predecessors)
+
+        # Staggered starts: search from an extra node with an edge of each source's
+        # offset (shifted to stay positive) into that source
+        count = len(self)
+        sources = np.fromiter(starts, dtype=np.int64, count=len(starts))
+        shifted = np.fromiter(starts.values(), dtype=np.float64, count=len(starts)) + SOURCE_EDGE_SHIFT
+        augmented = csr_matrix(
+            (np.concatenate([matrix.data, shifted]),
+             np.concatenate([matrix.indices, sources]),
+             np.append(matrix.indptr, matrix.indptr[-1] + len(sources))),
+            shape=(count + 1, count + 1))
+        distances, predecessors = csgraph_dijkstra(
+            augmented, directed=True, indices=count, return_predecessors=True, limit=limit + SOURCE_EDGE_SHIFT)
+        distances = distances[:count] - SOURCE_EDGE_SHIFT
+        predecessors = predecessors[:count]
+        return distances, np.where((predecessors < 0) | (predecessors == count), -1, predecessors)
+
+    def _heap_dijkstra(self, sources, reverse, cutoff, target):
+        # sources maps each start position to the seconds it starts at.
+        # Edges are read from the mapped arrays one node's slice at a time, so no
+        # per-edge Python objects outlive the pop; plain ndarray views skip
+        # np.memmap's per-access overhead
+        indptr, targets, weights = (np.asarray(array) for array in self._arrays(reverse))
+
+        limit = cutoff if cutoff is not None else float('inf')
+        distances = [float('inf')] * len(self)
+        predecessors = [-1] * len(self)
+        heap = []
+        for source, offset in sources.items():
+            distances[source] = offset
+            heap.append((offset, source))
+        heapq.heapify(heap)
+
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance > distances[node]:
+                continue
+            if node == target:
+                break
+            start, end = int(indptr[node]), int(indptr[node + 1])
+            for neighbor, weight in zip(targets[start:end].tolist(), weights[start:end].tolist()):
+                candidate = distance + weight
+                if candidate < distances[neighbor] and candidate <= limit:
+                    distances[neighbor] = candidate
+                    predecessors[neighbor] = node
+                    heapq.heappush(heap, (candidate, neighbor))
+        return np.array(distances), np.array(predecessors, dtype=np.int64)
+
+
+def store_is_current(source_paths, store_path):
+    """Return True if a store exists and is at least as new as all of its source files."""
+    meta_path = os.path.join(store_path, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    built = os.path.getmtime(meta_path)
+    return all(not os.path.exists(p) or built >= os.path.getmtime(p) for p in source_paths)
+
+
+def default_store_path(source_path):
+    """Return the store directory that sits next to a GraphML or GeoJSON source."""
+    return os.path.splitext(source_path)[0] + ".csr"
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Road Network Module for Hidden Gems
+
+This module provides detour times measured on the driving graph rather than
+as straight-line distance from the route. The trip is routed on the road
+graph, then two multi-source Dijkstra searches run outward from every node of
+the route: one along the edges (route -> gem) and one against them (gem ->
+route). Each search is seeded with the route's elapsed time at every node, so
+a gem's detour is the whole trip through it (leave the route anywhere, rejoin
+anywhere) minus the direct trip, and every candidate gem is priced in one pair
+of searches instead of a shortest-path query per gem.
+
+The graph is an OSMnx GraphML export (sample_data/berkeley_driving.graphml)
+or the matching node/edge GeoJSON. It is converted once to a CSR road graph
+store (see road_graph_store) and routing runs on those flat arrays. For the
+conversion OSMnx loads GraphML when installed; otherwise networkx reads it,
+and edge speeds are filled in from maxspeed tags and per-highway defaults.
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import time
+
+import networkx as nx
+import numpy as np
+
+from road_graph_store import RoadGraph, default_store_path, store_is_current, write_road_graph
+from route_geometry import to_local_km
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # Nearest nodes fall back to blocked matrix products
+    cKDTree = None
+
+try:
+    import osmnx as ox
+except ImportError:  # networkx alone can read the GraphML; speeds are imputed below
+    ox = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, os.pardir, os.pardir))
+ROAD_GRAPH_PATH = os.path.join(REPO_DIR, "sample_data/berkeley_driving.graphml")
+
+# Free-flow speeds for edges without a usable maxspeed tag
+HIGHWAY_SPEEDS_KPH = {
+    'motorway': 100, 'motorway_link': 60,
+    'trunk': 80, 'trunk_link': 50,
+    'primary': 60, 'primary_link': 45,
+    'secondary': 50, 'secondary_link': 40,
+    'tertiary': 45, 'tertiary_link': 35,
+    'unclassified': 40, 'residential': 35,
+    'living_street': 15, 'service': 20
+}
+DEFAULT_SPEED_KPH = 40
+KPH_PER_MPH = 1.609344
+
+MAX_SNAP_KM = 1.0  # Points farther than this from every road node are off the network
+ACCESS_SPEED_KPH = 20  # Assumed speed between a point and its nearest road node
+NODE_CHUNK_SIZE = 2048  # Points per nearest-node batch, bounds the (points x nodes) matrix
+
+
+def _tag_values(value):
+    """Return the values of an OSM tag that OSMnx may have merged into a list."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str) and value.startswith('['):
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            pass
+    return [value]
+
+
+def parse_speed_kph(maxspeed):
+    """
+    Parse an OSM maxspeed tag ("25 mph", "50", or a list of them) to km/h.
+
+    Returns:
+    --------
+    float or None: Mean of the parsed speeds, or None if none parse
+    """
+    speeds = []
+    for value in _tag_values(maxspeed):
+        match = re.match(r'\s*(\d+(?:\.\d+)?)\s*(mph)?', str(value))
+        if match:
+            speed = float(match.group(1))
+            speeds.append(speed * KPH_PER_MPH if match.group(2) else speed)
+    return sum(speeds) / len(speeds) if speeds else None
+
+
+def highway_speed_kph(highway):
+    """Return the default speed of an OSM highway type (first of a merged list)."""
+    values = _tag_values(highway)
+    return HIGHWAY_SPEEDS_KPH.get(values[0] if values else None, DEFAULT_SPEED_KPH)
+
+
+def edge_travel_time(length, maxspeed=None, highway=None):
+    """Return the travel time in seconds of an edge from its length (m) and OSM tags."""
+    speed_kph = parse_speed_kph(maxspeed) or highway_speed_kph(highway)
+    return length / (speed_kph / 3.6)
+
+
+def load_road_graph(path=ROAD_GRAPH_PATH):
+    """
+    Load a driving graph with float x/y node coordinates and a travel_time
+    (seconds) and length (meters) on every edge.
+
+    Parameters:
+    -----------
+    path: str
+        OSMnx GraphML file
+
+    Returns:
+    --------
+    networkx.MultiDiGraph: The road graph
+    """
+    if ox is not None:
+        graph = ox.load_graphml(path)
+        graph = ox.add_edge_speeds(graph, hwy_speeds=HIGHWAY_SPEEDS_KPH, fallback=DEFAULT_SPEED_KPH)
+        return ox.add_edge_travel_times(graph)
+
+    graph = nx.read_graphml(path, force_multigraph=True)
+    for _, data in graph.nodes(data=True):
+        data['x'] = float(data['x'])
+        data['y'] = float(data['y'])
+    for _, _, data in graph.edges(data=True):
+        data['length'] = float(data['length'])
+        data['travel_time'] = edge_travel_time(data['length'], data.get('maxspeed'), data.get('highway'))
+    return graph
+
+
+def graph_arrays(graph):
+    """
+    Flatten a graph from load_road_graph into the arrays of a road graph store.
+
+    Returns:
+    --------
+    tuple: (node_ids, coordinates, edge_sources, edge_targets, travel_time, length)
+    """
+    node_ids = list(graph.nodes)
+    position = {node: i for i, node in enumerate(node_ids)}
+    coordinates = [[data['x'], data['y']] for _, data in graph.nodes(data=True)]
+    sources, targets, travel_time, length = [], [], [], []
+    for u, v, data in graph.edges(data=True):
+        sources.append(position[u])
+        targets.append(position[v])
+        travel_time.append(float(data['travel_time']))
+        length.append(float(data['length']))
+    return [int(node) for node in node_ids], coordinates, sources, targets, travel_time, length
+
+
+def geojson_arrays(nodes_path, edges_path):
+    """
+    Read OSMnx node and edge GeoJSON exports into the arrays of a road graph store,
+    without building a networkx graph.
+
+    Returns:
+    --------
+    tuple: (node_ids, coordinates, edge_sources, edge_targets, travel_time, length)
+    """
+    with open(nodes_path, 'r') as f:
+        nodes = json.load(f)['features']
+    node_ids = [feature['properties']['osmid'] for feature in nodes]
+    coordinates = [feature['geometry']['coordinates'][:2] for feature in nodes]
+    position = {node: i for i, node in enumerate(node_ids)}
+
+    with open(edges_path, 'r') as f:
+        edges = json.load(f)['features']
+    sources, targets, travel_time, length = [], [], [], []
+    for feature in edges:
+        props = feature['properties']
+        if props['u'] not in position or props['v'] not in position:
+            continue
+        sources.append(position[props['u']])
+        targets.append(position[props['v']])
+        length.append(float(props['length']))
+        travel_time.append(edge_travel_time(length[-1], props.get('maxspeed'), props.get('highway')))
+    return node_ids, coordinates, sources, targets, travel_time, length
+
+
+def _geojson_nodes_path(edges_path):
+    return edges_path.replace("_edges", "_nodes")
+
+
+def convert_road_graph(source, output=None, nodes_path=None):
+    """
+    Convert a GraphML graph or an edges GeoJSON export to a CSR road graph store.
+
+    Parameters:
+    -----------
+    source: str
+        OSMnx GraphML file, or edges GeoJSON (with a matching nodes file)
+    output: str or None
+        Store directory (default: next to source)
+    nodes_path: str or None
+        Nodes GeoJSON for an edges GeoJSON source (default: "_edges" -> "_nodes")
+
+    Returns:
+    --------
+    dict: The store's metadata
+    """
+    output = output or default_store_path(source)
+    if source.endswith(".geojson"):
+        arrays = geojson_arrays(nodes_path or _geojson_nodes_path(source), source)
+    else:
+        arrays = graph_arrays(load_road_graph(source))
+    return write_road_graph(*arrays, output)
+
+
+def load_road_graph_store(source=ROAD_GRAPH_PATH, store_path=None):
+    """
+    Open the CSR store of a driving graph, converting the source first if
+    the store is missing or older than it.
+
+    Returns:
+    --------
+    RoadGraph: The memory-mapped graph
+    """
+    store_path = store_path or default_store_path(source)
+    sources = [source, _geojson_nodes_path(source)] if source.endswith(".geojson") else [source]
+    if not store_is_current(sources, store_path):
+        meta = convert_road_graph(source, store_path)
+        print(f"Converted {source} to {store_path} ({meta['nodes']} nodes, {meta['edges']} edges)")
+    return RoadGraph(store_path)
+
+
+class RoadNetwork:
+    """
+    Routing and detour times over a CSR driving graph.
+
+    Parameters:
+    -----------
+    graph: RoadGraph
+        Graph from load_road_graph_store
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.coordinates = np.asarray(graph.coordinates)
+        self._ref_lat = float(self.coordinates[:, 1].mean()) if len(self.coordinates) else 0.0
+        self._node_xy = to_local_km(self.coordinates, self._ref_lat)
+        self._node_sq = (self._node_xy ** 2).sum(axis=1)
+        self._tree = cKDTree(self._node_xy) if cKDTree is not None else None
+
+    @classmethod
+    def from_source(cls, path=ROAD_GRAPH_PATH):
+        """Open a driving graph (GraphML or edges GeoJSON) through its CSR store."""
+        return cls(load_road_graph_store(path))
+
+    def __len__(self):
+        return len(self.graph)
+
+    def nearest_nodes(self, points):
+        """
+        Return the nearest road node of every [lon, lat] point.
+
+        Returns:
+        --------
+        tuple: (node position per point, distance to it in km per point)
+        """
+        xy = to_local_km(np.asarray(points, dtype=float).reshape(-1, 2), self._ref_lat)
+        indices = np.empty(len(xy), dtype=np.intp)
+        distances = np.empty(len(xy))
+        if self._tree is not None:
+            distances, indices = self._tree.query(xy)
+            return indices, distances
+
+        for start in range(0, len(xy), NODE_CHUNK_SIZE):
+            block = xy[start:start + NODE_CHUNK_SIZE]
+            # |p - n|^2 = |p|^2 + |n|^2 - 2 p.n, one matrix product per block
+            d2 = (block ** 2).sum(axis=1)[:, None] + self._node_sq[None, :] - 2 * block @ self._node_xy.T
+            nearest = d2.argmin(axis=1)
+            indices[start:start + len(block)] = nearest
+            distances[start:start + len(block)] = np.sqrt(np.maximum(d2[np.arange(len(block)), nearest], 0))
+        return indices, distances
+
+    def _snap(self, point):
+        (index,), (distance,) = self.nearest_nodes([point])
+        if distance > MAX_SNAP_KM:
+            raise ValueError(f"{point} is {distance:.1f} km from the road network")
+        return int(index)
+
+    def route(self, origin, destination):
+        """
+        Return the fastest driving route between two [lon, lat] points.
+
+        Returns:
+        --------
+        dict: {"nodes": route OSM node ids, "positions": their positions in
+               the graph, "coordinates": their [lon, lat], "minutes": driving
+               time, "km": driving distance}
+
+        Raises:
+        -------
+        ValueError: If an endpoint is off the network or no route exists
+        """
+        source, target = self._snap(origin), self._snap(destination)
+        seconds, predecessors = self.graph.shortest_paths([source], target=target)
+        if not np.isfinite(seconds[target]):
+            raise ValueError(f"No driving route from {origin} to {destination}")
+
+        positions = [target]
+        while positions[-1] != source:
+            positions.append(int(predecessors[positions[-1]]))
+        positions.reverse()
+
+        meters = sum(self.graph.edge(u, v)[1] for u, v in zip(positions, positions[1:]))
+        return {
+            'nodes': [int(self.graph.node_ids[i]) for i in positions],
+            'positions': positions,
+            'coordinates': self.coordinates[positions].tolist(),
+            'minutes': float(seconds[target]) / 60,
+            'km': meters / 1000
+        }
+
+    def detour_minutes(self, route_positions, points, max_minutes=None):
+        """
+        Return the extra driving minutes to visit each point from a route.
+
+        Leaving the route at node i, driving to the point and rejoining at
+        node j takes T(i) + d(i, point) + d(point, j) + (T_total - T(j)),
+        where T is the route's elapsed time at a node. Both halves are found
+        for all points at once by a multi-source Dijkstra seeded with those
+        route times, forward from T(i) and in reverse from T_total - T(j),
+        so the detour is their sum minus T_total: the stretch of route the
+        detour skips is credited back. The walk-in between the point and its
+        nearest road node is added at ACCESS_SPEED_KPH each way.
+
+        Parameters:
+        -----------
+        route_positions: list of int
+            Graph positions of the route's nodes, in driving order
+            (route()["positions"])
+        points: array-like of [lon, lat]
+            Gem coordinates
+        max_minutes: float or None
+            Longest detour (driving only) to price; longer ones get None
+
+        Returns:
+        --------
+        list: Detour minutes per point, None when the point is off the
+              network or out of reach
+        """
+        legs = [self.graph.edge(u, v)[0] for u, v in zip(route_positions, route_positions[1:])]
+        elapsed = np.concatenate([[0.0], np.cumsum(legs)])
+        total = float(elapsed[-1])
+        cutoff = total + max_minutes * 60 if max_minutes is not None else None
+        to_point, _ = self.graph.shortest_paths(route_positions, cutoff=cutoff, offsets=elapsed)
+        from_point, _ = self.graph.shortest_paths(route_positions, reverse=True, cutoff=cutoff,
+                                                  offsets=total - elapsed)
+
+        indices, snap_km = self.nearest_nodes(points)
+        seconds = np.maximum(to_point[indices] + from_point[indices] - total, 0)
+        minutes = seconds / 60 + 2 * snap_km / ACCESS_SPEED_KPH * 60
+        reachable = np.isfinite(seconds) & (snap_km <= MAX_SNAP_KM)
+        if max_minutes is not None:
+            reachable &= seconds <= max_minutes * 60
+        return [float(m) if ok else None for m, ok in zip(minutes, reachable)]
+
+    def detours(self, origin, destination, points, max_minutes=None):
+        """
+        Route origin to destination and price a detour to every point.
+
+        Returns:
+        --------
+        tuple: (route dict from route(), detour minutes per point)
+        """
+        route = self.route(origin, destination)
+        return route, self.detour_minutes(route['positions'], points, max_minutes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a driving graph to a CSR road graph store")
+    parser.add_argument("source", nargs="?", default=ROAD_GRAPH_PATH,
+                        help="OSMnx GraphML file or edges GeoJSON (default: the Berkeley sample graph)")
+    parser.add_argument("--nodes", help="Nodes GeoJSON for an edges GeoJSON source")
+    parser.add_argument("--output", help="Store directory (default: next to the source)")
+    args = parser.parse_args()
+
+    output = args.output or default_store_path(args.source)
+    start = time.time()
+    meta = convert_road_graph(args.source, output, args.nodes)
+    print(f"Wrote {meta['nodes']} nodes and {meta['edges']} edges to {output} in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
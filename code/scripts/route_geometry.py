@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Route Geometry Module for Hidden Gems
+
+This module provides vectorized helpers for measuring how far points are from a
+route polyline and how far along the route they sit. Routes can be given as a
+list of [lon, lat] vertices or as an encoded polyline string, and are simplified
+with Douglas-Peucker before the corridor math runs.
+"""
+
+import math
+import numpy as np
+
+KM_PER_DEGREE_LAT = 111.32
+DEFAULT_SIMPLIFY_TOLERANCE_KM = 0.1
+POINT_CHUNK_SIZE = 2048  # Points per batch, bounds the (points x segments) matrices
+
+
+def decode_polyline(encoded, precision=5):
+    """
+    Decode an encoded polyline string (Google polyline algorithm).
+
+    Parameters:
+    -----------
+    encoded: str
+        The encoded polyline
+    precision: int
+        Number of decimal places encoded (5 for Google, 6 for OSRM polyline6)
+
+    Returns:
+    --------
+    list: Route vertices as [lon, lat] pairs
+    """
+    coords = []
+    index = lat = lon = 0
+    factor = 10 ** precision
+
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        coords.append([lon / factor, lat / factor])
+
+    return coords
+
+
+def parse_route(route):
+    """
+    Normalize a route to an (M, 2) array of [lon, lat] vertices.
+
+    Parameters:
+    -----------
+    route: str or list
+        An encoded polyline string or a sequence of [lon, lat] pairs
+
+    Returns:
+    --------
+    np.ndarray: Route vertices, shape (M, 2)
+    """
+    if isinstance(route, str):
+        route = decode_polyline(route)
+
+    vertices = np.asarray(route, dtype=float)
+    if vertices.ndim != 2 or vertices.shape[1] != 2 or len(vertices) == 0:
+        raise ValueError("Route must be a non-empty list of [lon, lat] pairs")
+    return vertices
+
+
+def to_local_km(coords, ref_lat):
+    """Project [lon, lat] coordinates to a local equirectangular plane in km."""
+    coords = np.asarray(coords, dtype=float)
+    xy = np.empty_like(coords)
+    xy[..., 0] = coords[..., 0] * KM_PER_DEGREE_LAT * math.cos(math.radians(ref_lat))
+    xy[..., 1] = coords[..., 1] * KM_PER_DEGREE_LAT
+    return xy
+
+
+def simplify_polyline(route, tolerance_km=DEFAULT_SIMPLIFY_TOLERANCE_KM):
+    """
+    Simplify a route with the Douglas-Peucker algorithm.
+
+    Parameters:
+    -----------
+    route: str or list
+        An encoded polyline string or a sequence of [lon, lat] pairs
+    tolerance_km: float
+        Maximum distance a dropped vertex may lie from the simplified route
+
+    Returns:
+    --------
+    np.ndarray: Simplified route vertices, shape (K, 2)
+    """
+    vertices = parse_route(route)
+    if len(vertices) < 3 or tolerance_km <= 0:
+        return vertices
+
+    xy = to_local_km(vertices, vertices[:, 1].mean())
+    keep = np.zeros(len(vertices), dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, len(vertices) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        inner = xy[start + 1:end]
+        distances = _distances_to_segment(inner, xy[start], xy[end])
+        farthest = int(np.argmax(distances))
+
+        if distances[farthest] > tolerance_km:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    return vertices[keep]
+
+
+def _distances_to_segment(points, a, b):
+    """Distances from an (N, 2) array of points to the segment a-b."""
+    d = b - a
+    length_squared = float(d @ d)
+    if length_squared == 0:
+        return np.linalg.norm(points - a, axis=1)
+    t = np.clip((points - a) @ d / length_squared, 0, 1)
+    return np.linalg.norm(points - (a + t[:, None] * d), axis=1)
+
+
+def route_metrics(points, route):
+    """
+    Compute distance from a route and progress along it for many points at once.
+
+    Every point is measured against every route segment in one batched pass
+    (chunked over points to bound memory), keeping the nearest segment.
+
+    Parameters:
+    -----------
+    points: array-like (N, 2)
+        Point coordinates as [lon, lat]
+    route: str or list or np.ndarray
+        Route vertices as [lon, lat], or an encoded polyline
+
+    Returns:
+    --------
+    tuple: (distances_km, progress) arrays of shape (N,). Progress is the
+        fraction of route length travelled at the nearest point on the route;
+        it falls below 0 or above 1 for points beyond the route's ends.
+    """
+    vertices = parse_route(route)
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    distances = np.empty(len(points))
+    progress = np.empty(len(points))
+    if len(points) == 0:
+        return distances, progress
+
+    ref_lat = vertices[:, 1].mean()
+    route_xy = to_local_km(vertices, ref_lat)
+    points_xy = to_local_km(points, ref_lat)
+
+    if len(route_xy) == 1:
+        distances[:] = np.linalg.norm(points_xy - route_xy[0], axis=1)
+        progress[:] = 0
+        return distances, progress
+
+    starts = route_xy[:-1]
+    deltas = route_xy[1:] - starts
+    segment_lengths_sq = (deltas ** 2).sum(axis=1)
+    segment_lengths = np.sqrt(segment_lengths_sq)
+    cumulative = np.concatenate(([0.0], np.cumsum(segment_lengths)))
+    total_length = cumulative[-1]
+    # Zero-length segments never win the argmin against their neighbours
+    safe_lengths_sq = np.where(segment_lengths_sq == 0, 1, segment_lengths_sq)
+    last_segment = len(starts) - 1
+
+    ax, ay = starts[:, 0], starts[:, 1]
+    dx, dy = deltas[:, 0], deltas[:, 1]
+
+    for lo in range(0, len(points_xy), POINT_CHUNK_SIZE):
+        chunk = points_xy[lo:lo + POINT_CHUNK_SIZE]
+
+        # (n, S) offsets from every segment start, kept as separate x/y planes
+        ox = chunk[:, 0, None] - ax
+        oy = chunk[:, 1, None] - ay
+        raw_t = (ox * dx + oy * dy) / safe_lengths_sq
+        t = np.clip(raw_t, 0, 1)
+        rx = ox - t * dx
+        ry = oy - t * dy
+        dist_sq = rx * rx + ry * ry
+
+        nearest = np.argmin(dist_sq, axis=1)
+        rows = np.arange(len(chunk))
+        distances[lo:lo + len(chunk)] = np.sqrt(dist_sq[rows, nearest])
+
+        # Let progress run past the ends so callers can drop points behind
+        # the origin or beyond the destination
+        nearest_t = t[rows, nearest]
+        nearest_raw = raw_t[rows, nearest]
+        before_start = (nearest == 0) & (nearest_raw < 0)
+        after_end = (nearest == last_segment) & (nearest_raw > 1)
+        nearest_t = np.where(before_start | after_end, nearest_raw, nearest_t)
+
+        travelled = cumulative[nearest] + nearest_t * segment_lengths[nearest]
+        progress[lo:lo + len(chunk)] = travelled / total_length if total_length else 0
+
+    return distances, progress
+
+
+def filter_points_along_route(points, route, buffer_km):
+    """
+    Select the points inside a route corridor.
+
+    Parameters:
+    -----------
+    points: array-like (N, 2)
+        Point coordinates as [lon, lat]
+    route: str or list or np.ndarray
+        Route vertices as [lon, lat], or an encoded polyline
+    buffer_km: float
+        Corridor half-width in kilometers
+
+    Returns:
+    --------
+    tuple: (indices, distances_km, progress) for the points within buffer_km
+        of the route and between its origin and destination
+    """
+    distances, progress = route_metrics(points, route)
+    mask = (distances <= buffer_km) & (progress >= 0) & (progress <= 1)
+    indices = np.flatnonzero(mask)
+    return indices, distances[indices], progress[indices]
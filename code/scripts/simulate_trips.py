@@ -13,6 +13,9 @@ import os
 import sys
 from tqdm import tqdm  # For progress bar (install with pip install tqdm)
 
+from gem_store import GemStore, load_gems as load_gem_store
+from route_geometry import filter_points_along_route, simplify_polyline
+
 # Configuration
 BASE_URL = "http://127.0.0.1:5000"
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -63,76 +66,43 @@ ACCESSIBILITY = ["wheelchair", "stroller", "elderly", "none"]
 TIME_OPTIONS = ["quick", "short", "half-day", "full-day"]
 
 def load_gems():
-    """Load hidden gems data from file"""
+    """Load hidden gems data from the columnar store if built, else from file"""
     try:
-        with open(GEMS_PATH, "r") as f:
-            return json.load(f)
+        return load_gem_store(GEMS_PATH)
     except Exception as e:
         print(f"Error loading gems: {e}")
         return []
 
-def filter_gems_along_route(gems, origin_coords, destination_coords, buffer_distance_km=30):
+def filter_gems_along_route(gems, origin_coords, destination_coords, buffer_distance_km=30, route=None):
     """
     Simple simulation of findGemsAlongRoute functionality
     Filters gems that are approximately along a route
+
+    If a route polyline (list of [lon, lat] pairs or encoded polyline) is given
+    it is used instead of the straight origin->destination line.
     """
-    def distance_to_line_segment(point, line_start, line_end):
-        """Calculate distance from point to line segment"""
-        # Convert to radians
-        lat1, lon1 = line_start[1] * (3.14159/180), line_start[0] * (3.14159/180)
-        lat2, lon2 = line_end[1] * (3.14159/180), line_end[0] * (3.14159/180)
-        lat3, lon3 = point[1] * (3.14159/180), point[0] * (3.14159/180)
-        
-        # Earth radius in km
-        R = 6371
-        
-        # Simple approximation for small distances
-        x1 = R * lon1 * math.cos((lat1 + lat2) / 2)
-        y1 = R * lat1
-        x2 = R * lon2 * math.cos((lat1 + lat2) / 2)
-        y2 = R * lat2
-        x3 = R * lon3 * math.cos((lat1 + lat3) / 2)
-        y3 = R * lat3
-        
-        # Line segment parameters
-        dx = x2 - x1
-        dy = y2 - y1
-        
-        # If line segment is a point, return distance to the point
-        if dx == 0 and dy == 0:
-            return math.sqrt((x3 - x1)**2 + (y3 - y1)**2)
-        
-        # Calculate projection
-        t = ((x3 - x1) * dx + (y3 - y1) * dy) / (dx**2 + dy**2)
-        
-        # Clamp t to [0,1] for line segment
-        t = max(0, min(1, t))
-        
-        # Calculate closest point on line segment
-        x_proj = x1 + t * dx
-        y_proj = y1 + t * dy
-        
-        # Return distance to closest point
-        return math.sqrt((x3 - x_proj)**2 + (y3 - y_proj)**2)
-    
     try:
-        import math
-        
+        # Keep only gems with usable coordinates
+        if isinstance(gems, GemStore):
+            # Read the coordinate column directly; only hits are decoded
+            coords = gems.coordinates
+            located = gems
+        else:
+            located = [gem for gem in gems if gem.get("coordinates") and len(gem["coordinates"]) == 2]
+            coords = [gem["coordinates"] for gem in located]
+        if not len(located):
+            return []
+
+        route = simplify_polyline(route if route is not None else [origin_coords, destination_coords])
+        indices, distances, _ = filter_points_along_route(coords, route, buffer_distance_km)
+
         # Filter gems that are near the route
         route_gems = []
-        for gem in gems:
-            # Skip if coordinates not available
-            if not gem.get("coordinates") or len(gem["coordinates"]) != 2:
-                continue
-            
-            gem_coords = gem["coordinates"]
-            
-            # Check if within buffer distance of route
-            distance = distance_to_line_segment(gem_coords, origin_coords, destination_coords)
-            if distance <= buffer_distance_km:
-                # Add distance property
-                gem["distanceFromRoute"] = distance
-                route_gems.append(gem)
+        for i, distance in zip(indices, distances):
+            gem = located[i]
+            # Add distance property
+            gem["distanceFromRoute"] = float(distance)
+            route_gems.append(gem)
         
         # Return a sample of the gems
         sample_size = min(15, len(route_gems))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Single-Flight Module for Hidden Gems
+
+This module coalesces concurrent calls that share a key: the first caller runs
+the work and every caller that arrives while it is still running waits for and
+shares that result instead of starting a duplicate call.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent work by key.
+
+    Only in-flight calls are shared; once the leader finishes, the key is
+    released and the next call with that key runs the work again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """
+        Run fn() for key, or wait for the call already running for key.
+
+        Parameters:
+        -----------
+        key: hashable
+            Identifies equivalent calls
+        fn: callable
+            Zero-argument function doing the work
+
+        Returns:
+        --------
+        tuple: (result, shared) where shared is True if this caller waited on
+            another caller's in-flight work. Exceptions raised by fn are
+            re-raised in every waiting caller.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        return future.result(), False
+
+    def in_flight(self):
+        """Return the number of keys currently being worked on."""
+        with self._lock:
+            return len(self._calls)
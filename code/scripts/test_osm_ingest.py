@@ -0,0 +1,35 @@
+"""Tests for GeoJSON ingestion in osm_ingest."""
+
+import json
+import os
+
+import pytest
+
+import osm_ingest
+from osm_ingest import iter_geojson_elements
+
+SAMPLE_GEOJSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              os.pardir, os.pardir, "sample_data", "bishop_restaurants.geojson")
+
+
+def _layouts(tmp_path):
+    """Write the sample as a one-line json.dump copy and return both layouts."""
+    with open(SAMPLE_GEOJSON, 'r') as f:
+        collection = json.load(f)
+    compact = tmp_path / "compact.geojson"
+    with open(compact, 'w') as f:
+        json.dump(collection, f)
+    return len(collection['features']), [SAMPLE_GEOJSON, str(compact)]
+
+
+@pytest.mark.parametrize("use_ijson", [True, False])
+def test_geojson_layouts_yield_every_feature(tmp_path, monkeypatch, use_ijson):
+    if use_ijson and osm_ingest.ijson is None:
+        pytest.skip("ijson is not installed")
+    if not use_ijson:
+        monkeypatch.setattr(osm_ingest, "ijson", None)
+
+    count, paths = _layouts(tmp_path)
+    results = [list(iter_geojson_elements(path)) for path in paths]
+    assert len(results[0]) == count
+    assert results[0] == results[1]
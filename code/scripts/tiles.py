@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tiles Module for Hidden Gems
+
+This module provides standard web-mercator (slippy map) tile math: converting
+coordinates to z/x/y tiles, tile bounding boxes, quadkeys, parent/child tiles
+and the set of tiles covering a bounding box. Bounding boxes use the
+[min_lat, min_lon, max_lat, max_lon] order used throughout the scripts.
+"""
+
+import math
+
+MAX_LATITUDE = 85.05112878  # Web-mercator latitude limit
+
+
+def lonlat_to_tile(lon, lat, zoom):
+    """
+    Return the (zoom, x, y) tile containing a point.
+
+    Parameters:
+    -----------
+    lon, lat: float
+        Coordinates of the point
+    zoom: int
+        Tile zoom level
+
+    Returns:
+    --------
+    tuple: (zoom, x, y)
+    """
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    n = 2 ** zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return zoom, min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bbox(tile):
+    """Return a tile's bounding box as [min_lat, min_lon, max_lat, max_lon]."""
+    zoom, x, y = tile
+    n = 2 ** zoom
+
+    def lat_at(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return [lat_at(y + 1), x / n * 360.0 - 180.0, lat_at(y), (x + 1) / n * 360.0 - 180.0]
+
+
+def tiles_for_bbox(bbox, zoom):
+    """
+    Return every tile at a zoom level that intersects a bounding box.
+
+    Parameters:
+    -----------
+    bbox: list [min_lat, min_lon, max_lat, max_lon]
+        The area to cover
+    zoom: int
+        Tile zoom level
+
+    Returns:
+    --------
+    list: (zoom, x, y) tiles, row by row from the north-west corner
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    _, min_x, min_y = lonlat_to_tile(min_lon, max_lat, zoom)
+    _, max_x, max_y = lonlat_to_tile(max_lon, min_lat, zoom)
+    return [(zoom, x, y) for y in range(min_y, max_y + 1) for x in range(min_x, max_x + 1)]
+
+
+def tile_children(tile):
+    """Return the four tiles one zoom level below a tile."""
+    zoom, x, y = tile
+    return [(zoom + 1, 2 * x + dx, 2 * y + dy) for dy in (0, 1) for dx in (0, 1)]
+
+
+def tile_parent(tile, zoom=None):
+    """Return the ancestor of a tile at a coarser zoom level (default: one level up)."""
+    tile_zoom, x, y = tile
+    zoom = tile_zoom - 1 if zoom is None else zoom
+    shift = tile_zoom - zoom
+    return zoom, x >> shift, y >> shift
+
+
+def tile_key(tile):
+    """Return a tile as a "z/x/y" string."""
+    return "{}/{}/{}".format(*tile)
+
+
+def parse_tile_key(key):
+    """Parse a "z/x/y" string back into a (zoom, x, y) tile."""
+    zoom, x, y = (int(part) for part in key.split("/"))
+    return zoom, x, y
+
+
+def quadkey(tile):
+    """Return the Bing-style quadkey of a tile."""
+    zoom, x, y = tile
+    digits = []
+    for level in range(zoom, 0, -1):
+        mask = 1 << (level - 1)
+        digits.append(str((1 if x & mask else 0) + (2 if y & mask else 0)))
+    return "".join(digits)
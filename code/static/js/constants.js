@@ -55,6 +55,15 @@ window.HiddenGems.constants = {
     SWIPE_THRESHOLD: 80
 };
 
+// Recommendation server (same host as the page, port 5000) and its gem endpoints
+window.HiddenGems.constants.API_URL = ['localhost', '127.0.0.1'].includes(window.location.hostname)
+    ? 'http://127.0.0.1:5000'
+    : `http://${window.location.hostname}:5000`;
+// Per-tile gem shards: manifest at GEM_TILES_PATH, tiles at GEM_TILES_PATH/<z>/<x>/<y>.json
+window.HiddenGems.constants.GEM_TILES_PATH = `${window.HiddenGems.constants.API_URL}/api/gems/tiles`;
+// Versioned dataset releases: manifest at RELEASES_PATH, releases and deltas at RELEASES_PATH/<name>/<file>
+window.HiddenGems.constants.RELEASES_PATH = `${window.HiddenGems.constants.API_URL}/api/datasets`;
+
 // Unit conversion helpers (added to the constants namespace)
 window.HiddenGems.units = {
     // Convert kilometers to miles
@@ -12,6 +12,8 @@ window.HiddenGems.data = {
   // Core data state
   allGems: [],             // Complete dataset from JSON
   allGemsLoaded: false,    // Flag to track if full dataset is loaded
+  allGemsPromise: null,    // Pending load of the full dataset
+  gemTiles: {},            // Gem tile shards by "z/x/y" key, with their manifest hash
   regionGems: {},          // Regional subsets indexed by region name
   pageGems: [],            // Current page's display gems (random sample)
   initialized: false,
@@ -23,7 +25,7 @@ window.HiddenGems.data = {
   initialize: function() {
     if (this.initialized) {
       console.log('Data controller already initialized');
-      return Promise.resolve();
+      return this.allGemsPromise || Promise.resolve();
     }
     
     console.log('Initializing HiddenGems data controller');
@@ -35,45 +37,40 @@ window.HiddenGems.data = {
       this.allGems = storedAllGems;
       this.allGemsLoaded = true;
       console.log(`Loaded ${this.allGems.length} gems from storage`);
+      
+      // Pick up any newer release in the background (only deltas are fetched)
+      this.syncRelease('hidden_gems')
+        .then(releaseGems => {
+          if (releaseGems) {
+            this.setAllGems(releaseGems);
+          }
+        })
+        .catch(error => console.warn('Could not refresh gems release:', error));
       return Promise.resolve(this.allGems);
     }
     
     // Otherwise, load the full dataset from JSON
-    return this.loadAllGems();
+    this.allGemsPromise = this.loadAllGems();
+    return this.allGemsPromise;
   },
   
   /**
-   * Load the complete dataset of gems from JSON file
+   * Load the complete dataset of gems, from the current release when one is
+   * published and from the JSON file otherwise
    * @returns {Promise} Promise that resolves with loaded gems
    */
   loadAllGems: function() {
-    console.log('Loading all gems from JSON...');
+    console.log('Loading all gems...');
     this.showLoading('Loading gems database...');
     
-    return fetch('static/assets/data/hidden_gems.json')
-      .then(response => {
-        if (!response.ok) {
-          throw new Error(`Failed to load gems data: ${response.status}`);
-        }
-        return response.json();
+    return this.syncRelease('hidden_gems')
+      .catch(error => {
+        console.warn('Could not load gems release, falling back to JSON:', error);
+        return null;
       })
+      .then(releaseGems => releaseGems || this.storage.get('release_hidden_gems') || this.fetchJson(window.HiddenGems.constants.DATA_PATH))
       .then(jsonGems => {
-        // Load user-added gems from localStorage
-        const userGems = JSON.parse(window.HiddenGems.data.storage.get('userGems') || '[]');
-        
-        // Combine and ensure all gems have unique IDs
-        const allGems = [...jsonGems, ...userGems].map((gem, index) => {
-          if (!gem.id) {
-            gem.id = `gem-${index}`;
-          }
-          return gem;
-        });
-        
-        // Save to instance and storage
-        this.allGems = allGems;
-        this.allGemsLoaded = true;
-        this.storage.set('allGems', allGems);
-        
+        const allGems = this.setAllGems(jsonGems);
         console.log(`Loaded ${allGems.length} gems from JSON and user data`);
         this.hideLoading();
         
@@ -87,6 +84,180 @@ window.HiddenGems.data = {
       });
   },
   
+  /**
+   * Combine dataset gems with user-added gems and store the result
+   * @param {Array} jsonGems - Gems from the dataset
+   * @returns {Array} All gems
+   */
+  setAllGems: function(jsonGems) {
+    // Load user-added gems from localStorage
+    const userGems = JSON.parse(this.storage.get('userGems') || '[]');
+    
+    // Combine and ensure all gems have unique IDs
+    const allGems = [...jsonGems, ...userGems].map((gem, index) => {
+      if (!gem.id) {
+        gem.id = `gem-${index}`;
+      }
+      return gem;
+    });
+    
+    // Save to instance and storage
+    this.allGems = allGems;
+    this.allGemsLoaded = true;
+    this.storage.set('allGems', allGems);
+    return allGems;
+  },
+  
+  /**
+   * Fetch and parse a JSON file
+   * @param {string} path - URL of the file
+   * @returns {Promise} Promise that resolves with the parsed JSON
+   */
+  fetchJson: function(path) {
+    return fetch(path).then(response => {
+      if (!response.ok) {
+        throw new Error(`Failed to load ${path}: ${response.status}`);
+      }
+      return response.json();
+    });
+  },
+  
+  /**
+   * Query string selecting the gem tiles that cover a region, if it has a
+   * center or a route
+   * @param {Object} options - Regional filtering options (see getRegionalGems)
+   * @returns {string|null} Query for the tile manifest, or null
+   */
+  regionTileParams: function(options) {
+    if (options.route) {
+      const { origin, destination, buffer } = options.route;
+      return `origin=${origin[0]},${origin[1]}&destination=${destination[0]},${destination[1]}&buffer=${buffer}`;
+    }
+    const center = options.center && this.coordUtils.normalize(options.center);
+    if (!center) {
+      return null;
+    }
+    
+    // Box around the circle: 111 km per degree of latitude
+    const radius = options.radius || 30;
+    const latDelta = radius / 111;
+    const lngDelta = radius / (111 * Math.cos(center[1] * Math.PI / 180));
+    return `bbox=${center[1] - latDelta},${center[0] - lngDelta},${center[1] + latDelta},${center[0] + lngDelta}`;
+  },
+  
+  /**
+   * Load the gems of the tiles listed by a tile manifest query, plus user gems.
+   * Tiles already held with the same hash are not fetched again.
+   * @param {string} params - Manifest query ('bbox=...' or 'origin=...&destination=...&buffer=...')
+   * @returns {Promise} Promise that resolves with the gems of the covering tiles
+   */
+  loadTileGems: function(params) {
+    const tilesPath = window.HiddenGems.constants.GEM_TILES_PATH;
+    
+    return this.fetchJson(`${tilesPath}?${params}`)
+      .then(manifest => Promise.all(Object.keys(manifest.tiles).map(key => {
+        const entry = manifest.tiles[key];
+        const held = this.gemTiles[key];
+        if (held && held.hash === entry.hash) {
+          return held.gems;
+        }
+        return this.fetchJson(`${tilesPath}/${key}.json`).then(gems => {
+          this.gemTiles[key] = { hash: entry.hash, gems: gems };
+          return gems;
+        });
+      })))
+      .then(tiles => {
+        const userGems = JSON.parse(this.storage.get('userGems') || '[]');
+        const gems = [].concat(...tiles, userGems);
+        console.log(`Loaded ${gems.length} gems from ${tiles.length} tile(s)`);
+        return gems;
+      });
+  },
+  
+  /**
+   * Bring the stored release of a dataset up to the currently published one.
+   * Applies the deltas from the stored release when they are published,
+   * otherwise downloads the full release (releases are immutable and cached).
+   * @param {string} name - Dataset name ('hidden_gems' or 'reviews')
+   * @returns {Promise} Promise that resolves with the data if the release
+   *   changed, or null if it is unchanged or nothing is published
+   */
+  syncRelease: function(name) {
+    const releasesPath = window.HiddenGems.constants.RELEASES_PATH;
+    
+    return fetch(releasesPath, { cache: 'no-cache' })
+      .then(response => (response.ok ? response.json() : null))
+      .then(manifest => {
+        const entry = manifest && manifest.datasets && manifest.datasets[name];
+        const storedVersion = this.storage.get(`releaseVersion_${name}`);
+        if (!entry || entry.current === storedVersion) {
+          return null;
+        }
+        
+        // Follow the deltas from the stored release to the current one
+        const deltaFrom = {};
+        entry.deltas.forEach(delta => { deltaFrom[delta.from] = delta; });
+        const chain = [];
+        for (let version = storedVersion; version && version !== entry.current; version = deltaFrom[version].to) {
+          if (!deltaFrom[version] || chain.length > entry.deltas.length) {
+            chain.length = 0;
+            break;
+          }
+          chain.push(deltaFrom[version]);
+        }
+        
+        const storedData = this.storage.get(`release_${name}`);
+        let update;
+        if (chain.length > 0 && storedData) {
+          update = Promise.all(chain.map(delta =>
+            this.fetchJson(`${releasesPath}/${name}/${delta.from}-${delta.to}.delta.json`)
+          )).then(deltas => deltas.reduce((data, delta) => this.applyDelta(data, delta), storedData));
+          console.log(`Updating ${name} from release ${storedVersion} to ${entry.current} with ${chain.length} delta(s)`);
+        } else {
+          update = this.fetchJson(`${releasesPath}/${name}/${entry.current}.json`);
+          console.log(`Downloading ${name} release ${entry.current}`);
+        }
+        
+        return update.then(data => {
+          this.storage.set(`release_${name}`, data);
+          this.storage.set(`releaseVersion_${name}`, entry.current);
+          return data;
+        });
+      });
+  },
+  
+  /**
+   * Apply a release delta to a list of gems or a mapping of gem id to record
+   * @param {Array|Object} gems - Data of the delta's source release
+   * @param {Object} delta - Delta with added, changed and removed gems
+   * @returns {Array|Object} Data of the delta's target release
+   */
+  applyDelta: function(gems, delta) {
+    const removed = new Set(delta.removed);
+    if (!Array.isArray(gems)) {
+      const result = {};
+      Object.keys(gems).forEach(id => {
+        if (!removed.has(id)) {
+          result[id] = gems[id];
+        }
+      });
+      return Object.assign(result, delta.changed, delta.added);
+    }
+    
+    let result = gems
+      .filter(gem => !removed.has(gem.id))
+      .map(gem => delta.changed[gem.id] || gem);
+    result = result.concat(Object.values(delta.added));
+    
+    // Present when the new release is not in source order plus additions
+    if (delta.order) {
+      const byId = {};
+      result.forEach(gem => { byId[gem.id] = gem; });
+      result = delta.order.map(id => byId[id]);
+    }
+    return result;
+  },
+  
   /**
    * Get or create a regional subset of gems
    * @param {Object} options - Regional filtering options
@@ -94,6 +265,8 @@ window.HiddenGems.data = {
    * @param {Array} [options.center] - Center coordinates [lng, lat]
    * @param {number} [options.radius] - Radius in kilometers (default: 30)
    * @param {Function} [options.filterFn] - Custom filter function
+   * @param {Object} [options.route] - Route the filter selects gems along,
+   *   as { origin, destination, buffer } ([lng, lat] and kilometers)
    * @returns {Promise} Promise that resolves with regional gems
    */
   getRegionalGems: function(options) {
@@ -101,11 +274,6 @@ window.HiddenGems.data = {
       return Promise.reject(new Error('Region name is required'));
     }
     
-    // Initialize if needed
-    if (!this.initialized || !this.allGemsLoaded) {
-      return this.initialize().then(() => this.getRegionalGems(options));
-    }
-    
     // Check if we already have this region cached
     const cachedRegion = this.storage.get(`region_${options.regionName}`);
     if (cachedRegion && cachedRegion.length > 0) {
@@ -114,7 +282,30 @@ window.HiddenGems.data = {
       return Promise.resolve(cachedRegion);
     }
     
-    // Otherwise, create the regional subset
+    // Until the full dataset is loaded, read only the gem tiles covering the region
+    if (!this.allGemsLoaded) {
+      const tileParams = this.regionTileParams(options);
+      const tileGems = tileParams
+        ? this.loadTileGems(tileParams).catch(error => {
+            console.warn('Could not load gem tiles, waiting for the full dataset:', error);
+            return null;
+          })
+        : Promise.resolve(null);
+      return tileGems.then(gems => gems
+        ? this.buildRegion(options, gems)
+        : this.initialize().then(() => this.buildRegion(options, this.allGems)));
+    }
+    
+    return this.buildRegion(options, this.allGems);
+  },
+  
+  /**
+   * Filter gems down to a region and store the subset
+   * @param {Object} options - Regional filtering options (see getRegionalGems)
+   * @param {Array} gems - Gems to select from
+   * @returns {Promise} Promise that resolves with regional gems
+   */
+  buildRegion: function(options, gems) {
     console.log(`Creating regional subset "${options.regionName}"...`);
     this.showLoading('Finding gems in your area...');
     
@@ -123,7 +314,7 @@ window.HiddenGems.data = {
     
     if (options.filterFn && typeof options.filterFn === 'function') {
       // Use custom filter function if provided
-      filteredGems = this.allGems.filter(options.filterFn);
+      filteredGems = gems.filter(options.filterFn);
     } 
     else if (options.center && options.center.length === 2) {
       // Filter by distance from center
@@ -134,7 +325,7 @@ window.HiddenGems.data = {
         return Promise.reject(new Error('Invalid center coordinates'));
       }
       
-      filteredGems = this.allGems.filter(gem => {
+      filteredGems = gems.filter(gem => {
         const coords = this.coordUtils.fromGem(gem);
         if (!coords) return false;
         
@@ -153,7 +344,7 @@ window.HiddenGems.data = {
     } 
     else {
       // Default: return all gems
-      filteredGems = [...this.allGems];
+      filteredGems = [...gems];
     }
     
     // Store the regional subset
@@ -576,7 +767,8 @@ findGemsAlongRoute: function(pageName, originCoords, destinationCoords, bufferDi
   // If no existing route gems, get them using the filter
   return this.getRegionalGems({
     regionName: regionName,
-    filterFn: routeFilterFn
+    filterFn: routeFilterFn,
+    route: { origin: normalizedOrigin, destination: normalizedDestination, buffer: bufferDistanceKm }
   })
   .then(regionGems => {
     // Sort gems by their progress along the route
@@ -662,25 +662,37 @@ function loadGemsManually(pageName) {
     window.HiddenGems.data.utils.showLoading('Finding hidden gems...');
   }
 
-  // Try to fetch gems from the JSON file
-  return fetch('static/assets/data/hidden_gems.json')
-    .then(response => {
-      if (!response.ok) {
-        throw new Error(`Failed to load gems data: ${response.status}`);
-      }
-      return response.json();
+  // Load only the gem tiles in the current view, falling back to the whole JSON file
+  const bounds = window.map && window.map.getBounds();
+  const viewportGems = bounds
+    ? window.HiddenGems.data.loadTileGems(
+        `bbox=${bounds.getSouth()},${bounds.getWest()},${bounds.getNorth()},${bounds.getEast()}`)
+    : Promise.reject(new Error('Map has no viewport yet'));
+
+  return viewportGems
+    .catch(error => {
+      console.warn('Could not load gem tiles in view, loading all gems:', error);
+      return fetch('static/assets/data/hidden_gems.json')
+        .then(response => {
+          if (!response.ok) {
+            throw new Error(`Failed to load gems data: ${response.status}`);
+          }
+          return response.json();
+        })
+        .then(jsonGems => {
+          // Get user-added gems from localStorage if any
+          let userGems = [];
+          try {
+            userGems = JSON.parse(window.HiddenGems.data.storage.get('userGems') || '[]');
+          } catch (error) {
+            console.warn('Error parsing user gems from localStorage:', error);
+          }
+          return [...jsonGems, ...userGems];
+        });
     })
-    .then(jsonGems => {
-      // Get user-added gems from localStorage if any
-      let userGems = [];
-      try {
-        userGems = JSON.parse(window.HiddenGems.data.storage.get('userGems') || '[]');
-      } catch (error) {
-        console.warn('Error parsing user gems from localStorage:', error);
-      }
-
-      // Combine and ensure all gems have unique IDs
-      const allGems = [...jsonGems, ...userGems].map((gem, index) => {
+    .then(gems => {
+      // Ensure all gems have unique IDs
+      const allGems = gems.map((gem, index) => {
         if (!gem.id) {
           gem.id = `gem-${index}`;
         }
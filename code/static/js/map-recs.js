@@ -789,6 +789,16 @@ function initializeDetailCards(gems) {
 async function loadCachedReviews() {
     if (!window.HiddenGems.reviewCache) {
         try {
+            // Current reviews release (kept in storage and patched with deltas), else the JSON file
+            const data = window.HiddenGems.data;
+            const release = await data.syncRelease('reviews').catch(() => null);
+            const reviews = release || data.storage.get('release_reviews');
+            if (reviews) {
+                window.HiddenGems.reviewCache = reviews;
+                console.log(`Loaded ${Object.keys(reviews).length} cached reviews from release`);
+                return window.HiddenGems.reviewCache;
+            }
+            
             const response = await fetch('static/assets/data/reviews.json');
             if (response.ok) {
                 const reviews = await response.json();
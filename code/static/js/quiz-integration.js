@@ -775,6 +775,11 @@ document.addEventListener('DOMContentLoaded', function () {
 
                 console.log("Recommended gems:", gems);
                 console.log("Processing time:", meta.processingTime || "unknown");
+
+                // Fallback results carry the remaining minimum wait; the server no longer sleeps through it
+                if (meta.delay > 0) {
+                    await new Promise(resolve => setTimeout(resolve, meta.delay * 1000));
+                }
                 sessionStorage.setItem("recommendedGems", JSON.stringify(gems));
 
                 // Mark progress as complete
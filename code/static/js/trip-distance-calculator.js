@@ -91,8 +91,11 @@ function createTripDistanceInfo(cardData) {
   // Calculate direct time
   const directTimeMinutes = Math.ceil((calculatedDirectDistance / drivingSpeedKmPerHour) * 60);
   
-  // Calculate detour driving time
-  const detourDrivingTimeMinutes = Math.ceil((calculatedDetourDistance / drivingSpeedKmPerHour) * 60);
+  // Calculate detour driving time, from the road network's detour when the server priced one
+  const roadDetourMinutes = typeof cardData.detourMinutes === 'number' ? Math.ceil(cardData.detourMinutes) : null;
+  const detourDrivingTimeMinutes = roadDetourMinutes !== null
+    ? directTimeMinutes + roadDetourMinutes
+    : Math.ceil((calculatedDetourDistance / drivingSpeedKmPerHour) * 60);
   
   // Get visit time from card data or use default
   const visitTimeMinutes = cardData.time ? parseInt(cardData.time, 10) : 30;